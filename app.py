@@ -1,89 +1,15 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime
-import os, io, base64
+import os, uuid
+from core import assets, engine, batch, rollups, exports, perf, charts, watcher, store, vencimientos, analytics, quality
 
 st.set_page_config(page_title="SERVMAC — Control Documental 2025", page_icon="🏗️", layout="wide", initial_sidebar_state="expanded")
 
-# ─── LOGO SVG ───
-LOGO_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 240 60">
-  <defs><linearGradient id="g1" x1="0%" y1="0%" x2="100%" y2="100%"><stop offset="0%" style="stop-color:#004481"/><stop offset="100%" style="stop-color:#0066B3"/></linearGradient></defs>
-  <rect x="0" y="8" width="48" height="44" rx="8" fill="url(#g1)"/>
-  <path d="M12 22 L24 16 L36 22 L36 38 L24 44 L12 38Z" fill="none" stroke="white" stroke-width="2"/>
-  <path d="M24 16 L24 44" stroke="white" stroke-width="1.5" opacity="0.6"/>
-  <path d="M12 30 L36 30" stroke="white" stroke-width="1.5" opacity="0.6"/>
-  <circle cx="24" cy="30" r="4" fill="#00A9E0"/>
-  <text x="58" y="28" font-family="Helvetica,Arial,sans-serif" font-size="18" font-weight="700" fill="#004481">SERVMAC</text>
-  <text x="58" y="46" font-family="Helvetica,Arial,sans-serif" font-size="10" font-weight="400" fill="#5C7D9A" letter-spacing="1.5">CONTROL DOCUMENTAL</text>
-  <rect x="158" y="14" width="1.5" height="32" rx="1" fill="#E0E8F0"/>
-  <text x="169" y="28" font-family="Helvetica,Arial,sans-serif" font-size="11" font-weight="600" fill="#004481">BBVA</text>
-  <text x="169" y="42" font-family="Helvetica,Arial,sans-serif" font-size="8" font-weight="400" fill="#5C7D9A" letter-spacing="0.8">CONSERVACIÓN NE</text>
-</svg>'''
-LOGO_B64 = base64.b64encode(LOGO_SVG.encode()).decode()
-
 # ─── CSS ───
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=DM+Sans:opsz,wght@9..40,300;9..40,400;9..40,500;9..40,600;9..40,700&family=JetBrains+Mono:wght@400;500&display=swap');
-html, body, [class*="css"] { font-family: 'DM Sans', sans-serif !important; }
-.main .block-container { padding: 1.5rem 2.5rem 3rem; max-width: 1440px; }
-section[data-testid="stSidebar"] { background: linear-gradient(180deg, #001B36 0%, #002952 40%, #003D7A 100%); border-right: none; }
-section[data-testid="stSidebar"] * { color: #C8DDEF !important; }
-section[data-testid="stSidebar"] hr { border-color: rgba(255,255,255,0.08) !important; }
-section[data-testid="stSidebar"] .stRadio > div[role="radiogroup"] > label[data-baseweb="radio"] {
-    background: rgba(255,255,255,0.04); border-radius: 10px; padding: 0.45rem 0.8rem; margin-bottom: 2px; transition: all 0.2s;
-}
-section[data-testid="stSidebar"] .stRadio > div[role="radiogroup"] > label[data-baseweb="radio"]:hover { background: rgba(0,169,224,0.15); }
-
-.kpi-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 16px; margin-bottom: 24px; }
-.kpi-card { background: white; border-radius: 14px; padding: 20px 22px; box-shadow: 0 1px 3px rgba(0,68,129,0.06); border-left: 4px solid #004481; transition: all 0.25s; position: relative; overflow: hidden; }
-.kpi-card:hover { box-shadow: 0 4px 12px rgba(0,68,129,0.08); transform: translateY(-2px); }
-.kpi-card::after { content: ''; position: absolute; top: 0; right: 0; width: 60px; height: 60px; background: linear-gradient(135deg, transparent 50%, rgba(0,68,129,0.03) 50%); border-radius: 0 14px 0 0; }
-.kpi-card .kpi-label { font-size: 0.7rem; font-weight: 600; text-transform: uppercase; letter-spacing: 0.8px; color: #5C7D9A; margin-bottom: 6px; }
-.kpi-card .kpi-value { font-size: 1.55rem; font-weight: 700; color: #0F1B2D; line-height: 1.2; font-family: 'JetBrains Mono', monospace; }
-.kpi-card .kpi-sub { font-size: 0.72rem; color: #5C7D9A; margin-top: 4px; }
-.kpi-card.green { border-left-color: #0E6E3D; }
-.kpi-card.orange { border-left-color: #D4721A; }
-.kpi-card.red { border-left-color: #C0392B; }
-.kpi-card.aqua { border-left-color: #00A9E0; }
-
-.hero-kpi { background: linear-gradient(135deg, #004481 0%, #0066B3 60%, #00A9E0 100%); border-radius: 18px; padding: 28px 32px; color: white; box-shadow: 0 12px 40px rgba(0,68,129,0.12); margin-bottom: 28px; position: relative; overflow: hidden; }
-.hero-kpi::before { content: ''; position: absolute; top: -30%; right: -10%; width: 200px; height: 200px; background: radial-gradient(circle, rgba(255,255,255,0.08) 0%, transparent 70%); border-radius: 50%; }
-.hero-kpi h4 { font-size: 0.8rem; opacity: 0.8; margin: 0; font-weight: 400; letter-spacing: 1px; text-transform: uppercase; }
-.hero-kpi h1 { font-size: 2rem; margin: 8px 0 4px; font-weight: 700; font-family: 'JetBrains Mono', monospace; }
-.hero-kpi p { font-size: 0.85rem; opacity: 0.75; margin: 0; }
-
-.section-hdr { display: flex; align-items: center; gap: 10px; margin: 28px 0 16px; padding-bottom: 10px; border-bottom: 2px solid #EEF2F7; }
-.section-hdr .icon { width: 34px; height: 34px; background: linear-gradient(135deg, #004481, #0066B3); border-radius: 9px; display: flex; align-items: center; justify-content: center; font-size: 16px; flex-shrink: 0; }
-.section-hdr h3 { font-size: 1.05rem; font-weight: 600; color: #0F1B2D; margin: 0; }
-.section-hdr .badge { background: #EEF2F7; color: #5C7D9A; font-size: 0.7rem; padding: 3px 10px; border-radius: 20px; font-weight: 500; }
-
-.overview-section { background: white; border-radius: 14px; padding: 24px; box-shadow: 0 1px 3px rgba(0,68,129,0.06); margin-bottom: 16px; border: 1px solid #E8EEF4; }
-.overview-section h4 { font-size: 0.95rem; font-weight: 600; color: #004481; margin: 0 0 16px; padding-bottom: 10px; border-bottom: 1px solid #EEF2F7; display: flex; align-items: center; gap: 8px; }
-.ov-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(220px, 1fr)); gap: 12px; }
-.ov-item { background: #F7F9FC; border-radius: 10px; padding: 12px 16px; }
-.ov-item .label { font-size: 0.68rem; text-transform: uppercase; letter-spacing: 0.6px; color: #5C7D9A; font-weight: 500; }
-.ov-item .val { font-size: 0.95rem; font-weight: 600; color: #0F1B2D; margin-top: 2px; }
-
-.status-badge { display: inline-block; padding: 4px 12px; border-radius: 20px; font-size: 0.72rem; font-weight: 600; }
-.status-badge.green { background: #E8F5E9; color: #0E6E3D; }
-.status-badge.orange { background: #FFF3E0; color: #D4721A; }
-.status-badge.red { background: #FFEBEE; color: #C0392B; }
-.status-badge.blue { background: #E3F2FD; color: #004481; }
-
-div[data-testid="stDataFrame"] { border-radius: 14px; overflow: hidden; box-shadow: 0 1px 3px rgba(0,68,129,0.06); }
-.stTabs [data-baseweb="tab-list"] { gap: 4px; background: #F7F9FC; border-radius: 12px; padding: 4px; }
-.stTabs [data-baseweb="tab"] { border-radius: 10px; padding: 8px 20px; font-weight: 500; font-size: 0.85rem; }
-.stDownloadButton button { background: linear-gradient(135deg, #004481, #0066B3) !important; color: white !important; border: none !important; border-radius: 10px !important; font-weight: 600 !important; padding: 0.5rem 1.5rem !important; }
-.stDownloadButton button:hover { box-shadow: 0 4px 12px rgba(0,68,129,0.12) !important; transform: translateY(-1px) !important; }
-.divider { height: 1px; background: #EEF2F7; margin: 24px 0; }
-#MainMenu, footer, header { visibility: hidden; }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(assets.CSS, unsafe_allow_html=True)
 
 # ─── HELPERS ───
 def fmt(v):
@@ -106,522 +32,756 @@ def section_header(icon, title, badge=""):
 def ov_item(label, value):
     return f'<div class="ov-item"><div class="label">{label}</div><div class="val">{value}</div></div>'
 
+# Column-at-a-time card rendering for the Overview: each section is one HTML string built from whole columns.
+OV_PAGE = 50
+
+def ov_col(df, c, kind=""):
+    # kind: "" text, "$" money, "d" date — same output as str()/fmt()/str()[:10] applied per row.
+    if c not in df.columns: return pd.Series(fmt(None) if kind == "$" else "—", index=df.index)
+    if kind == "$": return pd.to_numeric(df[c], errors='coerce').map(fmt)
+    s = df[c].astype(str)
+    return s.str[:10] if kind == "d" else s
+
+def ov_items(df, fields):
+    # fields: [(label, column, kind)] -> Series with the concatenated ov-item HTML of each row.
+    with perf.span('overview:html'):
+        h = pd.Series("", index=df.index)
+        for lb, c, kind in fields:
+            pre, post = ov_item(lb, "\0").split("\0")
+            h = h + pre + ov_col(df, c, kind) + post
+    return h
+
+def ov_cards(titles, items):
+    # One overview-section card per row, joined into a single markdown block.
+    return ''.join('<div class="overview-section"><h4>' + titles + '</h4><div class="ov-grid">' + items + '</div></div>')
+
+def ov_page(df, key):
+    if len(df) <= OV_PAGE: return df
+    n = -(-len(df) // OV_PAGE)
+    p = st.number_input(f"Página (de {n})", 1, n, 1, key=f"ovp_{key}")
+    st.caption(f"Registros {(p-1)*OV_PAGE+1}–{min(p*OV_PAGE, len(df))} de {len(df)}")
+    return df.iloc[(p-1)*OV_PAGE:p*OV_PAGE]
+
 PLOTLY_LAYOUT = dict(font=dict(family="DM Sans, sans-serif", size=12, color="#0F1B2D"), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', margin=dict(l=20, r=20, t=30, b=20), hoverlabel=dict(bgcolor="white", font_size=12))
 COLORS = ['#004481','#0066B3','#00A9E0','#4DC8E9','#0E6E3D','#D4721A','#C0392B','#8E44AD','#2C3E50']
 
 # ─── DATA LOADING ───
-@st.cache_data
-def load_data(fp):
-    sheets = {}
-    xls = pd.ExcelFile(fp)
-    cfg = {
-        'ordenes': ('REGISTRO ORDEN DE COMPRA', 1, ['FECHA','FECHA DE PUBLICACIÓN'], ['IMPORTE TOTAL','IMPORTE SIN IVA','IMPORTE DE LA ORDEN [TOTAL IMPORTE CONTRATO] -SIN IVA','IMPORTE CORRESPONDIENTE A CANTIDAD EXPEDIDA','IMPORTE DE CIERRE','BALANCE'], 'ID. PEDIDO COMPRADOR'),
-        'contratos': ('CONTRATOS || ONE TEAM', 1, ['Fecha de asignación proyecto','Fecha inicio vigencia anexo','Fecha de Recepción','Fecha Firma Interna','Fecha de detonación','Fecha de cierre operación (Acta final)','Fecha envío cierre'], ['Importe Acción','Importe Certificación','Importe Total','Importe Cierre Administrativo','Total Pagado','Por pagar','Por devolver'], 'ID Folio Contrato'),
-        'obra_menor': ('OBRA MENOR', 1, ['FECHA_DE_ASIGNACIÓN','FECHA INICIO','FECHA FIN','FECHA FIN REAL','FECHA CORREO DETONACIÓN','FECHA CIERRE ADMINISTRATIVO'], ['PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL','Importe UDA','Total Pagado','VARIACIÓN_PRESUPUESTAL'], 'ID_PROYECTO'),
-        'facturacion_2025': ('Facturación 2025', 0, ['Fecha'], ['Subtotal (MXN)','Impuestos (MXN)','Total (MXN)'], 'NO.'),
-        'prefacturas': ('CONTROL DE PREFACTURAS', 1, ['Fecha solicitud','Fecha Emisión','Fecha de aceptación','Fecha de factura'], ['Monto (sin IVA)','IVA','Total'], 'Folio Interno'),
-        'fianzas': ('CONTROL DE FIANZAS', 1, ['Fecha Solicitud Fianza','Fecha Emisión','Vencimiento'], ['Monto de contrato','Monto + IVA','Importe a afianzar || Cumplimiento','Importe a afianzar || Buena calidad','Monto Garantizado Fianza'], 'CR'),
-        'facturas_adquira': ('Copia de Facturas Adquira', 0, [], ['BASE IMPONIBLE','TOTAL IMPUESTOS','TOTAL FACTURA'], 'NÚMERO'),
-        'proyectos_2024': ('Proyectos 2024', 1, [], ['Importe de cierre','Total Pagado','Por pagar','Por devolver','Importe CFE'], 'Llave comité /Clave UDA'),
-    }
-    for key, (sn, hdr, dates, nums, drop) in cfg.items():
-        try:
-            df = pd.read_excel(xls, sn, header=hdr)
-            df.columns = df.columns.str.strip()
-            for c in dates:
-                if c in df.columns: df[c] = pd.to_datetime(df[c], errors='coerce')
-            for c in nums:
-                if c in df.columns: df[c] = pd.to_numeric(df[c], errors='coerce')
-            df = df.dropna(subset=[drop], how='all')
-            sheets[key] = df
-        except: pass
-    return sheets
-
-def get_all_sucursales(S):
-    n = set()
-    mappings = [('ordenes','NOMBRE DEL PROYECTO O SUCURSAL'), ('obra_menor','SUCURSAL'), ('contratos','Proyecto / Obra'),
-                ('prefacturas','Proyecto / Obra'), ('fianzas','Proyecto'), ('proyectos_2024','Sucursal')]
-    for k, c in mappings:
-        if k in S and c in S[k].columns: n.update(S[k][c].dropna().unique())
-    return sorted([str(x) for x in n if str(x).strip()])
-
-def get_sucursal_data(S, suc):
-    d, u = {}, str(suc).upper().strip()
-    mappings = [('ordenes','NOMBRE DEL PROYECTO O SUCURSAL'), ('contratos','Proyecto / Obra'), ('obra_menor','SUCURSAL'),
-                ('prefacturas','Proyecto / Obra'), ('fianzas','Proyecto'), ('proyectos_2024','Sucursal'), ('facturas_adquira','PROYECTO RELACIONADO')]
-    for k, c in mappings:
-        if k in S and c in S[k].columns:
-            m = S[k][S[k][c].astype(str).str.upper().str.strip().str.contains(u, na=False)]
-            if len(m) > 0: d[k] = m
-    return d
-
-def generate_pdf(suc, sd):
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.units import inch
-    from reportlab.lib.colors import HexColor, white
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=letter, leftMargin=0.7*inch, rightMargin=0.7*inch, topMargin=0.7*inch, bottomMargin=0.7*inch)
-    bb = HexColor('#004481'); bm = HexColor('#0066B3'); bg = HexColor('#F7F9FC'); bd = HexColor('#E0E8F0'); tx = HexColor('#5C7D9A')
-    sty = getSampleStyleSheet()
-    sty.add(ParagraphStyle('T', parent=sty['Title'], fontSize=20, textColor=bb, fontName='Helvetica-Bold', spaceAfter=4))
-    sty.add(ParagraphStyle('Sub', parent=sty['Normal'], fontSize=10, textColor=tx, spaceAfter=16))
-    sty.add(ParagraphStyle('SH', parent=sty['Heading2'], fontSize=13, textColor=bb, fontName='Helvetica-Bold', spaceBefore=20, spaceAfter=8))
-    sty.add(ParagraphStyle('CT', parent=sty['Normal'], fontSize=7.5, leading=10))
-    sty.add(ParagraphStyle('CB', parent=sty['Normal'], fontSize=7.5, leading=10, fontName='Helvetica-Bold'))
-    sty.add(ParagraphStyle('FT', parent=sty['Normal'], fontSize=7, textColor=tx))
-    story = []
-    story.append(Paragraph("SERVMAC — Sistema Integral de Control Documental", sty['T']))
-    story.append(Paragraph(f"Reporte: <b>{suc}</b> | {datetime.now().strftime('%d/%m/%Y %H:%M')} | Conservación BBVA Noreste", sty['Sub']))
-    story.append(HRFlowable(width="100%", thickness=2, color=bb, spaceAfter=12))
-
-    tots = [('ÓRDENES', len(sd.get('ordenes',[])), sd.get('ordenes',pd.DataFrame()).get('IMPORTE TOTAL',pd.Series(dtype=float)).sum()),
-            ('CONTRATOS', len(sd.get('contratos',[])), sd.get('contratos',pd.DataFrame()).get('Importe Total',pd.Series(dtype=float)).sum()),
-            ('OBRA MENOR', len(sd.get('obra_menor',[])), sd.get('obra_menor',pd.DataFrame()).get('IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL',pd.Series(dtype=float)).sum()),
-            ('PREFACTURAS', len(sd.get('prefacturas',[])), sd.get('prefacturas',pd.DataFrame()).get('Total',pd.Series(dtype=float)).sum())]
-    kd = [[Paragraph(f'<b>{t[0]}</b>', sty['CB']) for t in tots],
-          [Paragraph(f'{t[1]} reg.', sty['CT']) for t in tots],
-          [Paragraph(f'<b>${t[2]:,.2f}</b>', sty['CB']) for t in tots]]
-    kt = Table(kd, colWidths=[doc.width/4]*4)
-    kt.setStyle(TableStyle([('BACKGROUND',(0,0),(-1,0),bb),('TEXTCOLOR',(0,0),(-1,0),white),('BACKGROUND',(0,1),(-1,-1),bg),
-        ('GRID',(0,0),(-1,-1),0.5,bd),('VALIGN',(0,0),(-1,-1),'MIDDLE'),('ALIGN',(0,0),(-1,-1),'CENTER'),
-        ('TOPPADDING',(0,0),(-1,-1),6),('BOTTOMPADDING',(0,0),(-1,-1),6)]))
-    story.append(kt); story.append(Spacer(1,16))
-
-    def add_tbl(title, df, cols):
-        if df is None or len(df)==0: return
-        cs = [c for c in cols if c in df.columns]
-        if not cs: return
-        story.append(Paragraph(title, sty['SH']))
-        hdr = [Paragraph(f'<b>{c[:22]}</b>', sty['CB']) for c in cs]
-        rows = [hdr]
-        for _, r in df.head(30).iterrows():
-            row = []
-            for c in cs:
-                v = r[c]
-                if pd.isna(v): v = "—"
-                elif isinstance(v, float): v = f"${v:,.2f}" if abs(v) > 100 else f"{v:,.2f}"
-                elif isinstance(v, pd.Timestamp): v = v.strftime('%d/%m/%Y')
-                else: v = str(v)[:35]
-                row.append(Paragraph(v, sty['CT']))
-            rows.append(row)
-        cw = [doc.width/len(cs)]*len(cs)
-        t = Table(rows, colWidths=cw, repeatRows=1)
-        t.setStyle(TableStyle([('BACKGROUND',(0,0),(-1,0),bm),('TEXTCOLOR',(0,0),(-1,0),white),('ROWBACKGROUNDS',(0,1),(-1,-1),[white,bg]),
-            ('GRID',(0,0),(-1,-1),0.4,bd),('VALIGN',(0,0),(-1,-1),'TOP'),('TOPPADDING',(0,0),(-1,-1),4),('BOTTOMPADDING',(0,0),(-1,-1),4),
-            ('LEFTPADDING',(0,0),(-1,-1),4),('RIGHTPADDING',(0,0),(-1,-1),4)]))
-        story.append(t)
-        if len(df)>30: story.append(Paragraph(f"<i>30 de {len(df)} registros</i>", sty['FT']))
-        story.append(Spacer(1,10))
-
-    add_tbl("Órdenes de Compra", sd.get('ordenes'), ['FECHA','IMPORTE TOTAL','ESTADO','TIPO DE PROYECTO','IMPORTE DE CIERRE','ESTATUS'])
-    add_tbl("Contratos One Team", sd.get('contratos'), ['ID Folio Contrato','Importe Total','Estatus Operativo','Estatus Cierre','Total Pagado','Por pagar'])
-    add_tbl("Obra Menor", sd.get('obra_menor'), ['ID_PROYECTO','PROYECTO','ASIGNADO_A','ESTATUS_OPERACIÓN REAL','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL','Total Pagado'])
-    add_tbl("Prefacturas", sd.get('prefacturas'), ['Folio Interno','Fecha solicitud','Monto (sin IVA)','Total','Estatus'])
-    add_tbl("Fianzas", sd.get('fianzas'), ['CR','Afianzadora','Monto de contrato','Estatus Expedición','Vencimiento','Estatus Vigencia'])
-    add_tbl("Proyectos 2024", sd.get('proyectos_2024'), ['CR','Proyecto','Importe de cierre','Estatus','Total Pagado','Por pagar'])
-    add_tbl("Facturas Adquira", sd.get('facturas_adquira'), ['NÚMERO','FECHA FACTURA','CATEGORIA','BASE IMPONIBLE','TOTAL FACTURA','ESTADO'])
-
-    story.append(Spacer(1,20))
-    story.append(HRFlowable(width="100%", thickness=1, color=bd, spaceAfter=8))
-    story.append(Paragraph(f"SERVMAC — Conservación BBVA Noreste | {datetime.now().strftime('%d/%m/%Y %H:%M')} | Sistema Integral 2025", sty['FT']))
-    doc.build(story); buf.seek(0)
-    return buf
+# Sheets and their indexes live in a shared engine (core/engine.py), one per workbook for the whole process, not per session.
+# With SCD_SERVICE_URL the sheets come from a running `python -m core.service` instead of the Excel file.
+# Otherwise the workbook comes from core/watcher.py, which reloads it in the background when a newer one lands in data/.
+SERVICE_URL = os.environ.get("SCD_SERVICE_URL", "")
+
+# No st.cache_data/cache_resource here: the engine cache is shared by every session and evicts by size, and an upload
+# is looked up by a hash of its bytes, so the same file uploaded in ten sessions is one copy of the sheets.
+def open_engine(fp):
+    return engine.upload(fp)
+
+def remote_engine():
+    # Queries go to the service (core/engine.py · REMOTE); only pages that need whole sheets fetch them.
+    return engine.remote(SERVICE_URL)
 
 # ─── LOAD ───
 DATA_PATH = "SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2025.xlsx"
-if not os.path.exists(DATA_PATH):
-    for p in ["/mnt/user-data/uploads/SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2025.xlsx", "data/SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2025.xlsx"]:
-        if os.path.exists(p): DATA_PATH = p; break
+W = None if SERVICE_URL else watcher.start([DATA_PATH] + watcher.DIRS, year=watcher.year_of(DATA_PATH))
 
 with st.sidebar:
-    st.markdown(f'<div style="padding:16px 0 8px;"><img src="data:image/svg+xml;base64,{LOGO_B64}" style="width:210px;"></div>', unsafe_allow_html=True)
+    st.markdown(assets.LOGO_HTML, unsafe_allow_html=True)
     st.markdown("")
-    uploaded = st.file_uploader("", type=['xlsx','xls'], label_visibility="collapsed")
-    if uploaded: DATA_PATH = uploaded
-    if not os.path.exists(DATA_PATH) if isinstance(DATA_PATH, str) else False:
-        if not uploaded: st.warning("Sube tu archivo Excel"); st.stop()
+    uploaded = None if SERVICE_URL else st.file_uploader("", type=['xlsx','xls'], label_visibility="collapsed")
+    if W and not uploaded and watcher.current(W) is None:
+        if W['error']: st.error(f"Error: {W['error'][2]}")
+        st.warning("Sube tu archivo Excel"); st.stop()
     st.markdown("---")
     modulo = st.radio("NAVEGACIÓN", ["🏠  Dashboard","🔎  Overview Sucursal","📋  Órdenes de Compra","📑  Contratos One Team",
-        "🔧  Obra Menor","💰  Facturación 2025","📄  Prefacturas","🛡️  Fianzas","📊  Facturas Adquira","📁  Proyectos 2024","🗂️  Explorador"], index=0)
+        "🔧  Obra Menor","💰  Facturación 2025","📄  Prefacturas","🛡️  Fianzas","📊  Facturas Adquira","📁  Proyectos 2024","📆  Multianual","🔗  Conciliación","🩺  Calidad de datos","🗂️  Explorador"], index=0)
     st.markdown("---")
     st.markdown(f'<div style="text-align:center;opacity:0.5;font-size:0.7rem;">Actualizado {datetime.now().strftime("%d/%m/%Y")}<br>v2.0</div>', unsafe_allow_html=True)
 
-try: sheets = load_data(DATA_PATH)
-except Exception as e: st.error(f"Error: {e}"); st.stop()
+perf.begin(modulo.strip())
+try:
+    # One read of W['current']: the engine and the file name shown below come from the same load.
+    live = None if SERVICE_URL or uploaded else W['current']
+    with perf.span('app:datos'): E = remote_engine() if SERVICE_URL else open_engine(uploaded) if uploaded else live[0]
+except Exception as e: perf.end(); st.error(f"Error: {e}"); st.stop()
+sheets, meta = E['sheets'], engine.meta(E)
+if live:
+    st.sidebar.caption(f"📂 {os.path.basename(live[1])} · cargado {datetime.fromtimestamp(live[3]).strftime('%d/%m/%Y %H:%M')}")
+    if W['error']: st.sidebar.caption(f"⚠️ No se pudo cargar {os.path.basename(W['error'][0] or '')}: {W['error'][2]}")
+with perf.span('app:cubo'): DIMS = engine.dims(E)
+def has(k, by): return (list(by) if isinstance(by, tuple) else by) in DIMS.get(k, [])
+if meta['errors']:
+    with st.sidebar.expander(f"⚠️ {len(meta['errors'])} hoja(s) sin cargar"):
+        for k, e in meta['errors'].items(): st.caption(f"**{k}** — {e}")
+mem = {k: v for k, v in meta.get('memory', {}).items() if v[0]}
+if mem:
+    with st.sidebar.expander(f"💾 Memoria de datos · {sum(a for _,a in mem.values())/2**20:.1f} MB"):
+        for k,(b,a) in mem.items(): st.caption(f"**{k}** — {b/2**20:.2f} → {a/2**20:.2f} MB")
+        cs = engine.cache_stats()
+        st.caption(f"Caché de libros: {cs['entries']} en memoria ({cs['bytes']/2**20:.0f} de {cs['max_bytes']/2**20:.0f} MB), {cs['on_disk']} en disco · "
+                   f"{cs['hits']} aciertos, {cs['misses']} fallos, {cs['restored']} recuperados, {cs['evictions']} desalojos")
+
+# ─── DOWNLOADS ───
+def download_buttons(df, name, state):
+    # Nothing is serialized until "Preparar descarga"; the file stays on disk for this data/sheet/filter state and format.
+    c1,c2,_ = st.columns([1,1,3])
+    with c1: fx = st.selectbox("Formato", list(exports.FORMATS), format_func=lambda f: exports.FORMATS[f][0], key=f"xf_{name}", label_visibility="collapsed")
+    k = exports.state_key(meta['fingerprint'], name, state, fx)
+    with c2:
+        if st.button("📥 Preparar descarga", key=f"xb_{name}") or st.session_state.get(f"xp_{name}") == k:
+            st.session_state[f"xp_{name}"] = k
+            with st.spinner("Generando archivo…"): f = exports.export(df, fx, k)
+            with f: st.download_button(f"📥 Descargar {exports.FORMATS[fx][0]}", f, f"{name}.{fx}", exports.FORMATS[fx][1], key=f"xd_{name}")
+
+def plot(key, build):
+    # Figures are built once per (data, chart, filter state) and shared between sessions (core/charts.py).
+    st.plotly_chart(charts.figure((meta['fingerprint'],)+key, build), use_container_width=True)
 
 # ─── GENERIC MODULE RENDERER ───
 def render_module(title, key, kpis, filters, chart_fn, tcols):
-    if key not in sheets: st.error(f"Sin datos: {title}"); return
-    df = sheets[key].copy()
-    st.markdown(f'<div class="hero-kpi" style="padding:18px 28px;"><h4>{title.upper()}</h4><h1>{fmt_int(len(df))} registros</h1></div>', unsafe_allow_html=True)
+    if key not in meta['sheets']: st.error(f"Sin datos: {title}"); return
+    st.markdown(f'<div class="hero-kpi" style="padding:18px 28px;"><h4>{title.upper()}</h4><h1>{fmt_int(meta['sheets'][key])} registros</h1></div>', unsafe_allow_html=True)
     fc = st.columns(len(filters)) if filters else []
+    sel = ()
     for i,(cn,lb) in enumerate(filters):
-        if cn in df.columns:
+        if cn in meta['columns'][key]:
             with fc[i]:
-                o = ['Todos'] + sorted([str(x) for x in df[cn].dropna().unique()])
-                s = st.selectbox(lb, o, key=f"f_{key}_{cn}")
-                if s != 'Todos': df = df[df[cn].astype(str) == s]
+                s = st.selectbox(lb, ['Todos'] + engine.options(E, key, cn, sel), key=f"f_{key}_{cn}")
+                if s != 'Todos': sel += ((cn, s),)
+    with perf.span(f'modulo:{key}:filtros'): df = engine.sheet(E, key, sel)
+    with perf.span(f'modulo:{key}:kpis'): ks = engine.kpis(E, key, [col for _,col,_ in kpis], sel)
     h = '<div class="kpi-grid">'
     for lb,col,sty in kpis:
-        v = df[col].sum() if col in df.columns else 0
-        h += kpi_card(lb, fmt(v) if abs(v)>1000 else fmt_int(v), f"{df[col].notna().sum() if col in df.columns else 0} reg.", sty)
+        v, n = ks[col]
+        h += kpi_card(lb, fmt(v) if abs(v)>1000 else fmt_int(v), f"{n} reg.", sty)
     st.markdown(h+'</div>', unsafe_allow_html=True)
-    chart_fn(df)
-    st.markdown(section_header("📋","Detalle",f"{len(df)} reg."), unsafe_allow_html=True)
-    dc = [c for c in tcols if c in df.columns]
-    st.dataframe(df[dc], use_container_width=True, height=420, hide_index=True)
-    st.download_button("📥 CSV", df.to_csv(index=False).encode('utf-8'), f"{key}.csv", "text/csv")
-
-# ═══ DASHBOARD ═══
-if modulo == "🏠  Dashboard":
-    st.markdown(f'<div class="hero-kpi"><h4>SISTEMA INTEGRAL DE CONTROL DOCUMENTAL 2025</h4><h1>SERVMAC — Conservación BBVA Noreste</h1><p>Panel de control y monitoreo operativo | {len(sheets)} módulos activos</p></div>', unsafe_allow_html=True)
-    kpis = [
-        ("Órdenes de Compra", fmt_int(len(sheets.get('ordenes',[]))), fmt(sheets.get('ordenes',pd.DataFrame()).get('IMPORTE TOTAL',pd.Series(dtype=float)).sum())+" total", ""),
-        ("Contratos One Team", fmt_int(len(sheets.get('contratos',[]))), fmt(sheets.get('contratos',pd.DataFrame()).get('Importe Total',pd.Series(dtype=float)).sum())+" total", "green"),
-        ("Obra Menor", fmt_int(len(sheets.get('obra_menor',[]))), fmt(sheets.get('obra_menor',pd.DataFrame()).get('IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL',pd.Series(dtype=float)).sum())+" cierre", "orange"),
-        ("Facturación 2025", fmt_int(len(sheets.get('facturacion_2025',[]))), fmt(sheets.get('facturacion_2025',pd.DataFrame()).get('Total (MXN)',pd.Series(dtype=float)).sum())+" total", "aqua"),
-        ("Prefacturas", fmt_int(len(sheets.get('prefacturas',[]))), fmt(sheets.get('prefacturas',pd.DataFrame()).get('Total',pd.Series(dtype=float)).sum()), "red"),
-        ("Fianzas", fmt_int(len(sheets.get('fianzas',[]))), fmt(sheets.get('fianzas',pd.DataFrame()).get('Monto Garantizado Fianza',pd.Series(dtype=float)).sum())+" garantizado", "green"),
-    ]
-    st.markdown('<div class="kpi-grid">'+''.join(kpi_card(l,v,s,c) for l,v,s,c in kpis)+'</div>', unsafe_allow_html=True)
-
-    c1,c2 = st.columns(2)
+    with perf.span(f'modulo:{key}:graficas'): chart_fn(df, sel)
+    with perf.span(f'modulo:{key}:tabla'):
+        st.markdown(section_header("📋","Detalle",f"{len(df)} reg."), unsafe_allow_html=True)
+        dc = [c for c in tcols if c in df.columns]
+        st.dataframe(df[dc], use_container_width=True, height=420, hide_index=True)
+        download_buttons(df, key, sel)
+
+# ─── AGING ───
+def aging_section(key, sel):
+    # Buckets, stage times and outstanding amounts come from arrays built once per load (core/analytics.py).
+    b = engine.aging_buckets(E, key, sel); day = str(vencimientos.today().date())
+    st.markdown(section_header("⏳","Antigüedad",f"{int(b['Registros'].sum())} reg."),unsafe_allow_html=True)
+    # Without an amount column (e.g. a Proyectos 2024 sheet lacking Por pagar / Por devolver) the bars show record counts.
+    amt = b.columns[2] if len(b.columns) > 2 else None
+    if amt is None: st.info("La hoja no tiene columnas de importe pendiente; la antigüedad se muestra solo en registros.")
+    c1,c2=st.columns(2)
     with c1:
-        st.markdown(section_header("📊","Órdenes por Estado"), unsafe_allow_html=True)
-        if 'ordenes' in sheets and 'ESTADO' in sheets['ordenes'].columns:
-            d=sheets['ordenes']['ESTADO'].value_counts().reset_index(); d.columns=['Estado','Cantidad']
-            fig=px.pie(d,values='Cantidad',names='Estado',hole=0.55,color_discrete_sequence=COLORS)
-            fig.update_layout(**PLOTLY_LAYOUT,height=370,legend=dict(orientation="h",yanchor="bottom",y=-0.15,font=dict(size=10)))
-            fig.update_traces(textposition='inside',textinfo='percent+label',textfont_size=10)
-            st.plotly_chart(fig,use_container_width=True)
+        def build():
+            fig=go.Figure(go.Bar(x=b['Antigüedad'],y=b[amt or 'Registros'],text=b['Registros'],textposition='outside',marker_color=['#0E6E3D','#00A9E0','#D4721A','#C0392B']))
+            fig.update_layout(**PLOTLY_LAYOUT,height=380,title=dict(text=f"{amt} por días (registros sobre cada barra)" if amt else "Registros por días",font=dict(size=13)),yaxis=dict(tickformat='$,.0f' if amt else ',d',showgrid=True,gridcolor='#F0F0F0'))
+            return fig
+        plot((key,'antiguedad',sel,day), build)
     with c2:
-        st.markdown(section_header("💰","Facturación Mensual 2025"), unsafe_allow_html=True)
-        if 'facturacion_2025' in sheets and 'Fecha' in sheets['facturacion_2025'].columns:
-            d=sheets['facturacion_2025'].dropna(subset=['Fecha']).copy(); d['M']=d['Fecha'].dt.to_period('M').astype(str)
-            m=d.groupby('M')['Total (MXN)'].sum().reset_index()
-            fig=go.Figure(go.Bar(x=m['M'],y=m['Total (MXN)'],marker=dict(color=m['Total (MXN)'],colorscale=[[0,'#004481'],[1,'#00A9E0']]),hovertemplate='%{x}<br>$%{y:,.0f}<extra></extra>'))
-            fig.update_layout(**PLOTLY_LAYOUT,height=370,xaxis=dict(showgrid=False),yaxis=dict(showgrid=True,gridcolor='#F0F0F0',tickformat='$,.0f'))
-            st.plotly_chart(fig,use_container_width=True)
-
-    c3,c4 = st.columns(2)
-    with c3:
-        st.markdown(section_header("🔧","Obra Menor — Estatus"), unsafe_allow_html=True)
-        if 'obra_menor' in sheets and 'ESTATUS_OPERACIÓN REAL' in sheets['obra_menor'].columns:
-            d=sheets['obra_menor']['ESTATUS_OPERACIÓN REAL'].value_counts().head(8).reset_index(); d.columns=['E','C']
-            fig=px.bar(d,x='C',y='E',orientation='h',color='C',color_continuous_scale=[[0,'#E8F5E9'],[1,'#0E6E3D']])
-            fig.update_layout(**PLOTLY_LAYOUT,height=370,coloraxis_showscale=False,yaxis=dict(autorange="reversed"))
-            st.plotly_chart(fig,use_container_width=True)
-    with c4:
-        st.markdown(section_header("📑","Contratos — Estatus Operativo"), unsafe_allow_html=True)
-        if 'contratos' in sheets and 'Estatus Operativo' in sheets['contratos'].columns:
-            d=sheets['contratos']['Estatus Operativo'].value_counts().head(8).reset_index(); d.columns=['E','C']
-            fig=px.bar(d,x='C',y='E',orientation='h',color='C',color_continuous_scale=[[0,'#FFF3E0'],[1,'#D4721A']])
-            fig.update_layout(**PLOTLY_LAYOUT,height=370,coloraxis_showscale=False,yaxis=dict(autorange="reversed"))
-            st.plotly_chart(fig,use_container_width=True)
-
-    st.markdown(section_header("🏢","Distribución por Tipo de Proyecto"), unsafe_allow_html=True)
-    if 'ordenes' in sheets and 'TIPO DE PROYECTO' in sheets['ordenes'].columns:
-        d=sheets['ordenes'].groupby('TIPO DE PROYECTO').agg(Cant=('TIPO DE PROYECTO','count'),Imp=('IMPORTE TOTAL','sum')).reset_index().sort_values('Imp',ascending=False)
-        fig=make_subplots(rows=1,cols=2,specs=[[{"type":"bar"},{"type":"pie"}]],subplot_titles=("Importe por Tipo","Distribución"))
-        fig.add_trace(go.Bar(x=d['TIPO DE PROYECTO'],y=d['Imp'],marker_color=COLORS[:len(d)]),row=1,col=1)
-        fig.add_trace(go.Pie(labels=d['TIPO DE PROYECTO'],values=d['Cant'],hole=0.5,marker_colors=COLORS[:len(d)]),row=1,col=2)
-        fig.update_layout(**PLOTLY_LAYOUT,height=420,showlegend=False); fig.update_yaxes(tickformat="$,.0f",row=1,col=1)
-        st.plotly_chart(fig,use_container_width=True)
-
-# ═══ OVERVIEW SUCURSAL ═══
-elif modulo == "🔎  Overview Sucursal":
-    st.markdown('<div class="hero-kpi" style="padding:22px 28px;"><h4>OVERVIEW DE SUCURSAL / PROYECTO</h4><h1>Vista 360° del proyecto</h1><p>Selecciona una sucursal para ver toda su información consolidada y exportar a PDF</p></div>', unsafe_allow_html=True)
-    sucs = get_all_sucursales(sheets)
-    if not sucs: st.warning("No se encontraron sucursales."); st.stop()
-    sel = st.selectbox("🏢 Selecciona Sucursal / Proyecto", [""]+sucs, format_func=lambda x: "— Selecciona —" if x=="" else x)
-    if sel:
-        sd = get_sucursal_data(sheets, sel)
-        if not sd: st.info(f"Sin registros para **{sel}**."); st.stop()
-
-        to = sd.get('ordenes',pd.DataFrame()).get('IMPORTE TOTAL',pd.Series(dtype=float)).sum()
-        tc = sd.get('contratos',pd.DataFrame()).get('Importe Total',pd.Series(dtype=float)).sum()
-        tom = sd.get('obra_menor',pd.DataFrame()).get('IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL',pd.Series(dtype=float)).sum()
-        tpf = sd.get('prefacturas',pd.DataFrame()).get('Total',pd.Series(dtype=float)).sum()
-        tp = sd.get('contratos',pd.DataFrame()).get('Total Pagado',pd.Series(dtype=float)).sum() + sd.get('obra_menor',pd.DataFrame()).get('Total Pagado',pd.Series(dtype=float)).sum()
-        pp = sd.get('contratos',pd.DataFrame()).get('Por pagar',pd.Series(dtype=float)).sum()
-
-        st.markdown(f'<div class="kpi-grid">{kpi_card("Importe Órdenes",fmt(to),f"{len(sd.get("ordenes",[]))} reg.")}{kpi_card("Importe Contratos",fmt(tc),f"{len(sd.get("contratos",[]))} contratos","green")}{kpi_card("Cierre Obra Menor",fmt(tom),f"{len(sd.get("obra_menor",[]))} proy.","orange")}{kpi_card("Total Pagado",fmt(tp),"Contratos+Obra","aqua")}{kpi_card("Por Pagar",fmt(pp),"Pendiente","red")}{kpi_card("Prefacturas",fmt(tpf),f"{len(sd.get("prefacturas",[]))} reg.","green")}</div>', unsafe_allow_html=True)
-
-        cb,_ = st.columns([1,3])
-        with cb:
-            pdf = generate_pdf(sel, sd)
-            st.download_button("📥 Exportar Overview a PDF", pdf, f"Overview_{sel.replace(' ','_')}_{datetime.now().strftime('%Y%m%d')}.pdf", "application/pdf")
-        st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
-
-        if 'ordenes' in sd:
-            df=sd['ordenes']; st.markdown(section_header("📋","Órdenes de Compra",f"{len(df)} reg."), unsafe_allow_html=True)
-            h='<div class="overview-section"><div class="ov-grid">'
-            for _,r in df.iterrows():
-                h+=ov_item("Pedido",str(r.get('ID. PEDIDO COMPRADOR','—')))+ov_item("Estado",str(r.get('ESTADO','—')))+ov_item("Importe",fmt(r.get('IMPORTE TOTAL')))+ov_item("Tipo",str(r.get('TIPO DE PROYECTO','—')))+ov_item("Cierre",fmt(r.get('IMPORTE DE CIERRE')))+ov_item("Estatus",str(r.get('ESTATUS','—')))
-            st.markdown(h+'</div></div>', unsafe_allow_html=True)
-            with st.expander("Ver tabla"):
-                dc=[c for c in ['ID. PEDIDO COMPRADOR','FECHA','IMPORTE TOTAL','ESTADO','TIPO DE PROYECTO','IMPORTE DE CIERRE','BALANCE','ESTATUS'] if c in df.columns]
+        if key == 'prefacturas':
+            d=engine.stage_summary(E, key, sel)
+            def build():
+                fig=go.Figure(go.Bar(x=d['Etapa'],y=d['mediana'],marker_color='#004481',
+                    error_y=dict(type='data',symmetric=False,array=d['p75']-d['mediana'],arrayminus=d['mediana']-d['p25'],color='#5C7D9A')))
+                fig.update_layout(**PLOTLY_LAYOUT,height=380,title=dict(text="Días por etapa — mediana y p25–p75",font=dict(size=13)),yaxis=dict(showgrid=True,gridcolor='#F0F0F0'))
+                return fig
+            plot((key,'etapas',sel), build)
+        else:
+            st.dataframe(b, use_container_width=True, hide_index=True)
+    o = engine.outstanding(E, key, sel)
+    with st.expander(f"Saldos por {o.columns[0]} ({len(o)})"):
+        st.dataframe(o, use_container_width=True, hide_index=True)
+        download_buttons(o, f"{key}_antiguedad", sel+(day,))
+
+# ─── PAGES ───
+# st.stop() ends a page early; the finally still closes its perf run.
+try:
+    # ═══ DASHBOARD ═══
+    if modulo == "🏠  Dashboard":
+        st.markdown(f'<div class="hero-kpi"><h4>SISTEMA INTEGRAL DE CONTROL DOCUMENTAL 2025</h4><h1>SERVMAC — Conservación BBVA Noreste</h1><p>Panel de control y monitoreo operativo | {len(sheets)} módulos activos</p></div>', unsafe_allow_html=True)
+        kpis = [("Órdenes de Compra",'ordenes','IMPORTE TOTAL'," total",""), ("Contratos One Team",'contratos','Importe Total'," total","green"),
+            ("Obra Menor",'obra_menor','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL'," cierre","orange"), ("Facturación 2025",'facturacion_2025','Total (MXN)'," total","aqua"),
+            ("Prefacturas",'prefacturas','Total',"","red"), ("Fianzas",'fianzas','Monto Garantizado Fianza'," garantizado","green")]
+        with perf.span('dashboard:kpis'): st.markdown('<div class="kpi-grid">'+''.join(kpi_card(l,fmt_int(engine.count(E,k)),fmt(engine.total(E,k,c)[0])+sx,sty) for l,k,c,sx,sty in kpis)+'</div>', unsafe_allow_html=True)
+
+        c1,c2 = st.columns(2)
+        with c1, perf.span('dashboard:estado'):
+            st.markdown(section_header("📊","Órdenes por Estado"), unsafe_allow_html=True)
+            if has('ordenes','ESTADO'):
+                d=engine.counts(E,'ordenes','ESTADO'); d.columns=['Estado','Cantidad']
+                def build():
+                    import plotly.express as px
+                    fig=px.pie(charts.top_n(d,'Estado','Cantidad'),values='Cantidad',names='Estado',hole=0.55,color_discrete_sequence=COLORS)
+                    fig.update_layout(**PLOTLY_LAYOUT,height=370,legend=dict(orientation="h",yanchor="bottom",y=-0.15,font=dict(size=10)))
+                    fig.update_traces(textposition='inside',textinfo='percent+label',textfont_size=10)
+                    return fig
+                plot(('dashboard','estado'), build)
+                with st.expander("Ver órdenes de un estado"):
+                    e=st.selectbox("Estado",d['Estado'].tolist(),key="dd_estado")
+                    dc=[c for c in ['ID. PEDIDO COMPRADOR','FECHA','IMPORTE TOTAL','NOMBRE DEL PROYECTO O SUCURSAL','TIPO DE PROYECTO','ESTATUS'] if c in meta['columns']['ordenes']]
+                    st.dataframe(engine.drill(E,'ordenes','ESTADO',e)[dc],use_container_width=True,hide_index=True)
+        with c2, perf.span('dashboard:facturacion'):
+            st.markdown(section_header("💰","Facturación Mensual 2025"), unsafe_allow_html=True)
+            if has('facturacion_2025',rollups.month_key('Fecha')):
+                def build():
+                    m=engine.monthly(E,'facturacion_2025','Fecha',['Total (MXN)'])
+                    fig=go.Figure(go.Bar(x=m['M'],y=m['Total (MXN)'],marker=dict(color=m['Total (MXN)'],colorscale=[[0,'#004481'],[1,'#00A9E0']]),hovertemplate='%{x}<br>$%{y:,.0f}<extra></extra>'))
+                    fig.update_layout(**PLOTLY_LAYOUT,height=370,xaxis=dict(showgrid=False),yaxis=dict(showgrid=True,gridcolor='#F0F0F0',tickformat='$,.0f'))
+                    return fig
+                plot(('dashboard','facturacion'), build)
+
+        c3,c4 = st.columns(2)
+        with c3, perf.span('dashboard:obra_menor'):
+            st.markdown(section_header("🔧","Obra Menor — Estatus"), unsafe_allow_html=True)
+            if has('obra_menor','ESTATUS_OPERACIÓN REAL'):
+                def build():
+                    import plotly.express as px
+                    d=engine.counts(E,'obra_menor','ESTATUS_OPERACIÓN REAL').head(8); d.columns=['E','C']
+                    fig=px.bar(d,x='C',y='E',orientation='h',color='C',color_continuous_scale=[[0,'#E8F5E9'],[1,'#0E6E3D']])
+                    fig.update_layout(**PLOTLY_LAYOUT,height=370,coloraxis_showscale=False,yaxis=dict(autorange="reversed"))
+                    return fig
+                plot(('dashboard','obra_menor'), build)
+        with c4, perf.span('dashboard:contratos'):
+            st.markdown(section_header("📑","Contratos — Estatus Operativo"), unsafe_allow_html=True)
+            if has('contratos','Estatus Operativo'):
+                def build():
+                    import plotly.express as px
+                    d=engine.counts(E,'contratos','Estatus Operativo').head(8); d.columns=['E','C']
+                    fig=px.bar(d,x='C',y='E',orientation='h',color='C',color_continuous_scale=[[0,'#FFF3E0'],[1,'#D4721A']])
+                    fig.update_layout(**PLOTLY_LAYOUT,height=370,coloraxis_showscale=False,yaxis=dict(autorange="reversed"))
+                    return fig
+                plot(('dashboard','contratos'), build)
+
+        st.markdown(section_header("🏢","Distribución por Tipo de Proyecto"), unsafe_allow_html=True)
+        if has('ordenes','TIPO DE PROYECTO'):
+            with perf.span('dashboard:tipo'):
+                def build():
+                    from plotly.subplots import make_subplots
+                    d=engine.group(E,'ordenes','TIPO DE PROYECTO',['IMPORTE TOTAL']).rename(columns={'count':'Cant','IMPORTE TOTAL':'Imp'}).sort_values('Imp',ascending=False)
+                    d=charts.top_n(d,'TIPO DE PROYECTO','Imp')
+                    fig=make_subplots(rows=1,cols=2,specs=[[{"type":"bar"},{"type":"pie"}]],subplot_titles=("Importe por Tipo","Distribución"))
+                    fig.add_trace(go.Bar(x=d['TIPO DE PROYECTO'],y=d['Imp'],marker_color=COLORS[:len(d)]),row=1,col=1)
+                    fig.add_trace(go.Pie(labels=d['TIPO DE PROYECTO'],values=d['Cant'],hole=0.5,marker_colors=COLORS[:len(d)]),row=1,col=2)
+                    fig.update_layout(**PLOTLY_LAYOUT,height=420,showlegend=False); fig.update_yaxes(tickformat="$,.0f",row=1,col=1)
+                    return fig
+                plot(('dashboard','tipo'), build)
+
+    # ═══ OVERVIEW SUCURSAL ═══
+    elif modulo == "🔎  Overview Sucursal":
+        st.markdown('<div class="hero-kpi" style="padding:22px 28px;"><h4>OVERVIEW DE SUCURSAL / PROYECTO</h4><h1>Vista 360° del proyecto</h1><p>Selecciona una sucursal para ver toda su información consolidada y exportar a PDF</p></div>', unsafe_allow_html=True)
+        sucs = engine.sucursal_names(E)
+        if not sucs: st.warning("No se encontraron sucursales."); st.stop()
+        cs,ce = st.columns([4,1])
+        with cs: sel = st.selectbox("🏢 Selecciona Sucursal / Proyecto", [""]+sucs, format_func=lambda x: "— Selecciona —" if x=="" else x)
+        with ce: exact = st.checkbox("Coincidencia exacta", help="Solo registros cuyo nombre es exactamente la sucursal elegida, sin incluir nombres que la contienen")
+        with st.expander("📦 Exportación masiva de PDF"):
+            bn = batch.filter_names(sucs, st.text_input("Filtrar sucursales", "", placeholder="Todas", key="batch_q"))
+            st.caption(f"{len(bn)} sucursales · un PDF por sucursal en un solo ZIP")
+            # One ZIP per session, overwritten by each run, in the export folder so old ones fall under its cap.
+            zp = exports.scratch(f"overview-{st.session_state.setdefault('batch_id', uuid.uuid4().hex)}.zip")
+            if st.button("Generar ZIP", disabled=not bn):
+                bar = st.progress(0.0, text="Generando PDF…")
+                written, empty = batch.batch_pdfs(sheets, zp, bn, exact, progress=lambda d,t,s: bar.progress(d/t, text=f"{d}/{t} · {s}"))
+                st.session_state['batch_zip'] = (written, len(empty)); exports.prune(spare=(zp,))
+            if st.session_state.get('batch_zip'):
+                try: f = open(zp, 'rb')
+                except FileNotFoundError: st.session_state.pop('batch_zip'); st.caption("El ZIP anterior ya no está disponible; genéralo de nuevo.")
+                else:
+                    written, ne = st.session_state['batch_zip']
+                    st.caption(f"{written} PDF generados" + (f" · {ne} sin registros" if ne else ""))
+                    with f: st.download_button("📥 Descargar ZIP", f, f"Overview_sucursales_{datetime.now().strftime('%Y%m%d')}.zip", "application/zip")
+        if sel:
+            sd = engine.sucursal_data(E, sel, exact)
+            if not sd: st.info(f"Sin registros para **{sel}**."); st.stop()
+
+            to = sd.get('ordenes',pd.DataFrame()).get('IMPORTE TOTAL',pd.Series(dtype=float)).sum()
+            tc = sd.get('contratos',pd.DataFrame()).get('Importe Total',pd.Series(dtype=float)).sum()
+            tom = sd.get('obra_menor',pd.DataFrame()).get('IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL',pd.Series(dtype=float)).sum()
+            tpf = sd.get('prefacturas',pd.DataFrame()).get('Total',pd.Series(dtype=float)).sum()
+            tp = sd.get('contratos',pd.DataFrame()).get('Total Pagado',pd.Series(dtype=float)).sum() + sd.get('obra_menor',pd.DataFrame()).get('Total Pagado',pd.Series(dtype=float)).sum()
+            pp = sd.get('contratos',pd.DataFrame()).get('Por pagar',pd.Series(dtype=float)).sum()
+
+            st.markdown(f'<div class="kpi-grid">{kpi_card("Importe Órdenes",fmt(to),f"{len(sd.get("ordenes",[]))} reg.")}{kpi_card("Importe Contratos",fmt(tc),f"{len(sd.get("contratos",[]))} contratos","green")}{kpi_card("Cierre Obra Menor",fmt(tom),f"{len(sd.get("obra_menor",[]))} proy.","orange")}{kpi_card("Total Pagado",fmt(tp),"Contratos+Obra","aqua")}{kpi_card("Por Pagar",fmt(pp),"Pendiente","red")}{kpi_card("Prefacturas",fmt(tpf),f"{len(sd.get("prefacturas",[]))} reg.","green")}</div>', unsafe_allow_html=True)
+
+            cb,_ = st.columns([1,3])
+            with cb:
+                # The report is only built on request; later reruns for the same branch and data are served from the PDF cache.
+                pk = (meta['fingerprint'], exact)
+                if st.button("📄 Generar PDF") or st.session_state.get('ov_pdf') == (sel, pk):
+                    st.session_state['ov_pdf'] = (sel, pk)
+                    st.download_button("📥 Exportar Overview a PDF", engine.overview_pdf(E, sel, exact), f"Overview_{sel.replace(' ','_')}_{datetime.now().strftime('%Y%m%d')}.pdf", "application/pdf")
+            st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
+
+            if 'ordenes' in sd:
+                df=sd['ordenes']; st.markdown(section_header("📋","Órdenes de Compra",f"{len(df)} reg."), unsafe_allow_html=True)
+                pg=ov_page(df,'ordenes')
+                st.markdown('<div class="overview-section"><div class="ov-grid">'+''.join(ov_items(pg,[("Pedido",'ID. PEDIDO COMPRADOR',""),("Estado",'ESTADO',""),("Importe",'IMPORTE TOTAL',"$"),("Tipo",'TIPO DE PROYECTO',""),("Cierre",'IMPORTE DE CIERRE',"$"),("Estatus",'ESTATUS',"")]))+'</div></div>', unsafe_allow_html=True)
+                with st.expander("Ver tabla"):
+                    dc=[c for c in ['ID. PEDIDO COMPRADOR','FECHA','IMPORTE TOTAL','ESTADO','TIPO DE PROYECTO','IMPORTE DE CIERRE','BALANCE','ESTATUS'] if c in df.columns]
+                    st.dataframe(df[dc],use_container_width=True,hide_index=True)
+
+            if 'contratos' in sd:
+                df=sd['contratos']; st.markdown(section_header("📑","Contratos One Team",f"{len(df)} contratos"), unsafe_allow_html=True)
+                pg=ov_page(df,'contratos')
+                st.markdown(ov_cards("📑 "+ov_col(pg,"ID Folio Contrato"), ov_items(pg,[("CR","CR",""),("Importe Total","Importe Total","$"),("Estatus Op.","Estatus Operativo",""),("Estatus Cierre","Estatus Cierre",""),("Supervisor","Supervisor asignado para coordinación / revisión",""),("Pagado","Total Pagado","$"),("Por Pagar","Por pagar","$"),("Contrato","Contrato Número",""),("Anexo","Anexo de Obra",""),("Tipología","Tipología","")])), unsafe_allow_html=True)
+
+            if 'obra_menor' in sd:
+                df=sd['obra_menor']; st.markdown(section_header("🔧","Obra Menor",f"{len(df)} proy."), unsafe_allow_html=True)
+                pg=ov_page(df,'obra_menor')
+                es=ov_col(pg,"ESTATUS_OPERACIÓN REAL"); el=es.str.lower()
+                bc=np.where(el.str.contains("terminad|cerrad"),"green",np.where(el.str.contains("proceso",regex=False),"orange","blue"))
+                st.markdown(ov_cards("🔧 "+ov_col(pg,"ID_PROYECTO")+' <span class="status-badge '+bc+'">'+es+'</span>', ov_items(pg,[("Sucursal","SUCURSAL",""),("Proyecto","PROYECTO",""),("Asignado","ASIGNADO_A",""),("Presupuesto","PRESUPUESTO_INICIAL","$"),("Cierre Adm.","IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL","$"),("Pagado","Total Pagado","$"),("Variación","VARIACIÓN_PRESUPUESTAL","$"),("Fecha Asig.","FECHA_DE_ASIGNACIÓN","d"),("Días","DÍAS DESDE LA ASIGNACIÓN",""),("Est. Pago","Estatus de pago","")])), unsafe_allow_html=True)
+
+                if len(df)>0 and all(c in df.columns for c in ['PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL']):
+                    dc=df[['ID_PROYECTO','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL']].dropna()
+                    if len(dc)>0:
+                        def build():
+                            b=dc.nlargest(charts.MAX_BARS,'PRESUPUESTO_INICIAL').sort_index() if len(dc)>charts.MAX_BARS else dc
+                            fig=go.Figure()
+                            fig.add_trace(go.Bar(x=b['ID_PROYECTO'],y=b['PRESUPUESTO_INICIAL'],name='Presupuesto',marker_color='#004481'))
+                            fig.add_trace(go.Bar(x=b['ID_PROYECTO'],y=b['IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL'],name='Cierre',marker_color='#00A9E0'))
+                            fig.update_layout(**PLOTLY_LAYOUT,height=350,barmode='group',yaxis=dict(tickformat='$,.0f',showgrid=True,gridcolor='#F0F0F0'))
+                            return fig
+                        plot(('overview','obra_menor',sel,exact), build)
+
+            if 'prefacturas' in sd:
+                df=sd['prefacturas']; st.markdown(section_header("📄","Prefacturas",f"{len(df)} reg."), unsafe_allow_html=True)
+                pg=ov_page(df,'prefacturas')
+                st.markdown(ov_cards("📄 "+ov_col(pg,"Folio Interno"), ov_items(pg,[("Folio PF","Folio Pre Factura",""),("Fecha","Fecha solicitud","d"),("Monto s/IVA","Monto (sin IVA)","$"),("Total","Total","$"),("Estatus","Estatus",""),("Factura?","¿Se emitió factura?","")])), unsafe_allow_html=True)
+
+            if 'fianzas' in sd:
+                df=sd['fianzas']; st.markdown(section_header("🛡️","Fianzas",f"{len(df)} reg."), unsafe_allow_html=True)
+                pg=ov_page(df,'fianzas')
+                st.markdown(ov_cards("🛡️ Fianza — "+ov_col(pg,"No. Fianza"), ov_items(pg,[("Afianzadora","Afianzadora",""),("Monto Contrato","Monto de contrato","$"),("Garantizado","Monto Garantizado Fianza","$"),("Expedición","Estatus Expedición",""),("Vencimiento","Vencimiento","d"),("Vigencia","Estatus Vigencia","")])), unsafe_allow_html=True)
+
+            if 'proyectos_2024' in sd:
+                df=sd['proyectos_2024']; st.markdown(section_header("📁","Proyectos 2024",f"{len(df)} reg."), unsafe_allow_html=True)
+                pg=ov_page(df,'proyectos_2024')
+                st.markdown(ov_cards("📁 "+ov_col(pg,"Sucursal")+" — "+ov_col(pg,"Proyecto"), ov_items(pg,[("CR","CR",""),("Cierre","Importe de cierre","$"),("Estatus","Estatus",""),("Asignado","Asignado a",""),("Pagado","Total Pagado","$"),("Por Pagar","Por pagar","$")])), unsafe_allow_html=True)
+
+            if 'facturas_adquira' in sd:
+                df=sd['facturas_adquira']; st.markdown(section_header("📊","Facturas Adquira",f"{len(df)} reg."), unsafe_allow_html=True)
+                dc=[c for c in ['NÚMERO','FECHA FACTURA','PEDIDO','CATEGORIA','BASE IMPONIBLE','TOTAL FACTURA','ESTADO'] if c in df.columns]
                 st.dataframe(df[dc],use_container_width=True,hide_index=True)
+        else:
+            st.markdown('<div style="text-align:center;padding:60px 20px;color:#5C7D9A;"><div style="font-size:3rem;margin-bottom:12px;">🏢</div><h3 style="color:#5C7D9A;font-weight:500;">Selecciona una sucursal o proyecto</h3><p style="font-size:0.9rem;">Usa el selector para ver la vista 360° con información consolidada</p></div>', unsafe_allow_html=True)
 
-        if 'contratos' in sd:
-            df=sd['contratos']; st.markdown(section_header("📑","Contratos One Team",f"{len(df)} contratos"), unsafe_allow_html=True)
-            for _,r in df.iterrows():
-                st.markdown(f'<div class="overview-section"><h4>📑 {r.get("ID Folio Contrato","—")}</h4><div class="ov-grid">{ov_item("CR",str(r.get("CR","—")))}{ov_item("Importe Total",fmt(r.get("Importe Total")))}{ov_item("Estatus Op.",str(r.get("Estatus Operativo","—")))}{ov_item("Estatus Cierre",str(r.get("Estatus Cierre","—")))}{ov_item("Supervisor",str(r.get("Supervisor asignado para coordinación / revisión","—")))}{ov_item("Pagado",fmt(r.get("Total Pagado")))}{ov_item("Por Pagar",fmt(r.get("Por pagar")))}{ov_item("Contrato",str(r.get("Contrato Número","—")))}{ov_item("Anexo",str(r.get("Anexo de Obra","—")))}{ov_item("Tipología",str(r.get("Tipología","—")))}</div></div>', unsafe_allow_html=True)
-
-        if 'obra_menor' in sd:
-            df=sd['obra_menor']; st.markdown(section_header("🔧","Obra Menor",f"{len(df)} proy."), unsafe_allow_html=True)
-            for _,r in df.iterrows():
-                es=str(r.get("ESTATUS_OPERACIÓN REAL","—"))
-                bc="green" if any(x in es.lower() for x in ["terminad","cerrad"]) else "orange" if "proceso" in es.lower() else "blue"
-                st.markdown(f'<div class="overview-section"><h4>🔧 {r.get("ID_PROYECTO","—")} <span class="status-badge {bc}">{es}</span></h4><div class="ov-grid">{ov_item("Sucursal",str(r.get("SUCURSAL","—")))}{ov_item("Proyecto",str(r.get("PROYECTO","—")))}{ov_item("Asignado",str(r.get("ASIGNADO_A","—")))}{ov_item("Presupuesto",fmt(r.get("PRESUPUESTO_INICIAL")))}{ov_item("Cierre Adm.",fmt(r.get("IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL")))}{ov_item("Pagado",fmt(r.get("Total Pagado")))}{ov_item("Variación",fmt(r.get("VARIACIÓN_PRESUPUESTAL")))}{ov_item("Fecha Asig.",str(r.get("FECHA_DE_ASIGNACIÓN","—"))[:10])}{ov_item("Días",str(r.get("DÍAS DESDE LA ASIGNACIÓN","—")))}{ov_item("Est. Pago",str(r.get("Estatus de pago","—")))}</div></div>', unsafe_allow_html=True)
-
-            if len(df)>0 and all(c in df.columns for c in ['PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL']):
-                dc=df[['ID_PROYECTO','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL']].dropna()
-                if len(dc)>0:
+    # ═══ ÓRDENES ═══
+    elif modulo == "📋  Órdenes de Compra":
+        def ch(df,sel):
+            c1,c2=st.columns(2)
+            with c1:
+                st.markdown(section_header("🏆","Top 15 por Importe"),unsafe_allow_html=True)
+                if has('ordenes','NOMBRE DEL PROYECTO O SUCURSAL'):
+                    def build():
+                        import plotly.express as px
+                        t=engine.group(E,'ordenes','NOMBRE DEL PROYECTO O SUCURSAL',['IMPORTE TOTAL'],sel).nlargest(15,'IMPORTE TOTAL')
+                        fig=px.bar(t,x='IMPORTE TOTAL',y='NOMBRE DEL PROYECTO O SUCURSAL',orientation='h',color='IMPORTE TOTAL',color_continuous_scale=[[0,'#00A9E0'],[1,'#004481']])
+                        fig.update_layout(**PLOTLY_LAYOUT,height=480,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
+                        return fig
+                    plot(('ordenes','top',sel), build)
+            with c2:
+                st.markdown(section_header("📈","Evolución Mensual"),unsafe_allow_html=True)
+                if has('ordenes',rollups.month_key('FECHA')):
+                    def build():
+                        from plotly.subplots import make_subplots
+                        d=engine.monthly(E,'ordenes','FECHA',['IMPORTE TOTAL'],sel)
+                        fig=make_subplots(specs=[[{"secondary_y":True}]])
+                        fig.add_trace(go.Bar(x=d['M'],y=d['IMPORTE TOTAL'],name='Importe',marker_color='#004481'),secondary_y=False)
+                        fig.add_trace(go.Scatter(x=d['M'],y=d['count'],name='Cantidad',line=dict(color='#00A9E0',width=3),mode='lines+markers'),secondary_y=True)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=480); fig.update_yaxes(tickformat="$,.0f",secondary_y=False)
+                        return fig
+                    plot(('ordenes','mensual',sel), build)
+        render_module("Órdenes de Compra","ordenes",[("Importe Total","IMPORTE TOTAL",""),("Sin IVA","IMPORTE SIN IVA","green"),("Cierre","IMPORTE DE CIERRE","orange")],
+            [("ESTADO","Estado"),("TIPO DE PROYECTO","Tipo Proyecto")],ch,
+            ['ID. PEDIDO COMPRADOR','FECHA','IMPORTE TOTAL','ESTADO','NOMBRE DEL PROYECTO O SUCURSAL','TIPO DE PROYECTO','IMPORTE DE CIERRE','BALANCE','ESTATUS'])
+
+    # ═══ CONTRATOS ═══
+    elif modulo == "📑  Contratos One Team":
+        def ch(df,sel):
+            c1,c2=st.columns(2)
+            with c1:
+                st.markdown(section_header("💰","Top 15"),unsafe_allow_html=True)
+                if 'Proyecto / Obra' in df.columns and 'Importe Total' in df.columns:
+                    def build():
+                        import plotly.express as px
+                        t=df.nlargest(15,'Importe Total')[['Proyecto / Obra','Importe Total']].dropna()
+                        fig=px.bar(t,x='Importe Total',y='Proyecto / Obra',orientation='h',color='Importe Total',color_continuous_scale=[[0,'#E8F5E9'],[1,'#0E6E3D']])
+                        fig.update_layout(**PLOTLY_LAYOUT,height=480,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
+                        return fig
+                    plot(('contratos','top',sel), build)
+            with c2:
+                st.markdown(section_header("📊","Estatus Operativo"),unsafe_allow_html=True)
+                if has('contratos','Estatus Operativo'):
+                    def build():
+                        import plotly.express as px
+                        d=engine.counts(E,'contratos','Estatus Operativo',sel); d.columns=['E','C']
+                        fig=px.pie(charts.top_n(d,'E','C'),values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=480)
+                        return fig
+                    plot(('contratos','estatus',sel), build)
+            st.markdown(section_header("💵","Pagado vs Por Pagar"),unsafe_allow_html=True)
+            if has('contratos','Proyecto / Obra') and all(c in df.columns for c in ['Total Pagado','Por pagar']):
+                def build():
+                    d=engine.group(E,'contratos','Proyecto / Obra',['Total Pagado','Por pagar'],sel).nlargest(15,'Total Pagado')
+                    fig=go.Figure()
+                    fig.add_trace(go.Bar(x=d['Proyecto / Obra'],y=d['Total Pagado'],name='Pagado',marker_color='#0E6E3D'))
+                    fig.add_trace(go.Bar(x=d['Proyecto / Obra'],y=d['Por pagar'],name='Por Pagar',marker_color='#C0392B'))
+                    fig.update_layout(**PLOTLY_LAYOUT,barmode='stack',height=400,xaxis_tickangle=-45,yaxis=dict(tickformat='$,.0f',showgrid=True,gridcolor='#F0F0F0'))
+                    return fig
+                plot(('contratos','pagado',sel), build)
+        render_module("Contratos One Team","contratos",[("Importe Total","Importe Total",""),("Pagado","Total Pagado","green"),("Por Pagar","Por pagar","red")],
+            [("Estatus Operativo","Est. Operativo"),("Estatus Cierre","Est. Cierre")],ch,
+            ['ID Folio Contrato','CR','Proyecto / Obra','Importe Total','Estatus Operativo','Estatus Cierre','Total Pagado','Por pagar'])
+
+    # ═══ OBRA MENOR ═══
+    elif modulo == "🔧  Obra Menor":
+        def ch(df,sel):
+            c1,c2=st.columns(2)
+            with c1:
+                st.markdown(section_header("📊","Por Tipo"),unsafe_allow_html=True)
+                if has('obra_menor','PROYECTO'):
+                    def build():
+                        import plotly.express as px
+                        d=engine.counts(E,'obra_menor','PROYECTO',sel); d.columns=['P','C']
+                        fig=px.pie(charts.top_n(d,'P','C'),values='C',names='P',hole=0.5,color_discrete_sequence=COLORS)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=420)
+                        return fig
+                    plot(('obra_menor','tipo',sel), build)
+            with c2:
+                st.markdown(section_header("👤","Asignación"),unsafe_allow_html=True)
+                if has('obra_menor','ASIGNADO_A'):
+                    def build():
+                        import plotly.express as px
+                        d=engine.counts(E,'obra_menor','ASIGNADO_A',sel).head(12); d.columns=['A','C']
+                        fig=px.bar(d,x='C',y='A',orientation='h',color='C',color_continuous_scale=[[0,'#FFF3E0'],[1,'#D4721A']])
+                        fig.update_layout(**PLOTLY_LAYOUT,height=420,coloraxis_showscale=False,yaxis=dict(autorange="reversed"))
+                        return fig
+                    plot(('obra_menor','asignacion',sel), build)
+            st.markdown(section_header("📈","Presupuesto vs Cierre"),unsafe_allow_html=True)
+            if all(c in df.columns for c in ['SUCURSAL','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL']):
+                def build():
+                    d=df[['SUCURSAL','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL']].dropna().nlargest(20,'PRESUPUESTO_INICIAL')
                     fig=go.Figure()
-                    fig.add_trace(go.Bar(x=dc['ID_PROYECTO'],y=dc['PRESUPUESTO_INICIAL'],name='Presupuesto',marker_color='#004481'))
-                    fig.add_trace(go.Bar(x=dc['ID_PROYECTO'],y=dc['IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL'],name='Cierre',marker_color='#00A9E0'))
-                    fig.update_layout(**PLOTLY_LAYOUT,height=350,barmode='group',yaxis=dict(tickformat='$,.0f',showgrid=True,gridcolor='#F0F0F0'))
-                    st.plotly_chart(fig,use_container_width=True)
-
-        if 'prefacturas' in sd:
-            df=sd['prefacturas']; st.markdown(section_header("📄","Prefacturas",f"{len(df)} reg."), unsafe_allow_html=True)
-            for _,r in df.iterrows():
-                st.markdown(f'<div class="overview-section"><h4>📄 {r.get("Folio Interno","—")}</h4><div class="ov-grid">{ov_item("Folio PF",str(r.get("Folio Pre Factura","—")))}{ov_item("Fecha",str(r.get("Fecha solicitud","—"))[:10])}{ov_item("Monto s/IVA",fmt(r.get("Monto (sin IVA)")))}{ov_item("Total",fmt(r.get("Total")))}{ov_item("Estatus",str(r.get("Estatus","—")))}{ov_item("Factura?",str(r.get("¿Se emitió factura?","—")))}</div></div>', unsafe_allow_html=True)
-
-        if 'fianzas' in sd:
-            df=sd['fianzas']; st.markdown(section_header("🛡️","Fianzas",f"{len(df)} reg."), unsafe_allow_html=True)
-            for _,r in df.iterrows():
-                st.markdown(f'<div class="overview-section"><h4>🛡️ Fianza — {r.get("No. Fianza","—")}</h4><div class="ov-grid">{ov_item("Afianzadora",str(r.get("Afianzadora","—")))}{ov_item("Monto Contrato",fmt(r.get("Monto de contrato")))}{ov_item("Garantizado",fmt(r.get("Monto Garantizado Fianza")))}{ov_item("Expedición",str(r.get("Estatus Expedición","—")))}{ov_item("Vencimiento",str(r.get("Vencimiento","—"))[:10])}{ov_item("Vigencia",str(r.get("Estatus Vigencia","—")))}</div></div>', unsafe_allow_html=True)
-
-        if 'proyectos_2024' in sd:
-            df=sd['proyectos_2024']; st.markdown(section_header("📁","Proyectos 2024",f"{len(df)} reg."), unsafe_allow_html=True)
-            for _,r in df.iterrows():
-                st.markdown(f'<div class="overview-section"><h4>📁 {r.get("Sucursal","—")} — {r.get("Proyecto","—")}</h4><div class="ov-grid">{ov_item("CR",str(r.get("CR","—")))}{ov_item("Cierre",fmt(r.get("Importe de cierre")))}{ov_item("Estatus",str(r.get("Estatus","—")))}{ov_item("Asignado",str(r.get("Asignado a","—")))}{ov_item("Pagado",fmt(r.get("Total Pagado")))}{ov_item("Por Pagar",fmt(r.get("Por pagar")))}</div></div>', unsafe_allow_html=True)
-
-        if 'facturas_adquira' in sd:
-            df=sd['facturas_adquira']; st.markdown(section_header("📊","Facturas Adquira",f"{len(df)} reg."), unsafe_allow_html=True)
-            dc=[c for c in ['NÚMERO','FECHA FACTURA','PEDIDO','CATEGORIA','BASE IMPONIBLE','TOTAL FACTURA','ESTADO'] if c in df.columns]
-            st.dataframe(df[dc],use_container_width=True,hide_index=True)
-    else:
-        st.markdown('<div style="text-align:center;padding:60px 20px;color:#5C7D9A;"><div style="font-size:3rem;margin-bottom:12px;">🏢</div><h3 style="color:#5C7D9A;font-weight:500;">Selecciona una sucursal o proyecto</h3><p style="font-size:0.9rem;">Usa el selector para ver la vista 360° con información consolidada</p></div>', unsafe_allow_html=True)
-
-# ═══ ÓRDENES ═══
-elif modulo == "📋  Órdenes de Compra":
-    def ch(df):
-        c1,c2=st.columns(2)
-        with c1:
-            st.markdown(section_header("🏆","Top 15 por Importe"),unsafe_allow_html=True)
-            if 'NOMBRE DEL PROYECTO O SUCURSAL' in df.columns:
-                t=df.groupby('NOMBRE DEL PROYECTO O SUCURSAL')['IMPORTE TOTAL'].sum().nlargest(15).reset_index()
-                fig=px.bar(t,x='IMPORTE TOTAL',y='NOMBRE DEL PROYECTO O SUCURSAL',orientation='h',color='IMPORTE TOTAL',color_continuous_scale=[[0,'#00A9E0'],[1,'#004481']])
-                fig.update_layout(**PLOTLY_LAYOUT,height=480,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
-                st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            st.markdown(section_header("📈","Evolución Mensual"),unsafe_allow_html=True)
-            if 'FECHA' in df.columns:
-                d=df.dropna(subset=['FECHA']).copy(); d['M']=d['FECHA'].dt.to_period('M').astype(str)
-                m=d.groupby('M').agg(C=('M','count'),I=('IMPORTE TOTAL','sum')).reset_index()
-                fig=make_subplots(specs=[[{"secondary_y":True}]])
-                fig.add_trace(go.Bar(x=m['M'],y=m['I'],name='Importe',marker_color='#004481'),secondary_y=False)
-                fig.add_trace(go.Scatter(x=m['M'],y=m['C'],name='Cantidad',line=dict(color='#00A9E0',width=3),mode='lines+markers'),secondary_y=True)
-                fig.update_layout(**PLOTLY_LAYOUT,height=480); fig.update_yaxes(tickformat="$,.0f",secondary_y=False)
-                st.plotly_chart(fig,use_container_width=True)
-    render_module("Órdenes de Compra","ordenes",[("Importe Total","IMPORTE TOTAL",""),("Sin IVA","IMPORTE SIN IVA","green"),("Cierre","IMPORTE DE CIERRE","orange")],
-        [("ESTADO","Estado"),("TIPO DE PROYECTO","Tipo Proyecto")],ch,
-        ['ID. PEDIDO COMPRADOR','FECHA','IMPORTE TOTAL','ESTADO','NOMBRE DEL PROYECTO O SUCURSAL','TIPO DE PROYECTO','IMPORTE DE CIERRE','BALANCE','ESTATUS'])
-
-# ═══ CONTRATOS ═══
-elif modulo == "📑  Contratos One Team":
-    def ch(df):
-        c1,c2=st.columns(2)
-        with c1:
-            st.markdown(section_header("💰","Top 15"),unsafe_allow_html=True)
-            if 'Proyecto / Obra' in df.columns and 'Importe Total' in df.columns:
-                t=df.nlargest(15,'Importe Total')[['Proyecto / Obra','Importe Total']].dropna()
-                fig=px.bar(t,x='Importe Total',y='Proyecto / Obra',orientation='h',color='Importe Total',color_continuous_scale=[[0,'#E8F5E9'],[1,'#0E6E3D']])
-                fig.update_layout(**PLOTLY_LAYOUT,height=480,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
-                st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            st.markdown(section_header("📊","Estatus Operativo"),unsafe_allow_html=True)
-            if 'Estatus Operativo' in df.columns:
-                d=df['Estatus Operativo'].value_counts().reset_index(); d.columns=['E','C']
-                fig=px.pie(d,values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
-                fig.update_layout(**PLOTLY_LAYOUT,height=480)
-                st.plotly_chart(fig,use_container_width=True)
-        st.markdown(section_header("💵","Pagado vs Por Pagar"),unsafe_allow_html=True)
-        if all(c in df.columns for c in ['Proyecto / Obra','Total Pagado','Por pagar']):
-            d=df.groupby('Proyecto / Obra')[['Total Pagado','Por pagar']].sum().reset_index().nlargest(15,'Total Pagado')
-            fig=go.Figure()
-            fig.add_trace(go.Bar(x=d['Proyecto / Obra'],y=d['Total Pagado'],name='Pagado',marker_color='#0E6E3D'))
-            fig.add_trace(go.Bar(x=d['Proyecto / Obra'],y=d['Por pagar'],name='Por Pagar',marker_color='#C0392B'))
-            fig.update_layout(**PLOTLY_LAYOUT,barmode='stack',height=400,xaxis_tickangle=-45,yaxis=dict(tickformat='$,.0f',showgrid=True,gridcolor='#F0F0F0'))
-            st.plotly_chart(fig,use_container_width=True)
-    render_module("Contratos One Team","contratos",[("Importe Total","Importe Total",""),("Pagado","Total Pagado","green"),("Por Pagar","Por pagar","red")],
-        [("Estatus Operativo","Est. Operativo"),("Estatus Cierre","Est. Cierre")],ch,
-        ['ID Folio Contrato','CR','Proyecto / Obra','Importe Total','Estatus Operativo','Estatus Cierre','Total Pagado','Por pagar'])
-
-# ═══ OBRA MENOR ═══
-elif modulo == "🔧  Obra Menor":
-    def ch(df):
-        c1,c2=st.columns(2)
-        with c1:
-            st.markdown(section_header("📊","Por Tipo"),unsafe_allow_html=True)
-            if 'PROYECTO' in df.columns:
-                d=df['PROYECTO'].value_counts().reset_index(); d.columns=['P','C']
-                fig=px.pie(d,values='C',names='P',hole=0.5,color_discrete_sequence=COLORS)
-                fig.update_layout(**PLOTLY_LAYOUT,height=420); st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            st.markdown(section_header("👤","Asignación"),unsafe_allow_html=True)
-            if 'ASIGNADO_A' in df.columns:
-                d=df['ASIGNADO_A'].value_counts().head(12).reset_index(); d.columns=['A','C']
-                fig=px.bar(d,x='C',y='A',orientation='h',color='C',color_continuous_scale=[[0,'#FFF3E0'],[1,'#D4721A']])
-                fig.update_layout(**PLOTLY_LAYOUT,height=420,coloraxis_showscale=False,yaxis=dict(autorange="reversed"))
-                st.plotly_chart(fig,use_container_width=True)
-        st.markdown(section_header("📈","Presupuesto vs Cierre"),unsafe_allow_html=True)
-        if all(c in df.columns for c in ['SUCURSAL','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL']):
-            d=df[['SUCURSAL','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL']].dropna().nlargest(20,'PRESUPUESTO_INICIAL')
-            fig=go.Figure()
-            fig.add_trace(go.Bar(x=d['SUCURSAL'],y=d['PRESUPUESTO_INICIAL'],name='Presupuesto',marker_color='#004481'))
-            fig.add_trace(go.Bar(x=d['SUCURSAL'],y=d['IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL'],name='Cierre',marker_color='#00A9E0'))
-            fig.update_layout(**PLOTLY_LAYOUT,barmode='group',height=420,xaxis_tickangle=-45,yaxis=dict(tickformat='$,.0f',showgrid=True,gridcolor='#F0F0F0'))
-            st.plotly_chart(fig,use_container_width=True)
-    render_module("Obra Menor","obra_menor",[("Presupuesto","PRESUPUESTO_INICIAL",""),("Cierre","IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL","orange"),("Pagado","Total Pagado","green")],
-        [("PROYECTO","Proyecto"),("ESTATUS_OPERACIÓN REAL","Est. Operación"),("ASIGNADO_A","Asignado a")],ch,
-        ['ID_PROYECTO','SUCURSAL','PROYECTO','ASIGNADO_A','ESTATUS_OPERACIÓN REAL','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL','Total Pagado','VARIACIÓN_PRESUPUESTAL'])
-
-# ═══ FACTURACIÓN ═══
-elif modulo == "💰  Facturación 2025":
-    def ch(df):
-        c1,c2=st.columns(2)
-        with c1:
-            st.markdown(section_header("📈","Mensual"),unsafe_allow_html=True)
-            if 'Fecha' in df.columns:
-                d=df.dropna(subset=['Fecha']).copy(); d['M']=d['Fecha'].dt.to_period('M').astype(str)
-                m=d.groupby('M').agg(T=('Total (MXN)','sum'),C=('NO.','count')).reset_index()
-                fig=make_subplots(specs=[[{"secondary_y":True}]])
-                fig.add_trace(go.Bar(x=m['M'],y=m['T'],name='Total',marker=dict(color=m['T'],colorscale=[[0,'#004481'],[1,'#00A9E0']])),secondary_y=False)
-                fig.add_trace(go.Scatter(x=m['M'],y=m['C'],name='#',line=dict(color='#C0392B',width=3),mode='lines+markers'),secondary_y=True)
-                fig.update_layout(**PLOTLY_LAYOUT,height=420); fig.update_yaxes(tickformat="$,.0f",secondary_y=False)
-                st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            st.markdown(section_header("📊","Estatus"),unsafe_allow_html=True)
-            if 'Estatus Comprobante' in df.columns:
-                d=df['Estatus Comprobante'].value_counts().reset_index(); d.columns=['E','C']
-                fig=px.pie(d,values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
-                fig.update_layout(**PLOTLY_LAYOUT,height=420); st.plotly_chart(fig,use_container_width=True)
-    render_module("Facturación 2025","facturacion_2025",[("Subtotal","Subtotal (MXN)",""),("Impuestos","Impuestos (MXN)","orange"),("Total","Total (MXN)","green")],
-        [("Estatus Comprobante","Estatus"),("FDP","Forma de Pago")],ch,
-        ['FDP','Fecha','NO.','Razón social','Estatus Comprobante','Subtotal (MXN)','Total (MXN)','ORDEN DE COMPRA'])
-
-# ═══ PREFACTURAS ═══
-elif modulo == "📄  Prefacturas":
-    def ch(df):
-        c1,c2=st.columns(2)
-        with c1:
-            st.markdown(section_header("💰","Top por Monto"),unsafe_allow_html=True)
-            if 'Proyecto / Obra' in df.columns:
-                t=df.nlargest(15,'Total')[['Proyecto / Obra','Total']].dropna()
-                fig=px.bar(t,x='Total',y='Proyecto / Obra',orientation='h',color='Total',color_continuous_scale=[[0,'#00A9E0'],[1,'#004481']])
-                fig.update_layout(**PLOTLY_LAYOUT,height=450,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
-                st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            st.markdown(section_header("📊","Estatus"),unsafe_allow_html=True)
-            if 'Estatus' in df.columns:
-                d=df['Estatus'].value_counts().reset_index(); d.columns=['E','C']
-                fig=px.pie(d,values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
-                fig.update_layout(**PLOTLY_LAYOUT,height=450); st.plotly_chart(fig,use_container_width=True)
-    render_module("Control de Prefacturas","prefacturas",[("Sin IVA","Monto (sin IVA)",""),("IVA","IVA","orange"),("Total","Total","green")],
-        [("Estatus","Estatus")],ch,
-        ['Folio Interno','Folio Pre Factura','CR','Proyecto / Obra','Fecha solicitud','Monto (sin IVA)','Total','Estatus','¿Se emitió factura?','Folio factura'])
-
-# ═══ FIANZAS ═══
-elif modulo == "🛡️  Fianzas":
-    def ch(df):
-        c1,c2=st.columns(2)
-        with c1:
-            st.markdown(section_header("💰","Montos"),unsafe_allow_html=True)
-            if 'Proyecto' in df.columns and 'Monto de contrato' in df.columns:
-                t=df.nlargest(15,'Monto de contrato')[['Proyecto','Monto de contrato']].dropna()
-                fig=px.bar(t,x='Monto de contrato',y='Proyecto',orientation='h',color='Monto de contrato',color_continuous_scale=[[0,'#00A9E0'],[1,'#004481']])
-                fig.update_layout(**PLOTLY_LAYOUT,height=400,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
-                st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            st.markdown(section_header("🏢","Afianzadoras"),unsafe_allow_html=True)
-            if 'Afianzadora' in df.columns:
-                d=df['Afianzadora'].value_counts().reset_index(); d.columns=['A','C']
-                fig=px.pie(d,values='C',names='A',hole=0.55,color_discrete_sequence=COLORS)
-                fig.update_layout(**PLOTLY_LAYOUT,height=400); st.plotly_chart(fig,use_container_width=True)
-    render_module("Control de Fianzas","fianzas",[("Monto Contrato","Monto de contrato",""),("Garantizado","Monto Garantizado Fianza","green")],
-        [("Estatus Expedición","Expedición"),("Estatus Vigencia","Vigencia")],ch,
-        ['CR','Proyecto','Anexo de Obra','Afianzadora','No. Fianza','Monto de contrato','Monto Garantizado Fianza','Estatus Expedición','Vencimiento','Estatus Vigencia'])
-
-# ═══ FACTURAS ADQUIRA ═══
-elif modulo == "📊  Facturas Adquira":
-    def ch(df):
-        c1,c2=st.columns(2)
-        with c1:
-            st.markdown(section_header("📊","Por Categoría"),unsafe_allow_html=True)
-            if 'CATEGORIA' in df.columns:
-                d=df.groupby('CATEGORIA')['TOTAL FACTURA'].sum().reset_index().sort_values('TOTAL FACTURA',ascending=False)
-                fig=px.bar(d,x='TOTAL FACTURA',y='CATEGORIA',orientation='h',color='TOTAL FACTURA',color_continuous_scale=[[0,'#00A9E0'],[1,'#004481']])
-                fig.update_layout(**PLOTLY_LAYOUT,height=400,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
-                st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            st.markdown(section_header("📈","Estado"),unsafe_allow_html=True)
-            if 'ESTADO' in df.columns:
-                d=df['ESTADO'].value_counts().reset_index(); d.columns=['E','C']
-                fig=px.pie(d,values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
-                fig.update_layout(**PLOTLY_LAYOUT,height=400); st.plotly_chart(fig,use_container_width=True)
-    render_module("Facturas Adquira","facturas_adquira",[("Base Imponible","BASE IMPONIBLE",""),("Impuestos","TOTAL IMPUESTOS","orange"),("Total","TOTAL FACTURA","green")],
-        [("CATEGORIA","Categoría"),("ESTADO","Estado")],ch,
-        ['NÚMERO','FECHA FACTURA','PEDIDO','CATEGORIA','PROYECTO RELACIONADO','BASE IMPONIBLE','TOTAL IMPUESTOS','TOTAL FACTURA','ESTADO'])
-
-# ═══ PROYECTOS 2024 ═══
-elif modulo == "📁  Proyectos 2024":
-    def ch(df):
-        c1,c2=st.columns(2)
-        with c1:
-            st.markdown(section_header("📊","Estatus"),unsafe_allow_html=True)
-            if 'Estatus' in df.columns:
-                d=df['Estatus'].value_counts().reset_index(); d.columns=['E','C']
-                fig=px.pie(d,values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
-                fig.update_layout(**PLOTLY_LAYOUT,height=400); st.plotly_chart(fig,use_container_width=True)
-        with c2:
-            st.markdown(section_header("💰","Top Importe"),unsafe_allow_html=True)
-            if 'Sucursal' in df.columns:
-                t=df.nlargest(15,'Importe de cierre')[['Sucursal','Importe de cierre']].dropna()
-                fig=px.bar(t,x='Importe de cierre',y='Sucursal',orientation='h',color='Importe de cierre',color_continuous_scale=[[0,'#E8F5E9'],[1,'#0E6E3D']])
-                fig.update_layout(**PLOTLY_LAYOUT,height=400,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
-                st.plotly_chart(fig,use_container_width=True)
-    render_module("Proyectos 2024","proyectos_2024",[("Cierre","Importe de cierre",""),("Pagado","Total Pagado","green"),("Por Pagar","Por pagar","red")],
-        [("Estatus","Estatus")],ch,
-        ['Llave comité /Clave UDA','CR','Sucursal','Proyecto','Importe de cierre','Asignado a','Estatus','Días transcurridos','Total Pagado','Por pagar'])
-
-# ═══ EXPLORADOR ═══
-elif modulo == "🗂️  Explorador":
-    st.markdown('<div class="hero-kpi" style="padding:18px 28px;"><h4>EXPLORADOR DE DATOS</h4><h1>Análisis libre</h1><p>Navega, filtra y descarga cualquier hoja</p></div>', unsafe_allow_html=True)
-    sm={'📋 Órdenes':'ordenes','📑 Contratos':'contratos','🔧 Obra Menor':'obra_menor','💰 Facturación':'facturacion_2025','📄 Prefacturas':'prefacturas','🛡️ Fianzas':'fianzas','📊 Adquira':'facturas_adquira','📁 Proy 2024':'proyectos_2024'}
-    av={k:v for k,v in sm.items() if v in sheets}
-    sel=st.selectbox("Hoja",list(av.keys()))
-    if sel:
-        k=av[sel]; df=sheets[k].copy()
-        st.markdown(f'<div class="kpi-grid">{kpi_card("Filas",fmt_int(len(df)))}{kpi_card("Columnas",fmt_int(len(df.columns)),"","green")}</div>',unsafe_allow_html=True)
-        s=st.text_input("🔎 Buscar","")
-        if s:
-            mask=df.astype(str).apply(lambda x:x.str.contains(s,case=False,na=False)).any(axis=1); df=df[mask]
-            st.info(f"{len(df)} encontrados")
-        nc=df.select_dtypes(include=[np.number]).columns.tolist()
-        if nc:
-            st.markdown(section_header("📊","Análisis Rápido"),unsafe_allow_html=True)
-            sc=st.selectbox("Columna",nc)
-            c1,c2=st.columns([2,1])
+                    fig.add_trace(go.Bar(x=d['SUCURSAL'],y=d['PRESUPUESTO_INICIAL'],name='Presupuesto',marker_color='#004481'))
+                    fig.add_trace(go.Bar(x=d['SUCURSAL'],y=d['IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL'],name='Cierre',marker_color='#00A9E0'))
+                    fig.update_layout(**PLOTLY_LAYOUT,barmode='group',height=420,xaxis_tickangle=-45,yaxis=dict(tickformat='$,.0f',showgrid=True,gridcolor='#F0F0F0'))
+                    return fig
+                plot(('obra_menor','presupuesto',sel), build)
+        render_module("Obra Menor","obra_menor",[("Presupuesto","PRESUPUESTO_INICIAL",""),("Cierre","IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL","orange"),("Pagado","Total Pagado","green")],
+            [("PROYECTO","Proyecto"),("ESTATUS_OPERACIÓN REAL","Est. Operación"),("ASIGNADO_A","Asignado a")],ch,
+            ['ID_PROYECTO','SUCURSAL','PROYECTO','ASIGNADO_A','ESTATUS_OPERACIÓN REAL','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL','Total Pagado','VARIACIÓN_PRESUPUESTAL'])
+        if 'obra_menor' in sheets:
+            # Computed once per load (core/analytics.py); covers the whole sheet, not the filters above.
+            A = engine.obra_menor_analytics(E); ar = A['rows']
+            st.markdown(section_header("📐","Variación Presupuestal y Desvío",f"{int(ar['Atípico'].sum())} atípicos"), unsafe_allow_html=True)
+            st.markdown('<div class="kpi-grid">'+kpi_card("Variación mediana",f"{np.nanmedian(ar['Variación %']):.1f}%" if ar['Variación %'].notna().any() else "—",f"{int(ar['Variación %'].notna().sum())} proy.")
+                +kpi_card("Desvío mediano",f"{np.nanmedian(ar['Desvío (días)']):.0f} días" if ar['Desvío (días)'].notna().any() else "—","Fin real vs. fin plan","orange")
+                +kpi_card("Terminados con retraso",fmt_int(int((ar['Desvío (días)']>0).sum())),"","red")
+                +kpi_card("Atípicos",fmt_int(int(ar['Atípico'].sum())),f"|z robusto| > {analytics.Z_OUT}","aqua")+'</div>', unsafe_allow_html=True)
+            if A['groups']:
+                dim = st.radio("Agrupar por", list(A['groups']), format_func={'ASIGNADO_A':"Asignado a",'PROYECTO':"Tipo de proyecto"}.get, horizontal=True, key="om_dim")
+                g = A['groups'][dim]
+                c1,c2 = st.columns(2)
+                for c,lb in zip((c1,c2), analytics.OM_MEASURES):
+                    with c:
+                        def build():
+                            d=g[g[f"n {lb}"]>0].head(charts.MAX_BARS)
+                            fig=go.Figure(go.Bar(x=d[dim].astype(str),y=d[f"{lb} mediana"],marker_color='#D4721A' if 'Desvío' in lb else '#004481',
+                                error_y=dict(type='data',symmetric=False,array=d[f"{lb} p75"]-d[f"{lb} mediana"],arrayminus=d[f"{lb} mediana"]-d[f"{lb} p25"],color='#5C7D9A')))
+                            fig.update_layout(**PLOTLY_LAYOUT,height=380,title=dict(text=f"{lb} — mediana y p25–p75",font=dict(size=13)),xaxis_tickangle=-45,yaxis=dict(showgrid=True,gridcolor='#F0F0F0'))
+                            return fig
+                        plot(('obra_menor','analitica',dim,lb), build)
+                st.dataframe(g, use_container_width=True, hide_index=True)
+            om = sheets['obra_menor']; at = np.flatnonzero(ar['Atípico'].to_numpy())
+            if len(at):
+                with st.expander(f"Ver {len(at)} proyectos atípicos"):
+                    dc = [c for c in ['ID_PROYECTO','SUCURSAL','PROYECTO','ASIGNADO_A','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL','FECHA FIN','FECHA FIN REAL'] if c in om.columns]
+                    d = pd.concat([om.iloc[at][dc].reset_index(drop=True), ar.iloc[at].drop(columns='Atípico').reset_index(drop=True)], axis=1)
+                    st.dataframe(d, use_container_width=True, hide_index=True)
+                    download_buttons(d, "obra_menor_atipicos", ())
+
+    # ═══ FACTURACIÓN ═══
+    elif modulo == "💰  Facturación 2025":
+        def ch(df,sel):
+            c1,c2=st.columns(2)
+            with c1:
+                st.markdown(section_header("📈","Mensual"),unsafe_allow_html=True)
+                if has('facturacion_2025',rollups.month_key('Fecha')):
+                    def build():
+                        from plotly.subplots import make_subplots
+                        d=engine.monthly(E,'facturacion_2025','Fecha',['Total (MXN)'],sel)
+                        fig=make_subplots(specs=[[{"secondary_y":True}]])
+                        fig.add_trace(go.Bar(x=d['M'],y=d['Total (MXN)'],name='Total',marker=dict(color=d['Total (MXN)'],colorscale=[[0,'#004481'],[1,'#00A9E0']])),secondary_y=False)
+                        fig.add_trace(go.Scatter(x=d['M'],y=d['count'],name='#',line=dict(color='#C0392B',width=3),mode='lines+markers'),secondary_y=True)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=420); fig.update_yaxes(tickformat="$,.0f",secondary_y=False)
+                        return fig
+                    plot(('facturacion_2025','mensual',sel), build)
+            with c2:
+                st.markdown(section_header("📊","Estatus"),unsafe_allow_html=True)
+                if has('facturacion_2025','Estatus Comprobante'):
+                    def build():
+                        import plotly.express as px
+                        d=engine.counts(E,'facturacion_2025','Estatus Comprobante',sel); d.columns=['E','C']
+                        fig=px.pie(charts.top_n(d,'E','C'),values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=420)
+                        return fig
+                    plot(('facturacion_2025','estatus',sel), build)
+        render_module("Facturación 2025","facturacion_2025",[("Subtotal","Subtotal (MXN)",""),("Impuestos","Impuestos (MXN)","orange"),("Total","Total (MXN)","green")],
+            [("Estatus Comprobante","Estatus"),("FDP","Forma de Pago")],ch,
+            ['FDP','Fecha','NO.','Razón social','Estatus Comprobante','Subtotal (MXN)','Total (MXN)','ORDEN DE COMPRA'])
+
+    # ═══ PREFACTURAS ═══
+    elif modulo == "📄  Prefacturas":
+        def ch(df,sel):
+            c1,c2=st.columns(2)
+            with c1:
+                st.markdown(section_header("💰","Top por Monto"),unsafe_allow_html=True)
+                if 'Proyecto / Obra' in df.columns:
+                    def build():
+                        import plotly.express as px
+                        t=df.nlargest(15,'Total')[['Proyecto / Obra','Total']].dropna()
+                        fig=px.bar(t,x='Total',y='Proyecto / Obra',orientation='h',color='Total',color_continuous_scale=[[0,'#00A9E0'],[1,'#004481']])
+                        fig.update_layout(**PLOTLY_LAYOUT,height=450,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
+                        return fig
+                    plot(('prefacturas','top',sel), build)
+            with c2:
+                st.markdown(section_header("📊","Estatus"),unsafe_allow_html=True)
+                if has('prefacturas','Estatus'):
+                    def build():
+                        import plotly.express as px
+                        d=engine.counts(E,'prefacturas','Estatus',sel); d.columns=['E','C']
+                        fig=px.pie(charts.top_n(d,'E','C'),values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=450)
+                        return fig
+                    plot(('prefacturas','estatus',sel), build)
+            aging_section('prefacturas',sel)
+        render_module("Control de Prefacturas","prefacturas",[("Sin IVA","Monto (sin IVA)",""),("IVA","IVA","orange"),("Total","Total","green")],
+            [("Estatus","Estatus")],ch,
+            ['Folio Interno','Folio Pre Factura','CR','Proyecto / Obra','Fecha solicitud','Monto (sin IVA)','Total','Estatus','¿Se emitió factura?','Folio factura'])
+
+    # ═══ FIANZAS ═══
+    elif modulo == "🛡️  Fianzas":
+        def ch(df,sel):
+            c1,c2=st.columns(2)
+            with c1:
+                st.markdown(section_header("💰","Montos"),unsafe_allow_html=True)
+                if 'Proyecto' in df.columns and 'Monto de contrato' in df.columns:
+                    def build():
+                        import plotly.express as px
+                        t=df.nlargest(15,'Monto de contrato')[['Proyecto','Monto de contrato']].dropna()
+                        fig=px.bar(t,x='Monto de contrato',y='Proyecto',orientation='h',color='Monto de contrato',color_continuous_scale=[[0,'#00A9E0'],[1,'#004481']])
+                        fig.update_layout(**PLOTLY_LAYOUT,height=400,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
+                        return fig
+                    plot(('fianzas','montos',sel), build)
+            with c2:
+                st.markdown(section_header("🏢","Afianzadoras"),unsafe_allow_html=True)
+                if has('fianzas','Afianzadora'):
+                    def build():
+                        import plotly.express as px
+                        d=engine.counts(E,'fianzas','Afianzadora',sel); d.columns=['A','C']
+                        fig=px.pie(charts.top_n(d,'A','C'),values='C',names='A',hole=0.55,color_discrete_sequence=COLORS)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=400)
+                        return fig
+                    plot(('fianzas','afianzadoras',sel), build)
+        render_module("Control de Fianzas","fianzas",[("Monto Contrato","Monto de contrato",""),("Garantizado","Monto Garantizado Fianza","green")],
+            [("Estatus Expedición","Expedición"),("Estatus Vigencia","Vigencia")],ch,
+            ['CR','Proyecto','Anexo de Obra','Afianzadora','No. Fianza','Monto de contrato','Monto Garantizado Fianza','Estatus Expedición','Vencimiento','Estatus Vigencia'])
+        if 'fianzas' in sheets and vencimientos.DATE in meta['columns']['fianzas']:
+            # Alert queue over the expiration index (core/vencimientos.py): counts and rows are binary searches on Vencimiento.
+            hoy = vencimientos.today(); n = zip(vencimientos.HORIZONS, engine.vencimientos_conteo(E, hoy)); vo = engine.vencimientos_opciones(E)
+            st.markdown(section_header("⏰","Vencimientos",hoy.strftime('%d/%m/%Y')), unsafe_allow_html=True)
+            st.markdown('<div class="kpi-grid">'+''.join(kpi_card(f"Vencen en {h} días",fmt_int(c),"",sty) for (h,c),sty in zip(n,['red','orange','']))
+                +kpi_card("Vencidas últimos 90 días",fmt_int(len(engine.vencimientos_proximos(E,-90,hoy))),"","aqua")+'</div>', unsafe_allow_html=True)
+            c1,c2,c3 = st.columns(3)
+            with c1: h = st.selectbox("Horizonte", vencimientos.HORIZONS+[-30,-90], format_func=lambda d: f"Próximos {d} días" if d>0 else f"Vencidas últimos {-d} días", key="vc_h")
+            with c2: af = st.multiselect("Afianzadora", vo.get('Afianzadora',[]), key="vc_af")
+            with c3: vg = st.multiselect("Estatus Vigencia", vo.get('Estatus Vigencia',[]), key="vc_vg")
+            vsel = (('Afianzadora',tuple(af)),('Estatus Vigencia',tuple(vg)))
+            d = engine.vencimientos_proximos(E, h, hoy, vsel)
+            st.dataframe(d, use_container_width=True, height=320, hide_index=True)
+            download_buttons(d, "fianzas_vencimientos", (h, hoy.strftime('%Y-%m-%d'), vsel))
+
+    # ═══ FACTURAS ADQUIRA ═══
+    elif modulo == "📊  Facturas Adquira":
+        def ch(df,sel):
+            c1,c2=st.columns(2)
+            with c1:
+                st.markdown(section_header("📊","Por Categoría"),unsafe_allow_html=True)
+                if has('facturas_adquira','CATEGORIA'):
+                    def build():
+                        import plotly.express as px
+                        d=charts.top_n(engine.group(E,'facturas_adquira','CATEGORIA',['TOTAL FACTURA'],sel),'CATEGORIA','TOTAL FACTURA')
+                        fig=px.bar(d,x='TOTAL FACTURA',y='CATEGORIA',orientation='h',color='TOTAL FACTURA',color_continuous_scale=[[0,'#00A9E0'],[1,'#004481']])
+                        fig.update_layout(**PLOTLY_LAYOUT,height=400,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
+                        return fig
+                    plot(('facturas_adquira','categoria',sel), build)
+            with c2:
+                st.markdown(section_header("📈","Estado"),unsafe_allow_html=True)
+                if has('facturas_adquira','ESTADO'):
+                    def build():
+                        import plotly.express as px
+                        d=engine.counts(E,'facturas_adquira','ESTADO',sel); d.columns=['E','C']
+                        fig=px.pie(charts.top_n(d,'E','C'),values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=400)
+                        return fig
+                    plot(('facturas_adquira','estado',sel), build)
+        render_module("Facturas Adquira","facturas_adquira",[("Base Imponible","BASE IMPONIBLE",""),("Impuestos","TOTAL IMPUESTOS","orange"),("Total","TOTAL FACTURA","green")],
+            [("CATEGORIA","Categoría"),("ESTADO","Estado")],ch,
+            ['NÚMERO','FECHA FACTURA','PEDIDO','CATEGORIA','PROYECTO RELACIONADO','BASE IMPONIBLE','TOTAL IMPUESTOS','TOTAL FACTURA','ESTADO'])
+
+    # ═══ PROYECTOS 2024 ═══
+    elif modulo == "📁  Proyectos 2024":
+        def ch(df,sel):
+            c1,c2=st.columns(2)
             with c1:
-                fig=px.histogram(df,x=sc,nbins=30,color_discrete_sequence=['#004481'])
-                fig.update_layout(**PLOTLY_LAYOUT,height=300); st.plotly_chart(fig,use_container_width=True)
-            with c2: st.dataframe(df[sc].describe().round(2),use_container_width=True)
-        st.markdown(section_header("📋","Datos",f"{len(df)} reg."),unsafe_allow_html=True)
-        st.dataframe(df,use_container_width=True,height=500,hide_index=True)
-        st.download_button("📥 CSV",df.to_csv(index=False).encode('utf-8'),f"{k}.csv","text/csv")
+                st.markdown(section_header("📊","Estatus"),unsafe_allow_html=True)
+                if has('proyectos_2024','Estatus'):
+                    def build():
+                        import plotly.express as px
+                        d=engine.counts(E,'proyectos_2024','Estatus',sel); d.columns=['E','C']
+                        fig=px.pie(charts.top_n(d,'E','C'),values='C',names='E',hole=0.55,color_discrete_sequence=COLORS)
+                        fig.update_layout(**PLOTLY_LAYOUT,height=400)
+                        return fig
+                    plot(('proyectos_2024','estatus',sel), build)
+            with c2:
+                st.markdown(section_header("💰","Top Importe"),unsafe_allow_html=True)
+                if 'Sucursal' in df.columns:
+                    def build():
+                        import plotly.express as px
+                        t=df.nlargest(15,'Importe de cierre')[['Sucursal','Importe de cierre']].dropna()
+                        fig=px.bar(t,x='Importe de cierre',y='Sucursal',orientation='h',color='Importe de cierre',color_continuous_scale=[[0,'#E8F5E9'],[1,'#0E6E3D']])
+                        fig.update_layout(**PLOTLY_LAYOUT,height=400,coloraxis_showscale=False,yaxis=dict(autorange="reversed"),xaxis=dict(tickformat='$,.0f'))
+                        return fig
+                    plot(('proyectos_2024','top',sel), build)
+            aging_section('proyectos_2024',sel)
+        render_module("Proyectos 2024","proyectos_2024",[("Cierre","Importe de cierre",""),("Pagado","Total Pagado","green"),("Por Pagar","Por pagar","red")],
+            [("Estatus","Estatus")],ch,
+            ['Llave comité /Clave UDA','CR','Sucursal','Proyecto','Importe de cierre','Asignado a','Estatus','Días transcurridos','Total Pagado','Por pagar'])
+
+    # ═══ MULTIANUAL ═══
+    elif modulo == "📆  Multianual":
+        st.markdown('<div class="hero-kpi" style="padding:18px 28px;"><h4>CONSOLIDADO MULTIANUAL</h4><h1>Comparativo entre años</h1><p>Un libro por año en data/years/, con el año en el nombre del archivo</p></div>', unsafe_allow_html=True)
+        wb = {} if SERVICE_URL else store.workbooks([DATA_PATH, store.DIR])
+        if len(wb) < 2:
+            st.info("Se necesitan al menos dos libros de años distintos (p. ej. `data/years/SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2024.xlsx`)."); st.stop()
+        with st.spinner("Cargando libros…"): ST = store.load(wb)
+        for y, er in ST['errors'].items():
+            if er: st.caption(f"⚠️ {y}: " + "; ".join(er.values()))
+        yrs = tuple(st.multiselect("Años", store.years(ST), default=store.years(ST)))
+        if not yrs: st.stop()
+        sm = store.summary(ST, [('ordenes','IMPORTE TOTAL'), ('facturacion_2025','Total (MXN)'), ('contratos','Importe Total')], yrs)
+        st.dataframe(sm, use_container_width=True, hide_index=True)
+        for k, col, dc, lb in [('ordenes','IMPORTE TOTAL','FECHA',"Órdenes de Compra"), ('facturacion_2025','Total (MXN)','Fecha',"Facturación")]:
+            st.markdown(section_header("📈",f"{lb} — Tendencia Mensual"), unsafe_allow_html=True)
+            d = store.trend(ST, k, dc, [col], yrs)
+            if not len(d): st.caption("Sin fechas en los años elegidos."); continue
+            def build():
+                fig=go.Figure()
+                for i,(y,g) in enumerate(d.groupby('Año')): fig.add_trace(go.Bar(x=g['M'],y=g[col],name=str(y),marker_color=COLORS[i%len(COLORS)]))
+                fig.update_layout(**PLOTLY_LAYOUT,height=380,barmode='stack',yaxis=dict(tickformat='$,.0f',showgrid=True,gridcolor='#F0F0F0'))
+                return fig
+            plot(('multianual',ST['fingerprint'],k,yrs), build)
+            download_buttons(d, f"multianual_{k}", (ST['fingerprint'], yrs))
+
+    # ═══ CONCILIACIÓN ═══
+    elif modulo == "🔗  Conciliación":
+        st.markdown('<div class="hero-kpi" style="padding:18px 28px;"><h4>CONCILIACIÓN ENTRE HOJAS</h4><h1>Órdenes, facturas, contratos y prefacturas</h1><p>Cruce por número de pedido y por CR</p></div>', unsafe_allow_html=True)
+        def recon(name, link, kl, st_lb, amt, tcols):
+            # name: entry of joins.RECONCILE; st_lb: status -> label; amt: (left amount, right amount) column titles.
+            d = engine.reconcile(E, name)
+            if not len(d): st.info("Sin claves para cruzar."); return
+            n = d['status'].value_counts()
+            st.markdown('<div class="kpi-grid">'+''.join(kpi_card(st_lb[s],fmt_int(n.get(s,0)),fmt(d.loc[d['status']==s,'diff'].abs().sum())+" dif." if s!='ok' else "",sty) for s,sty in [('ok','green'),('left','red'),('right','orange'),('diff','')])+'</div>', unsafe_allow_html=True)
+            f = st.selectbox("Mostrar", ['diff','left','right','ok'], format_func=st_lb.get, key=f"rc_{name}")
+            v = d[d['status']==f].rename(columns={'key':kl,'n_left':f"# {amt[0][0]}",'left':amt[0][1],'n_right':f"# {amt[1][0]}",'right':amt[1][1],'diff':'Diferencia'}).drop(columns='status')
+            v = v.reindex(v['Diferencia'].abs().sort_values(ascending=False).index)
+            st.markdown(section_header("📋",st_lb[f],f"{len(v)} claves"), unsafe_allow_html=True)
+            st.dataframe(v, use_container_width=True, height=380, hide_index=True)
+            download_buttons(v, f"conciliacion_{name}_{f}", ())
+            q = st.text_input(f"🔎 Ver registros de un {kl}", "", key=f"rq_{name}")
+            if q:
+                hit = engine.join_rows(E, link, q)
+                if not hit: st.info(f"Sin registros para **{q}**.")
+                for k in hit:
+                    df = engine.join_sheet(E, link, q, k); dc = [c for c in tcols.get(k, []) if c in df.columns] or list(df.columns)
+                    st.markdown(section_header("📄",k,f"{len(df)} reg."), unsafe_allow_html=True)
+                    st.dataframe(df[dc], use_container_width=True, hide_index=True)
+        pc = {'ordenes':['ID. PEDIDO COMPRADOR','FECHA','IMPORTE TOTAL','ESTADO','NOMBRE DEL PROYECTO O SUCURSAL','ESTATUS'],
+              'facturacion_2025':['NO.','Fecha','Razón social','Estatus Comprobante','Total (MXN)','ORDEN DE COMPRA'],
+              'facturas_adquira':['NÚMERO','FECHA FACTURA','PEDIDO','CATEGORIA','TOTAL FACTURA','ESTADO']}
+        t1,t2,t3 = st.tabs(["📋 Órdenes ↔ Facturación","🧾 Órdenes ↔ Adquira","📑 Contratos ↔ Prefacturas"])
+        with t1: recon('facturacion', 'pedido', "Pedido", {'ok':"Conciliadas",'left':"Órdenes sin factura",'right':"Facturas sin orden",'diff':"Diferencia de importe"},
+            [("Órdenes","Importe orden"),("Facturas","Importe facturado")], pc)
+        with t2: recon('adquira', 'pedido', "Pedido", {'ok':"Conciliadas",'left':"Órdenes sin factura Adquira",'right':"Facturas Adquira sin orden",'diff':"Diferencia de importe"},
+            [("Órdenes","Importe orden"),("Facturas Adquira","Importe facturado")], pc)
+        with t3: recon('cr', 'cr', "CR", {'ok':"Conciliados",'left':"Contratos sin prefactura",'right':"Prefacturas sin contrato",'diff':"Diferencia de importe"},
+            [("Contratos","Importe contrato"),("Prefacturas","Importe prefacturado")],
+            {'contratos':['ID Folio Contrato','CR','Proyecto / Obra','Importe Total','Estatus Operativo','Total Pagado','Por pagar'],
+             'prefacturas':['Folio Interno','Folio Pre Factura','CR','Proyecto / Obra','Total','Estatus'],
+             'fianzas':['CR','Proyecto','Afianzadora','No. Fianza','Monto Garantizado Fianza','Estatus Vigencia'],
+             'proyectos_2024':['CR','Sucursal','Proyecto','Importe de cierre','Estatus']})
+
+    # ═══ CALIDAD DE DATOS ═══
+    elif modulo == "🩺  Calidad de datos":
+        # Built from what the loader counted while parsing (core/quality.py); kept per data load, the sheets are not re-read.
+        st.markdown('<div class="hero-kpi" style="padding:18px 28px;"><h4>CALIDAD DE DATOS</h4><h1>Validación del libro cargado</h1><p>Hojas y columnas faltantes, valores no convertidos e IDs duplicados</p></div>', unsafe_allow_html=True)
+        Q = engine.quality_report(E); qs = quality.summary(meta)
+        n = Q['Problema'].value_counts()
+        st.markdown('<div class="kpi-grid">'+kpi_card("Hojas sin cargar",fmt_int(n.get('Hoja sin cargar',0)),f"{len(sheets)} cargadas","red")
+            +kpi_card("Columnas faltantes",fmt_int(n.get('Columna faltante',0)),"esperadas en la configuración","orange")
+            +kpi_card("Valores no convertidos",fmt_int(int(Q.loc[Q['Problema']=='Valores no convertidos','Registros'].sum())),"fechas e importes vacíos","aqua")
+            +kpi_card("IDs duplicados",fmt_int(int(Q.loc[Q['Problema']=='ID duplicado','Registros'].sum())),"registros con clave repetida")+'</div>', unsafe_allow_html=True)
+        st.markdown(section_header("📋","Por hoja",f"{len(qs)} hojas"), unsafe_allow_html=True)
+        st.dataframe(qs, use_container_width=True, hide_index=True)
+        st.markdown(section_header("⚠️","Problemas",f"{len(Q)}"), unsafe_allow_html=True)
+        if not len(Q): st.success("Sin problemas detectados.")
+        else:
+            st.dataframe(Q, use_container_width=True, height=420, hide_index=True)
+            download_buttons(Q, "calidad_datos", ())
+
+    # ═══ EXPLORADOR ═══
+    elif modulo == "🗂️  Explorador":
+        st.markdown('<div class="hero-kpi" style="padding:18px 28px;"><h4>EXPLORADOR DE DATOS</h4><h1>Análisis libre</h1><p>Navega, filtra y descarga cualquier hoja</p></div>', unsafe_allow_html=True)
+        sm={'📋 Órdenes':'ordenes','📑 Contratos':'contratos','🔧 Obra Menor':'obra_menor','💰 Facturación':'facturacion_2025','📄 Prefacturas':'prefacturas','🛡️ Fianzas':'fianzas','📊 Adquira':'facturas_adquira','📁 Proy 2024':'proyectos_2024'}
+        av={k:v for k,v in sm.items() if v in sheets}
+        sel=st.selectbox("Hoja",list(av.keys()))
+        if sel:
+            k=av[sel]
+            st.markdown(f'<div class="kpi-grid">{kpi_card("Filas",fmt_int(meta['sheets'][k]))}{kpi_card("Columnas",fmt_int(len(meta['columns'][k])),"","green")}</div>',unsafe_allow_html=True)
+            s=st.text_input("🔎 Buscar","",help="Varias palabras = todas deben aparecer. Sin distinguir mayúsculas ni acentos. Para buscar en una columna: ESTADO:cerrada o \"TIPO DE PROYECTO\":\"obra civil\"")
+            if s:
+                with perf.span('explorador:busqueda'): df=engine.sheet(E,k,q=s)
+                if s.strip(): st.info(f"{len(df)} encontrados")
+            else: df=sheets[k]
+            nc=df.select_dtypes(include=[np.number]).columns.tolist()
+            if nc:
+                st.markdown(section_header("📊","Análisis Rápido"),unsafe_allow_html=True)
+                sc=st.selectbox("Columna",nc)
+                c1,c2=st.columns([2,1])
+                with c1, perf.span('explorador:histograma'):
+                    def build():
+                        h=charts.histogram(df[sc])
+                        fig=go.Figure(go.Bar(x=h['x'],y=h['count'],width=h['width'],marker_color='#004481',customdata=h[['lo','hi']],hovertemplate='%{customdata[0]:,.2f} – %{customdata[1]:,.2f}<br>%{y:,}<extra></extra>'))
+                        fig.update_layout(**PLOTLY_LAYOUT,height=300,bargap=0,xaxis_title=sc,yaxis_title='count')
+                        return fig
+                    plot(('explorador',k,s,sc), build)
+                with c2: st.dataframe(df[sc].describe().round(2),use_container_width=True)
+            st.markdown(section_header("📋","Datos",f"{len(df)} reg."),unsafe_allow_html=True)
+            st.dataframe(df,use_container_width=True,height=500,hide_index=True)
+            download_buttons(df, k, (s.strip(),) if s else ())
+finally:
+    RUN = perf.end()
+
+# ─── INSTRUMENTACIÓN (SCD_PERF=1) ───
+if perf.ENABLED:
+    run, rep = RUN, perf.report()
+    with st.sidebar.expander("⏱️ Rendimiento"):
+        if run:
+            st.caption(f"Última ejecución · {run['run']} · {run['total']*1000:.0f} ms")
+            st.dataframe(pd.DataFrame([(n, s*1000) for n,s in run['spans']], columns=['Etapa','ms']).round(1), use_container_width=True, hide_index=True)
+        if rep['stats']:
+            st.caption("Acumulado del proceso")
+            st.dataframe(pd.DataFrame([(n,c,t*1000,t/c*1000,m*1000) for n,(c,t,m) in rep['stats'].items()], columns=['Etapa','Llamadas','Total ms','Media ms','Máx ms']).sort_values('Total ms',ascending=False).round(1), use_container_width=True, hide_index=True)
+        if rep['counts']:
+            st.dataframe(pd.DataFrame([(n,h,m) for n,(h,m) in sorted(rep['counts'].items())], columns=['Caché','Aciertos','Fallos']), use_container_width=True, hide_index=True)
+        if st.button("Reiniciar contadores"): perf.reset()
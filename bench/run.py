@@ -0,0 +1,114 @@
+import argparse, json, os, platform, shutil, subprocess, sys, tempfile, time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from core import loader, engine, sucursales, pdf, search, filtering, rollups, joins, analytics
+from bench import synth
+
+# ─── BENCHMARKS ───
+# Times the data path behind each page on synthetic workbooks of several sizes and writes one JSON document per run.
+# Every operation is timed `repeat` times on fresh state; the JSON keeps min / median so runs can be diffed with --compare.
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = ['monterrey', 'cerrada', 'ESTADO:abierta remodel', 'P00001']
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "bench")
+# A median more than this many times the baseline's is reported as a regression.
+SLOWER = 1.25
+
+def timed(fn, repeat, setup=None):
+    ts = []
+    for _ in range(repeat):
+        if setup: setup()
+        t = time.perf_counter(); fn(); ts.append(time.perf_counter() - t)
+    return {'min': min(ts), 'median': float(np.median(ts)), 'repeat': repeat}
+
+def run_size(n, repeat, data_dir, log):
+    res = {}
+    def rec(op, r):
+        res[op] = r; log(f"  {op:<32} {r['median']*1000:10.1f} ms")
+    path = synth.workbook(n, data_dir)
+    snap = tempfile.mkdtemp(prefix='scd-bench-')
+    try:
+        def cold(): shutil.rmtree(snap, ignore_errors=True); os.makedirs(snap)
+        rec('load_data:excel', timed(lambda: loader.load_data(path, snapshot_dir=snap), repeat, cold))
+        rec('load_data:snapshot', timed(lambda: loader.load_data(path, snapshot_dir=snap), repeat))
+        S, meta = loader.load_data(path, snapshot_dir=snap)
+        # Every sheet handed back by the caller, as the engine does for a workbook it still holds.
+        held = {meta['sheet_fingerprints'][k]: df for k, df in S.items()}
+        rec('load_data:memoria', timed(lambda: loader.load_data(path, snapshot_dir=snap, recall=held.get), repeat))
+    finally: shutil.rmtree(snap, ignore_errors=True)
+    eng = engine.attach(S, meta)
+
+    rec('get_all_sucursales', timed(lambda: sucursales.build_index(S)['names'], repeat))
+    idx = engine.sucursal_index(eng); names = idx['names']
+    picks = [names[i] for i in np.linspace(0, len(names) - 1, min(5, len(names))).astype(int)]
+    rec('get_sucursal_data', timed(lambda: [sucursales.lookup(idx, S, s) for s in picks], repeat))
+    sd = sucursales.lookup(idx, S, picks[0])
+    rec('generate_pdf', timed(lambda: pdf.generate_pdf(picks[0], sd), repeat))
+
+    rec('search:index', timed(lambda: search.build_index(S['ordenes']), repeat))
+    si = search.build_index(S['ordenes'])
+    def queries(): si['cache'].clear(); [search.query(si, q) for q in QUERIES]
+    rec('search:query', timed(queries, repeat))
+
+    rec('rollups:build', timed(lambda: rollups.build(S), repeat))
+    cube = engine.cube(eng)
+    for k, dims in rollups.DIMS.items():
+        if k not in S: continue
+        cols = [c for c in dims if c in S[k].columns]
+        fx = filtering.build_index(S[k], tuple(cols))
+        sel = ((cols[0], filtering.options(fx, cols[0])[0]),) if cols and filtering.options(fx, cols[0]) else ()
+        nums = [c for c in loader.CFG[k][3] if c in S[k].columns]
+        def agg():
+            fx['masks'].clear(); fx['kpis'].clear(); m = filtering.mask(fx, sel)
+            filtering.kpis(fx, S[k], sel, tuple(nums))
+            for g in cube[k]['groups']: rollups.group(cube, k, g, nums, m)
+        rec(f"modulo:{k}", timed(agg, repeat))
+
+    if 'obra_menor' in S: rec('analytics:obra_menor', timed(lambda: analytics.obra_menor(S['obra_menor']), repeat))
+    for k, f in analytics.AGING_SHEETS.items():
+        if k in S: rec(f'analytics:aging:{k}', timed(lambda: f(S[k], pd.Timestamp.today()), repeat))
+    rec('joins:build', timed(lambda: joins.build_index(S), repeat))
+    ji = joins.build_index(S)
+    def rc(): [j['recon'].clear() for j in ji.values()]; [joins.reconcile(ji, S, l) for l in joins.RECONCILE]
+    rec('joins:reconcile', timed(rc, repeat))
+    return {'rows': {k: len(df) for k, df in S.items()}, 'ops': res}
+
+def environment():
+    try: rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=os.path.dirname(DATA_DIR)).stdout.strip()
+    except OSError: rev = ''
+    return {'date': datetime.now().isoformat(timespec='seconds'), 'git': rev, 'python': platform.python_version(), 'pandas': pd.__version__,
+            'numpy': np.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count(), 'workers': loader.WORKERS}
+
+def compare(cur, base):
+    # [(size, op, baseline median, current median, ratio)] for operations present in both runs.
+    out = []
+    for n, r in cur['sizes'].items():
+        for op, v in r['ops'].items():
+            b = base.get('sizes', {}).get(n, {}).get('ops', {}).get(op)
+            if b: out.append((n, op, b['median'], v['median'], v['median'] / b['median'] if b['median'] else float('inf')))
+    return out
+
+# ─── CLI ───
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m bench.run', description="Mide los tiempos de carga, índices, PDF, búsqueda y agregados.")
+    ap.add_argument('-n', '--sizes', default=','.join(map(str, SIZES)), help="filas de órdenes por libro, separadas por coma (p. ej. 1000,10000,1000000)")
+    ap.add_argument('-r', '--repeat', type=int, default=3, help="repeticiones por operación")
+    ap.add_argument('-o', '--out', default=f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", help="JSON de resultados")
+    ap.add_argument('--data', default=DATA_DIR, help="carpeta de los libros sintéticos (se reutilizan)")
+    ap.add_argument('--compare', metavar='JSON', help="resultados anteriores contra los que comparar")
+    a = ap.parse_args(argv)
+    log = lambda s: print(s, file=sys.stderr, flush=True)
+    doc = {'env': environment(), 'sizes': {}}
+    for n in [int(x) for x in a.sizes.split(',') if x.strip()]:
+        log(f"{n} filas"); doc['sizes'][str(n)] = run_size(n, a.repeat, a.data, log)
+    with open(a.out, 'w', encoding='utf-8') as f: json.dump(doc, f, indent=1, ensure_ascii=False)
+    log(f"resultados en {a.out}")
+    if a.compare:
+        with open(a.compare, encoding='utf-8') as f: rows = compare(doc, json.load(f))
+        slow = [r for r in rows if r[4] > SLOWER]
+        for n, op, b, c, x in rows: log(f"{n:>8} {op:<32} {b*1000:10.1f} → {c*1000:10.1f} ms  ×{x:.2f}{'  ⚠' if x > SLOWER else ''}")
+        return 1 if slow else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import argparse, ast, json, os, subprocess, sys
+from datetime import datetime
+
+# ─── STARTUP BUDGET ───
+# Cold-start check for app.py, each number measured in a fresh interpreter:
+#   imports      the top-level imports of app.py (what every new process pays before drawing anything)
+#   first paint  the first full run of the script (Dashboard) through Streamlit's AppTest, data load included
+# Modules in LAZY must not be pulled in by the top-level imports; they belong inside the code that draws with them.
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+IMPORTS_S = 1.5
+PAINT_S = 6.0
+LAZY = ['plotly.express', 'plotly.subplots', 'reportlab', 'core.client']
+
+def top_imports(path=APP):
+    # Source of the module-level import statements of the script, in order.
+    src = open(path, encoding='utf-8').read()
+    return '\n'.join(ast.get_source_segment(src, n) for n in ast.parse(src).body if isinstance(n, (ast.Import, ast.ImportFrom)))
+
+def _child(code, cwd):
+    r = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=cwd,
+                       env={**os.environ, 'PYTHONPATH': os.pathsep.join([os.path.dirname(APP), os.environ.get('PYTHONPATH', '')])})
+    if r.returncode: raise RuntimeError(r.stderr.strip().splitlines()[-1] if r.stderr.strip() else f"código {r.returncode}")
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+def measure_imports(cwd):
+    code = ("import json, sys, time\nt = time.perf_counter()\n" + top_imports() +
+            f"\nprint(json.dumps({{'s': time.perf_counter() - t, 'loaded': [m for m in {LAZY!r} if m in sys.modules]}}))")
+    return _child(code, cwd)
+
+def measure_paint(cwd, timeout=120):
+    code = ("import json, time\nfrom streamlit.testing.v1 import AppTest\n"
+            f"at = AppTest.from_file({APP!r}, default_timeout={timeout}); t = time.perf_counter(); at.run()\n"
+            "print(json.dumps({'s': time.perf_counter() - t, 'error': str(at.exception[0].message) if at.exception else None}))")
+    return _child(code, cwd)
+
+# ─── CLI ───
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m bench.startup', description="Mide el arranque en frío de la app y falla si supera el presupuesto.")
+    ap.add_argument('-C', '--dir', default='.', help="carpeta desde la que se ejecuta la app (donde está el libro o data/)")
+    ap.add_argument('--imports', type=float, default=IMPORTS_S, help="presupuesto de imports en segundos")
+    ap.add_argument('--paint', type=float, default=PAINT_S, help="presupuesto de la primera ejecución en segundos")
+    ap.add_argument('-r', '--repeat', type=int, default=3, help="mediciones de imports (se toma la menor)")
+    ap.add_argument('-o', '--out', help="JSON de resultados")
+    a = ap.parse_args(argv)
+    log = lambda s: print(s, file=sys.stderr, flush=True)
+    imp = min((measure_imports(a.dir) for _ in range(a.repeat)), key=lambda r: r['s'])
+    paint = measure_paint(a.dir)
+    fails = []
+    if imp['s'] > a.imports: fails.append(f"imports {imp['s']:.2f} s > {a.imports:.2f} s")
+    if imp['loaded']: fails.append(f"importados al inicio: {', '.join(imp['loaded'])}")
+    if paint['error']: fails.append(f"error en la primera ejecución: {paint['error']}")
+    elif paint['s'] > a.paint: fails.append(f"primera ejecución {paint['s']:.2f} s > {a.paint:.2f} s")
+    log(f"imports           {imp['s']*1000:8.0f} ms   (presupuesto {a.imports*1000:.0f} ms)")
+    log(f"primera ejecución {paint['s']*1000:8.0f} ms   (presupuesto {a.paint*1000:.0f} ms)")
+    for f in fails: log(f"⚠ {f}")
+    if a.out:
+        with open(a.out, 'w', encoding='utf-8') as f:
+            json.dump({'date': datetime.now().isoformat(timespec='seconds'), 'imports': imp, 'paint': paint, 'budget': {'imports': a.imports, 'paint': a.paint}, 'fails': fails}, f, indent=1, ensure_ascii=False)
+    return 1 if fails else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
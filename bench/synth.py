@@ -0,0 +1,90 @@
+import argparse, os, sys
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from core.loader import CFG
+from core.rollups import DIMS
+from core.sucursales import NAME_COLS
+from core.joins import LINKS
+
+# ─── SYNTHETIC WORKBOOKS ───
+# Same sheets, header rows, date / numeric / key columns as CFG, filled with random but linked data: branch names are
+# shared across sheets, facturas point at real pedidos and CRs repeat between contratos, prefacturas and fianzas.
+# Sheet sizes are fractions of n (n = órdenes rows).
+SCALE = {'ordenes': 1, 'contratos': 1/3, 'obra_menor': 1/2, 'facturacion_2025': 1, 'prefacturas': 1/3, 'fianzas': 1/4, 'facturas_adquira': 1/2, 'proyectos_2024': 1/4}
+LABELS = {
+    'ESTADO': ['Abierta','Cerrada','Cancelada','En revisión'], 'TIPO DE PROYECTO': ['Mantenimiento','Remodelación','Emergencia','Obra civil','Clima'],
+    'ESTATUS': ['OK','Pendiente','Con observaciones'], 'Estatus Operativo': ['En proceso','Terminado','Suspendido','Por iniciar'],
+    'Estatus Cierre': ['Abierto','Cerrado','En revisión'], 'ESTATUS_OPERACIÓN REAL': ['Terminado','En proceso','Pendiente','Cerrado'],
+    'PROYECTO': ['Pintura','Clima','Eléctrico','Plomería','Impermeabilización'], 'ASIGNADO_A': ['Luis','Marta','Pedro','Sofía','Jorge','Ana'],
+    'Estatus Comprobante': ['Vigente','Cancelado'], 'FDP': ['PUE','PPD'], 'Estatus': ['Emitida','Pendiente','Cerrado','Abierto'],
+    'Afianzadora': ['Aserta','Dorama','Sofimex','Chubb'], 'Estatus Expedición': ['Expedida','En trámite'], 'Estatus Vigencia': ['Vigente','Vencida'],
+    'CATEGORIA': ['Obra','Servicio','Material'],
+}
+CITIES = ['MONTERREY','SALTILLO','SAN PEDRO','APODACA','REYNOSA','TAMPICO','VICTORIA','GUADALUPE','SAN NICOLÁS','ESCOBEDO']
+D0, DAYS = np.datetime64('2024-01-01'), 730
+NA_RATE = 0.03
+
+def sizes(n):
+    return {k: max(1, int(n * f)) for k, f in SCALE.items()}
+
+def frames(n, seed=0):
+    rng = np.random.default_rng(seed); m = sizes(n)
+    sucs = np.array([f"SUC {CITIES[i % len(CITIES)]} {i:04d}" for i in range(max(20, n // 20))], dtype=object)
+    pedidos = np.array([f"P{i:07d}" for i in range(m['ordenes'])], dtype=object)
+    crs = np.arange(100, 100 + max(10, n // 10))
+    names, keys = dict(NAME_COLS), {}
+    for link, members in LINKS.items():
+        for k, c in members: keys[(k, c)] = link
+    out = {}
+    for k, (sn, hdr, dates, nums, drop) in CFG.items():
+        r = m[k]; d = {}
+        d[drop] = pedidos if k == 'ordenes' else np.array([f"{k[:2].upper()}{i:07d}" for i in range(r)], dtype=object)
+        for c in dates: d[c] = D0 + rng.integers(0, DAYS, r).astype('timedelta64[D]')
+        for c in nums:
+            v = np.round(rng.lognormal(11, 1.2, r), 2); v[rng.random(r) < NA_RATE] = np.nan; d[c] = v
+        if k in names: d[names[k]] = sucs[rng.integers(0, len(sucs), r)]
+        for c in DIMS.get(k, []):
+            if c not in d: d[c] = np.array(LABELS.get(c, [f"{c[:12]} {j}" for j in range(5)]), dtype=object)[rng.integers(0, len(LABELS.get(c, range(5))), r)]
+        for (kk, c), link in keys.items():
+            if kk != k or (k == 'ordenes' and c == drop): continue
+            if link == 'pedido': v = pedidos[rng.integers(0, len(pedidos), r)].copy(); v[rng.random(r) < 0.05] = 'P9999999'; d[c] = v
+            else: d[c] = crs[rng.integers(0, len(crs), r)]
+        out[k] = pd.DataFrame(d)
+    return out
+
+def write(n, path, seed=0):
+    # One write-only openpyxl pass per sheet: title row when CFG has header=1, then the header and the rows.
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    for k, df in frames(n, seed).items():
+        sn, hdr = CFG[k][:2]; ws = wb.create_sheet(sn)
+        for _ in range(hdr): ws.append([sn])
+        ws.append(list(df.columns))
+        cols = [df[c].to_numpy() for c in df.columns]
+        conv = [(lambda v: None if np.isnat(v) else v.astype('datetime64[us]').item()) if c.dtype.kind == 'M' else
+                (lambda v: None if v != v else float(v)) if c.dtype.kind == 'f' else
+                (lambda v: int(v)) if c.dtype.kind in 'iu' else (lambda v: v) for c in cols]
+        for i in range(len(df)): ws.append([f(c[i]) for f, c in zip(conv, cols)])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'; wb.save(tmp); os.replace(tmp, path)
+    return path
+
+def workbook(n, data_dir, seed=0):
+    # Cached per (n, seed): generating 1M rows takes minutes.
+    path = os.path.join(data_dir, f"synth_{n}_{seed}.xlsx")
+    return path if os.path.exists(path) else write(n, path, seed)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m bench.synth', description="Genera un libro sintético con el formato del sistema integral.")
+    ap.add_argument('rows', type=int, help="filas de órdenes (las demás hojas son proporcionales)")
+    ap.add_argument('-o', '--out', help="archivo de salida")
+    ap.add_argument('--seed', type=int, default=0)
+    a = ap.parse_args(argv)
+    out = a.out or f"synth_{a.rows}_{a.seed}.xlsx"
+    t = datetime.now(); write(a.rows, out, a.seed)
+    print(f"{out} ({sum(sizes(a.rows).values())} filas, {(datetime.now()-t).total_seconds():.1f} s)", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
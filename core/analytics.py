@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+# ─── SHEET ANALYTICS ───
+# Derived columns and per-group distributions computed once per data load (memoized by the engine). Everything is
+# column arithmetic plus group statistics over factorized codes: one lexsort per measure, then medians / quantiles are
+# read at each group's offsets, so the cost does not depend on how many groups or rows there are beyond the sort.
+# Robust z-score (Iglewicz & Hoaglin): 0.6745 * (x - median) / MAD within the group; |z| > Z_OUT flags an outlier.
+Z_OUT = 3.5
+MIN_GROUP = 5
+
+def _num(df, c):
+    return pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float, na_value=np.nan) if c in df.columns else np.full(len(df), np.nan)
+
+def _date(df, c):
+    return pd.to_datetime(df[c], errors='coerce').to_numpy(dtype='datetime64[D]') if c in df.columns else np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+
+def _days(a, b):
+    # b - a in days, NaN where either date is missing.
+    d = (b - a).astype('timedelta64[D]').astype(float); d[np.isnat(a) | np.isnat(b)] = np.nan
+    return d
+
+def group_quantiles(codes, x, qs, ngroups):
+    # Linear-interpolated quantiles of x per group code (codes < 0 / NaN x ignored) -> (counts, {q: array per group}).
+    ok = (codes >= 0) & ~np.isnan(x); c, v = codes[ok], x[ok]
+    order = np.lexsort((v, c)); c, v = c[order], v[order]
+    n = np.bincount(c, minlength=ngroups); start = np.concatenate(([0], np.cumsum(n)[:-1]))
+    out = {}
+    for q in qs:
+        h = start + q * np.maximum(n - 1, 0); lo = np.floor(h).astype(np.intp); hi = np.ceil(h).astype(np.intp)
+        has = n > 0; r = np.full(ngroups, np.nan)
+        lo, hi, h = lo[has], hi[has], h[has]
+        r[has] = v[lo] + (v[hi] - v[lo]) * (h - lo)
+        out[q] = r
+    return n, out
+
+def robust_z(codes, x, ngroups, min_group=MIN_GROUP):
+    # Per-row robust z within its group; NaN for groups smaller than min_group or with MAD 0.
+    n, q = group_quantiles(codes, x, [0.5], ngroups); med = q[0.5]
+    g = np.where(codes >= 0, codes, 0)
+    dev = np.abs(x - med[g]); dev[codes < 0] = np.nan
+    _, qm = group_quantiles(codes, dev, [0.5], ngroups); mad = qm[0.5]
+    mad = np.where((n >= min_group) & (mad > 0), mad, np.nan)
+    z = 0.6745 * (x - med[g]) / mad[g]; z[codes < 0] = np.nan
+    return z
+
+# ─── OBRA MENOR ───
+OM_BUDGET, OM_CLOSE, OM_VAR = 'PRESUPUESTO_INICIAL', 'IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL', 'VARIACIÓN_PRESUPUESTAL'
+OM_START, OM_END, OM_END_REAL = 'FECHA INICIO', 'FECHA FIN', 'FECHA FIN REAL'
+OM_DIMS = ['ASIGNADO_A', 'PROYECTO']
+OM_MEASURES = ['Variación %', 'Desvío (días)']
+
+def obra_menor(df, dims=OM_DIMS):
+    # {'rows': per-row frame aligned with df (positions), 'groups': {dim: per-group frame}}.
+    pres, close, var = _num(df, OM_BUDGET), _num(df, OM_CLOSE), _num(df, OM_VAR)
+    var = np.where(np.isnan(var), close - pres, var) if OM_VAR in df.columns else close - pres
+    with np.errstate(divide='ignore', invalid='ignore'): pct = np.where(pres > 0, var / pres * 100, np.nan)
+    start, end, real = _date(df, OM_START), _date(df, OM_END), _date(df, OM_END_REAL)
+    rows = {'Variación': var, 'Variación %': pct, 'Duración plan (días)': _days(start, end), 'Duración real (días)': _days(start, real), 'Desvío (días)': _days(end, real)}
+    flag = np.zeros(len(df), dtype=bool); groups = {}
+    for dim in dims:
+        if dim not in df.columns: continue
+        codes, uniq = pd.factorize(df[dim]); codes = codes.astype(np.intp); k = len(uniq)
+        g = {dim: np.asarray(uniq, dtype=object)}
+        for lb in OM_MEASURES:
+            x = rows[lb]; z = robust_z(codes, x, k)
+            out = np.abs(z) > Z_OUT; flag |= out
+            rows[f"z {lb} · {dim}"] = z
+            n, q = group_quantiles(codes, x, [0.25, 0.5, 0.75], k)
+            g.update({f"n {lb}": n, f"{lb} p25": q[0.25], f"{lb} mediana": q[0.5], f"{lb} p75": q[0.75],
+                      f"Atípicos {lb}": np.bincount(codes[out & (codes >= 0)], minlength=k)})
+        groups[dim] = pd.DataFrame(g).sort_values(f"n {OM_MEASURES[0]}", ascending=False, kind='stable').reset_index(drop=True)
+    rows['Atípico'] = flag
+    return {'rows': pd.DataFrame(rows), 'groups': groups}
+
+# ─── AGING ───
+# Days outstanding per row, bucketed once per load (and per day, since ages run up to today). The dashboards and the
+# service only bincount these codes and amounts under the module mask; no date arithmetic happens per request.
+AGING_DAYS = [30, 60, 90]
+AGING = ['0–30', '31–60', '61–90', '90+']
+
+def aging_bucket(days):
+    # Index into AGING per row, -1 where days is NaN.
+    b = np.searchsorted(AGING_DAYS, np.nan_to_num(days), side='left').astype(np.int8); b[np.isnan(days)] = -1
+    return b
+
+def _aging(df, days, amounts, dim):
+    codes, uniq = pd.factorize(df[dim]) if dim in df.columns else (np.full(len(df), -1), [])
+    return {'days': days, 'bucket': aging_bucket(days), 'amounts': amounts, 'dim': dim, 'codes': codes.astype(np.intp), 'names': np.asarray(uniq, dtype=object)}
+
+def buckets(A, m=None):
+    # [Antigüedad, Registros, *amounts]: count and amount per aging bucket, restricted to the boolean mask m.
+    b = A['bucket']; sel = b >= 0 if m is None else (b >= 0) & m; k = len(AGING)
+    out = {'Antigüedad': AGING, 'Registros': np.bincount(b[sel], minlength=k)}
+    for c, w in A['amounts'].items(): out[c] = np.bincount(b[sel], weights=np.nan_to_num(w[sel]), minlength=k)
+    return pd.DataFrame(out)
+
+def outstanding(A, m=None):
+    # Per value of A['dim']: records, amounts, and the first amount split by aging bucket; largest first, empty groups dropped.
+    c, b = A['codes'], A['bucket']; k, nb = len(A['names']), len(AGING)
+    sel = c >= 0 if m is None else (c >= 0) & m
+    out = {A['dim']: A['names'], 'Registros': np.bincount(c[sel], minlength=k)}
+    for col, w in A['amounts'].items(): out[col] = np.bincount(c[sel], weights=np.nan_to_num(w[sel]), minlength=k)
+    if A['amounts']:
+        first = next(iter(A['amounts'])); w = np.nan_to_num(A['amounts'][first]); s = sel & (b >= 0)
+        split = np.bincount(c[s] * nb + b[s], weights=w[s], minlength=k * nb).reshape(k, nb)
+        out.update({f"{first} {lb}": split[:, i] for i, lb in enumerate(AGING)})
+    d = pd.DataFrame(out)
+    d = d[d['Registros'] > 0]
+    return d.sort_values(next(iter(A['amounts']), 'Registros'), ascending=False, kind='stable').reset_index(drop=True)
+
+# Prefacturas: one duration per consecutive pair of dates; an open prefactura (no invoice date) ages from its request.
+PF_DATES = ['Fecha solicitud', 'Fecha Emisión', 'Fecha de aceptación', 'Fecha de factura']
+PF_STAGES = ['Solicitud → Emisión', 'Emisión → Aceptación', 'Aceptación → Factura', 'Ciclo total']
+PF_AMOUNT, PF_DIM = 'Total', 'Proyecto / Obra'
+
+def prefacturas(df, ref):
+    d = [_date(df, c) for c in PF_DATES]; ref = np.datetime64(pd.Timestamp(ref).normalize(), 'D')
+    stages = dict(zip(PF_STAGES, [_days(a, b) for a, b in zip(d, d[1:])] + [_days(d[0], d[-1])]))
+    open_ = np.isnat(d[-1]) & ~np.isnat(d[0])
+    age = np.where(open_, _days(d[0], np.full(len(df), ref)), np.nan)
+    A = _aging(df, age, {f"{PF_AMOUNT} pendiente": np.where(open_, _num(df, PF_AMOUNT), np.nan)}, PF_DIM)
+    A['stages'] = stages
+    return A
+
+def stage_summary(A, m=None):
+    # [Etapa, n, p25, mediana, p75] of each stage duration in days, restricted to the mask m.
+    rows = []
+    for lb, x in A['stages'].items():
+        codes = np.zeros(len(x), dtype=np.intp) if m is None else np.where(m, 0, -1).astype(np.intp)
+        n, q = group_quantiles(codes, x, [0.25, 0.5, 0.75], 1)
+        rows.append({'Etapa': lb, 'n': int(n[0]), 'p25': q[0.25][0], 'mediana': q[0.5][0], 'p75': q[0.75][0]})
+    return pd.DataFrame(rows)
+
+# Proyectos 2024 has no date columns; its aging buckets the sheet's own 'Días transcurridos'.
+PY_DAYS, PY_AMOUNTS, PY_DIM = 'Días transcurridos', ['Por pagar', 'Por devolver'], 'Proyecto'
+
+def proyectos(df, ref=None):
+    return _aging(df, _num(df, PY_DAYS), {c: _num(df, c) for c in PY_AMOUNTS if c in df.columns}, PY_DIM)
+
+AGING_SHEETS = {'prefacturas': prefacturas, 'proyectos_2024': proyectos}
@@ -0,0 +1,82 @@
+import base64, re
+
+# ─── STATIC ASSETS ───
+# Stylesheet and logo markup, built once per process at import: app.py only sends the finished strings on each rerun.
+LOGO_SVG = '''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 240 60">
+  <defs><linearGradient id="g1" x1="0%" y1="0%" x2="100%" y2="100%"><stop offset="0%" style="stop-color:#004481"/><stop offset="100%" style="stop-color:#0066B3"/></linearGradient></defs>
+  <rect x="0" y="8" width="48" height="44" rx="8" fill="url(#g1)"/>
+  <path d="M12 22 L24 16 L36 22 L36 38 L24 44 L12 38Z" fill="none" stroke="white" stroke-width="2"/>
+  <path d="M24 16 L24 44" stroke="white" stroke-width="1.5" opacity="0.6"/>
+  <path d="M12 30 L36 30" stroke="white" stroke-width="1.5" opacity="0.6"/>
+  <circle cx="24" cy="30" r="4" fill="#00A9E0"/>
+  <text x="58" y="28" font-family="Helvetica,Arial,sans-serif" font-size="18" font-weight="700" fill="#004481">SERVMAC</text>
+  <text x="58" y="46" font-family="Helvetica,Arial,sans-serif" font-size="10" font-weight="400" fill="#5C7D9A" letter-spacing="1.5">CONTROL DOCUMENTAL</text>
+  <rect x="158" y="14" width="1.5" height="32" rx="1" fill="#E0E8F0"/>
+  <text x="169" y="28" font-family="Helvetica,Arial,sans-serif" font-size="11" font-weight="600" fill="#004481">BBVA</text>
+  <text x="169" y="42" font-family="Helvetica,Arial,sans-serif" font-size="8" font-weight="400" fill="#5C7D9A" letter-spacing="0.8">CONSERVACIÓN NE</text>
+</svg>'''
+
+STYLE = """
+@import url('https://fonts.googleapis.com/css2?family=DM+Sans:opsz,wght@9..40,300;9..40,400;9..40,500;9..40,600;9..40,700&family=JetBrains+Mono:wght@400;500&display=swap');
+html, body, [class*="css"] { font-family: 'DM Sans', sans-serif !important; }
+.main .block-container { padding: 1.5rem 2.5rem 3rem; max-width: 1440px; }
+section[data-testid="stSidebar"] { background: linear-gradient(180deg, #001B36 0%, #002952 40%, #003D7A 100%); border-right: none; }
+section[data-testid="stSidebar"] * { color: #C8DDEF !important; }
+section[data-testid="stSidebar"] hr { border-color: rgba(255,255,255,0.08) !important; }
+section[data-testid="stSidebar"] .stRadio > div[role="radiogroup"] > label[data-baseweb="radio"] {
+    background: rgba(255,255,255,0.04); border-radius: 10px; padding: 0.45rem 0.8rem; margin-bottom: 2px; transition: all 0.2s;
+}
+section[data-testid="stSidebar"] .stRadio > div[role="radiogroup"] > label[data-baseweb="radio"]:hover { background: rgba(0,169,224,0.15); }
+
+.kpi-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 16px; margin-bottom: 24px; }
+.kpi-card { background: white; border-radius: 14px; padding: 20px 22px; box-shadow: 0 1px 3px rgba(0,68,129,0.06); border-left: 4px solid #004481; transition: all 0.25s; position: relative; overflow: hidden; }
+.kpi-card:hover { box-shadow: 0 4px 12px rgba(0,68,129,0.08); transform: translateY(-2px); }
+.kpi-card::after { content: ''; position: absolute; top: 0; right: 0; width: 60px; height: 60px; background: linear-gradient(135deg, transparent 50%, rgba(0,68,129,0.03) 50%); border-radius: 0 14px 0 0; }
+.kpi-card .kpi-label { font-size: 0.7rem; font-weight: 600; text-transform: uppercase; letter-spacing: 0.8px; color: #5C7D9A; margin-bottom: 6px; }
+.kpi-card .kpi-value { font-size: 1.55rem; font-weight: 700; color: #0F1B2D; line-height: 1.2; font-family: 'JetBrains Mono', monospace; }
+.kpi-card .kpi-sub { font-size: 0.72rem; color: #5C7D9A; margin-top: 4px; }
+.kpi-card.green { border-left-color: #0E6E3D; }
+.kpi-card.orange { border-left-color: #D4721A; }
+.kpi-card.red { border-left-color: #C0392B; }
+.kpi-card.aqua { border-left-color: #00A9E0; }
+
+.hero-kpi { background: linear-gradient(135deg, #004481 0%, #0066B3 60%, #00A9E0 100%); border-radius: 18px; padding: 28px 32px; color: white; box-shadow: 0 12px 40px rgba(0,68,129,0.12); margin-bottom: 28px; position: relative; overflow: hidden; }
+.hero-kpi::before { content: ''; position: absolute; top: -30%; right: -10%; width: 200px; height: 200px; background: radial-gradient(circle, rgba(255,255,255,0.08) 0%, transparent 70%); border-radius: 50%; }
+.hero-kpi h4 { font-size: 0.8rem; opacity: 0.8; margin: 0; font-weight: 400; letter-spacing: 1px; text-transform: uppercase; }
+.hero-kpi h1 { font-size: 2rem; margin: 8px 0 4px; font-weight: 700; font-family: 'JetBrains Mono', monospace; }
+.hero-kpi p { font-size: 0.85rem; opacity: 0.75; margin: 0; }
+
+.section-hdr { display: flex; align-items: center; gap: 10px; margin: 28px 0 16px; padding-bottom: 10px; border-bottom: 2px solid #EEF2F7; }
+.section-hdr .icon { width: 34px; height: 34px; background: linear-gradient(135deg, #004481, #0066B3); border-radius: 9px; display: flex; align-items: center; justify-content: center; font-size: 16px; flex-shrink: 0; }
+.section-hdr h3 { font-size: 1.05rem; font-weight: 600; color: #0F1B2D; margin: 0; }
+.section-hdr .badge { background: #EEF2F7; color: #5C7D9A; font-size: 0.7rem; padding: 3px 10px; border-radius: 20px; font-weight: 500; }
+
+.overview-section { background: white; border-radius: 14px; padding: 24px; box-shadow: 0 1px 3px rgba(0,68,129,0.06); margin-bottom: 16px; border: 1px solid #E8EEF4; }
+.overview-section h4 { font-size: 0.95rem; font-weight: 600; color: #004481; margin: 0 0 16px; padding-bottom: 10px; border-bottom: 1px solid #EEF2F7; display: flex; align-items: center; gap: 8px; }
+.ov-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(220px, 1fr)); gap: 12px; }
+.ov-item { background: #F7F9FC; border-radius: 10px; padding: 12px 16px; }
+.ov-item .label { font-size: 0.68rem; text-transform: uppercase; letter-spacing: 0.6px; color: #5C7D9A; font-weight: 500; }
+.ov-item .val { font-size: 0.95rem; font-weight: 600; color: #0F1B2D; margin-top: 2px; }
+
+.status-badge { display: inline-block; padding: 4px 12px; border-radius: 20px; font-size: 0.72rem; font-weight: 600; }
+.status-badge.green { background: #E8F5E9; color: #0E6E3D; }
+.status-badge.orange { background: #FFF3E0; color: #D4721A; }
+.status-badge.red { background: #FFEBEE; color: #C0392B; }
+.status-badge.blue { background: #E3F2FD; color: #004481; }
+
+div[data-testid="stDataFrame"] { border-radius: 14px; overflow: hidden; box-shadow: 0 1px 3px rgba(0,68,129,0.06); }
+.stTabs [data-baseweb="tab-list"] { gap: 4px; background: #F7F9FC; border-radius: 12px; padding: 4px; }
+.stTabs [data-baseweb="tab"] { border-radius: 10px; padding: 8px 20px; font-weight: 500; font-size: 0.85rem; }
+.stDownloadButton button { background: linear-gradient(135deg, #004481, #0066B3) !important; color: white !important; border: none !important; border-radius: 10px !important; font-weight: 600 !important; padding: 0.5rem 1.5rem !important; }
+.stDownloadButton button:hover { box-shadow: 0 4px 12px rgba(0,68,129,0.12) !important; transform: translateY(-1px) !important; }
+.divider { height: 1px; background: #EEF2F7; margin: 24px 0; }
+#MainMenu, footer, header { visibility: hidden; }
+"""
+
+def minify_css(s):
+    s = re.sub(r'/\*.*?\*/', '', s, flags=re.S)
+    s = re.sub(r'\s+', ' ', s)
+    return re.sub(r'\s*([{};,>])\s*', r'\1', s).replace(';}', '}').strip()
+
+CSS = f"<style>{minify_css(STYLE)}</style>"
+LOGO_HTML = f'<div style="padding:16px 0 8px;"><img src="data:image/svg+xml;base64,{base64.b64encode(LOGO_SVG.encode()).decode()}" style="width:210px;"></div>'
@@ -0,0 +1,75 @@
+import argparse, os, re, sys, zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from core import loader, sucursales, pdf
+
+# ─── BATCH OVERVIEW PDFs ───
+# Every branch's Overview PDF rendered in worker processes and streamed into one ZIP.
+# Each PDF is written to the archive as soon as it is done, and at most 2 x workers are in flight at any time.
+# The branch's rows are cut in the parent, so a worker only ever receives its own slice, never the whole workbook.
+def _render(suc, sd):
+    return suc, (pdf.generate_pdf(suc, sd).getvalue() if sd else None)
+
+def filter_names(names, q):
+    q = str(q or '').upper().strip()
+    return [n for n in names if q in n.upper()] if q else list(names)
+
+def pdf_name(suc, stamp, used):
+    base = re.sub(r'[^\w\-]+', '_', suc).strip('_') or 'sucursal'
+    name, i = f"Overview_{base}_{stamp}.pdf", 1
+    while name in used: i += 1; name = f"Overview_{base}_{stamp}_{i}.pdf"
+    used.add(name)
+    return name
+
+def batch_pdfs(S, out, names=None, exact=False, workers=0, progress=None):
+    # out: path or writable binary file. Returns (PDFs written, branches without records).
+    idx = sucursales.build_index(S)
+    if names is None: names = idx['names']
+    total, done, written, empty, used = len(names), 0, 0, [], set()
+    stamp = datetime.now().strftime('%Y%m%d')
+    n = min(total, workers or os.cpu_count() or 1)
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as z:
+        def put(suc, data):
+            nonlocal done, written
+            done += 1
+            if data is None: empty.append(suc)
+            else: z.writestr(pdf_name(suc, stamp, used), data); written += 1
+            if progress: progress(done, total, suc)
+        cut = lambda suc: (suc, sucursales.lookup(idx, S, suc, exact))
+        if n <= 1:
+            for suc in names: put(*_render(*cut(suc)))
+            return written, empty
+        with ProcessPoolExecutor(n, mp_context=loader.mp_context()) as ex:
+            pending = set()
+            for suc in names:
+                pending.add(ex.submit(_render, *cut(suc)))
+                if len(pending) >= 2 * n:
+                    fin, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in fin: put(*f.result())
+            for f in wait(pending).done: put(*f.result())
+    return written, empty
+
+# ─── CLI ───
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m core.batch', description="Exporta el Overview PDF de todas las sucursales a un ZIP.")
+    ap.add_argument('workbook', nargs='?', help="archivo Excel del sistema integral")
+    ap.add_argument('--servicio', metavar='URL', help="tomar los datos de un `python -m core.service` en lugar del Excel")
+    ap.add_argument('-o', '--out', default=f"Overview_sucursales_{datetime.now().strftime('%Y%m%d')}.zip", help="ZIP de salida")
+    ap.add_argument('-f', '--filtro', default='', help="solo sucursales cuyo nombre contiene este texto")
+    ap.add_argument('-s', '--sucursal', action='append', help="sucursal específica (se puede repetir)")
+    ap.add_argument('--exacta', action='store_true', help="coincidencia exacta del nombre")
+    ap.add_argument('-w', '--workers', type=int, default=0, help="procesos (0 = uno por núcleo)")
+    a = ap.parse_args(argv)
+    if not (a.workbook or a.servicio): ap.error("indica el archivo Excel o --servicio")
+    if a.servicio: from core import client
+    S, meta = client.load_data(a.servicio) if a.servicio else loader.load_data(a.workbook)
+    for k, e in meta['errors'].items(): print(f"aviso: hoja {k} sin cargar — {e}", file=sys.stderr)
+    names = filter_names(a.sucursal or sucursales.build_index(S)['names'], a.filtro)
+    if not names: print("Sin sucursales que exportar.", file=sys.stderr); return 1
+    def prog(d, t, s): print(f"\r[{d}/{t}] {s[:60]:<60}", end='' if d < t else '\n', file=sys.stderr, flush=True)
+    written, empty = batch_pdfs(S, a.out, names, a.exacta, a.workers, prog)
+    print(f"{written} PDF en {a.out}" + (f" ({len(empty)} sin registros)" if empty else ""), file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import sys, threading
+from collections import Counter, OrderedDict
+import numpy as np
+import pandas as pd
+from core import perf
+
+# ─── SHARED CACHE ───
+# Process-wide LRU bounded by total bytes rather than entry count. One value per key: a second put() of a key that is
+# already there returns the cached value, so every caller shares the same object and nothing is copied on the way out.
+# Evicted entries can be handed to spill(key, value), which returns a token (or None); a later get() of that key calls
+# restore(key, token) and re-caches the result, so an evicted value can come back from disk instead of being rebuilt.
+def new(name, max_bytes, size, spill=None, restore=None):
+    return {'name': name, 'max': max_bytes, 'size': size, 'spill': spill, 'restore': restore,
+            'items': OrderedDict(), 'bytes': 0, 'spilled': OrderedDict(), 'stats': Counter(), 'lock': threading.Lock()}
+
+def _evicted(c, out):
+    # Spill runs outside the lock: it may touch the disk.
+    for k, v in out:
+        token = c['spill'](k, v) if c['spill'] else None
+        if token is not None:
+            with c['lock']: c['spilled'][k] = token; c['stats']['spilled'] += 1
+
+def get(c, key):
+    with c['lock']:
+        if key in c['items']:
+            c['items'].move_to_end(key); c['stats']['hits'] += 1; perf.count(c['name'], True)
+            return c['items'][key][0]
+        token = c['spilled'].get(key)
+    if token is not None and c['restore']:
+        v = c['restore'](key, token)
+        if v is not None:
+            with c['lock']: c['stats']['restored'] += 1
+            perf.count(c['name'], True)
+            return put(c, key, v)
+    with c['lock']: c['stats']['misses'] += 1
+    perf.count(c['name'], False)
+    return None
+
+def put(c, key, value):
+    n = c['size'](value); out = []
+    with c['lock']:
+        if key in c['items']: c['items'].move_to_end(key); return c['items'][key][0]
+        c['items'][key] = (value, n); c['bytes'] += n; c['spilled'].pop(key, None)
+        # The newest entry always stays, even when it alone is over the limit.
+        while c['bytes'] > c['max'] and len(c['items']) > 1:
+            k, (v, nb) = c['items'].popitem(last=False); c['bytes'] -= nb; c['stats']['evictions'] += 1; out.append((k, v))
+    _evicted(c, out)
+    return value
+
+def resize(c, key, delta):
+    # An entry grew (or shrank) in place by delta bytes (an engine building indexes); the caller measures only what it
+    # added, so nothing is re-walked. Older entries are evicted if the total is now over.
+    out = []
+    with c['lock']:
+        if not delta or key not in c['items']: return
+        v, n = c['items'][key]; c['items'][key] = (v, n + delta); c['bytes'] += delta
+        for k in list(c['items']):
+            if c['bytes'] <= c['max']: break
+            if k == key: continue
+            e, nb = c['items'].pop(k); c['bytes'] -= nb; c['stats']['evictions'] += 1; out.append((k, e))
+    _evicted(c, out)
+
+def values(c):
+    with c['lock']: return [v for v, _ in c['items'].values()]
+
+def nbytes(o, seen=None):
+    # Rough footprint of derived structures (arrays, frames, containers), counting shared objects once. Frames are
+    # measured shallow: a filtered copy points at the same string objects as the sheet it came from.
+    seen = set() if seen is None else seen
+    if id(o) in seen: return 0
+    seen.add(id(o))
+    if isinstance(o, np.ndarray): return o.nbytes
+    if isinstance(o, pd.DataFrame): return int(o.memory_usage(deep=False).sum())
+    if isinstance(o, (pd.Series, pd.Index)): return int(o.memory_usage(deep=False))
+    if isinstance(o, dict): return sys.getsizeof(o) + sum(nbytes(k, seen) + nbytes(v, seen) for k, v in o.items())
+    if isinstance(o, (list, tuple, set, frozenset)): return sys.getsizeof(o) + sum(nbytes(v, seen) for v in o)
+    return sys.getsizeof(o)
+
+def stats(c):
+    with c['lock']:
+        return {**{k: 0 for k in ('hits', 'misses', 'restored', 'evictions', 'spilled')}, **c['stats'],
+                'entries': len(c['items']), 'bytes': c['bytes'], 'max_bytes': c['max'], 'on_disk': len(c['spilled'])}
@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from core import perf
+
+# ─── CHART PAYLOADS ───
+# Figures get pre-reduced data only: histograms are binned with NumPy and long category lists keep the TOP_N largest
+# plus one "Otros" slice, so what reaches the browser does not grow with the sheet. Built figures are kept per
+# (data, chart, filter state) and reused by every session.
+TOP_N = 12
+BINS = 30
+MAX_BARS = 30
+FIG_CACHE = 256
+OTHER = "Otros"
+
+_figs, _lock = OrderedDict(), threading.Lock()
+
+def top_n(d, label, value, n=TOP_N, other=OTHER):
+    # Rows sorted by value; past the n-th, every row folds into one `other` row (numeric columns summed).
+    d = d.sort_values(value, ascending=False, kind='stable')
+    if len(d) <= n + 1: return d.reset_index(drop=True)
+    head, rest = d.iloc[:n], d.iloc[n:]
+    row = {c: (rest[c].sum() if pd.api.types.is_numeric_dtype(rest[c]) else None) for c in d.columns}; row[label] = other
+    return pd.concat([head, pd.DataFrame([row])], ignore_index=True)
+
+def histogram(s, bins=BINS):
+    # [x (bin center), width, count, lo, hi] over the finite values of s.
+    v = pd.to_numeric(s, errors='coerce').to_numpy(dtype=float, na_value=np.nan); v = v[np.isfinite(v)]
+    if not len(v): return pd.DataFrame({'x': [], 'width': [], 'count': [], 'lo': [], 'hi': []})
+    counts, edges = np.histogram(v, bins=bins)
+    return pd.DataFrame({'x': (edges[:-1] + edges[1:]) / 2, 'width': np.diff(edges), 'count': counts, 'lo': edges[:-1], 'hi': edges[1:]})
+
+def figure(key, build):
+    # build() runs only on a miss; the cached Figure is shared, so callers must not modify it.
+    with _lock:
+        if key in _figs: _figs.move_to_end(key); perf.count('graficas', True); return _figs[key]
+    perf.count('graficas', False)
+    fig = build()
+    with _lock:
+        _figs[key] = fig
+        while len(_figs) > FIG_CACHE: _figs.popitem(last=False)
+    return fig
@@ -0,0 +1,26 @@
+import json, urllib.error, urllib.request
+import pyarrow as pa
+
+# ─── SERVICE CLIENT ───
+# Calls core.service; results decode to what the engine function returned (DataFrame, bytes or plain JSON values).
+ARROW = 'application/vnd.apache.arrow.stream'
+TIMEOUT = 120
+
+def call(url, fn, **kw):
+    req = urllib.request.Request(f"{url.rstrip('/')}/api/{fn}", json.dumps(kw, ensure_ascii=False).encode(), {'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=TIMEOUT) as r: ctype, data = r.headers.get_content_type(), r.read()
+    except urllib.error.HTTPError as e:
+        try: msg = json.loads(e.read())['error']
+        except (ValueError, KeyError): msg = str(e)
+        raise RuntimeError(f"servicio: {msg}") from None
+    if ctype == ARROW: return pa.ipc.open_stream(pa.py_buffer(data)).read_all().to_pandas()
+    if ctype == 'application/json': return json.loads(data)
+    return data
+
+def load_data(url):
+    # Same (sheets, meta) as loader.load_data, taken from the service instead of the workbook.
+    m = call(url, 'meta')
+    S = {k: call(url, 'sheet', key=k) for k in m.pop('sheets')}
+    m['memory'] = {k: tuple(v) for k, v in m.get('memory', {}).items()}
+    return S, m
@@ -0,0 +1,307 @@
+import functools, inspect, json, os, threading
+from collections.abc import Mapping
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from core import loader, sucursales, pdf, search, filtering, rollups, joins, vencimientos, analytics, quality, perf, cache
+
+# ─── DATA ENGINE ───
+# One engine per loaded workbook: the sheets plus every index derived from them, built on first use and shared by all
+# callers in the process (Streamlit sessions, the HTTP service, batch jobs). Engines are kept by data fingerprint in a
+# core/cache.py LRU bounded by the total size of their sheets and derived indexes (SCD_CACHE_MB); callers get the cached
+# engine itself, never a copy, so frames must be treated as read-only. Nothing else holds sheets: a reload that finds an
+# unchanged sheet in memory takes it from an engine still in the cache. An evicted engine whose sheets all have snapshots on disk
+# (SCD_CACHE_SPILL) keeps only their fingerprints and comes back from the snapshots when asked for again.
+CACHE_MB = float(os.environ.get("SCD_CACHE_MB", "1024"))
+SPILL = os.environ.get("SCD_CACHE_SPILL", "1") != "0"
+# Upload content hash -> data fingerprint, so a rerun with the same file skips reading the sheet XML again.
+UPLOADS = 64
+
+def size(eng):
+    # Sheets (deep, measured once at parse) plus everything memoized on them: indexes, cubes, filter masks and frames.
+    with eng['lock']: memo = list(eng['memo'].values())
+    return sum((df.attrs.get('memory') or (None, None))[1] or int(df.memory_usage(deep=True).sum()) for df in eng['sheets'].values()) + cache.nbytes(memo)
+
+def _spill(fp, eng):
+    fps = eng['meta'].get('sheet_fingerprints', {})
+    if not loader.SNAPSHOT_DIR or any(not fps.get(k) or not os.path.exists(os.path.join(loader.SNAPSHOT_DIR, f"{fps[k]}.arrow")) for k in eng['sheets']): return None
+    return eng['meta']
+
+def _restore(fp, meta):
+    S = {}
+    for k, sfp in meta['sheet_fingerprints'].items():
+        if k not in meta.get('memory', {}): continue
+        df = loader.load_snapshot(sfp)
+        if df is None: return None
+        S[k] = df
+    return _new(S, meta)
+
+_cache = cache.new('libros', CACHE_MB * 2**20, size, _spill if SPILL else None, _restore)
+_uploads, _lock = OrderedDict(), threading.Lock()
+
+def _new(S, meta):
+    return {'sheets': S, 'meta': meta, 'fingerprint': meta['fingerprint'], 'memo': {}, 'lock': threading.Lock()}
+
+def cached(fp):
+    return cache.get(_cache, fp)
+
+def _recall(sfp):
+    # A sheet with this snapshot fingerprint from any engine still in the cache.
+    for e in cache.values(_cache):
+        for k, f in e['meta'].get('sheet_fingerprints', {}).items():
+            if f == sfp and k in e['sheets']: return e['sheets'][k]
+    return None
+
+def attach(S, meta):
+    # Engine over sheets that are already loaded (e.g. fetched from the service); reuses the one for the same data.
+    return cached(meta['fingerprint']) or cache.put(_cache, meta['fingerprint'], _new(S, meta))
+
+def load(fp, cfg=loader.CFG):
+    return attach(*loader.load_data(fp, cfg, recall=_recall))
+
+def upload(src, cfg=loader.CFG):
+    # Uploaded file (bytes or file-like): keyed by a hash of its content, so the same upload in any session is one engine.
+    data = loader.read_source(src); h = loader.fingerprint(data, cfg)
+    with _lock:
+        fp = _uploads.get(h)
+        if fp: _uploads.move_to_end(h)
+    eng = cached(fp) if fp else None
+    if eng is None:
+        eng = load(data, cfg)
+        with _lock:
+            _uploads[h] = eng['fingerprint']
+            while len(_uploads) > UPLOADS: _uploads.popitem(last=False)
+    return eng
+
+# eng is ignored; it is there so the service can expose this like the other queries.
+def cache_stats(eng=None):
+    return cache.stats(_cache)
+
+def _derived(eng, key, build):
+    name = key if isinstance(key, str) else key[0]
+    with eng['lock']:
+        if key in eng['memo']: perf.count(f'indice:{name}', True); return eng['memo'][key]
+    perf.count(f'indice:{name}', False)
+    with perf.span(f'indice:{name}'): v = build()
+    with eng['lock']: w = eng['memo'].setdefault(key, v)
+    if w is v: _grown(eng, cache.nbytes(v))
+    return w
+
+def _grown(eng, delta):
+    # The engine's entry in the cache grows by the bytes just added; the rest of the memo is not measured again.
+    cache.resize(_cache, eng['fingerprint'], delta)
+
+def _hook(eng, idx):
+    # Filter and search indexes keep their own result LRUs; they report the bytes each new result adds (minus what their
+    # LRU dropped) so the budget sees it.
+    idx['on_grow'] = lambda delta: _grown(eng, delta)
+    return idx
+
+def sucursal_index(eng): return _derived(eng, 'sucursales', lambda: sucursales.build_index(eng['sheets']))
+def cube(eng): return _derived(eng, 'rollups', lambda: rollups.build(eng['sheets']))
+def join_index(eng): return _derived(eng, 'joins', lambda: joins.build_index(eng['sheets']))
+def search_index(eng, key): return _derived(eng, ('search', key), lambda: _hook(eng, search.build_index(eng['sheets'][key])))
+def vencimiento_index(eng): return _derived(eng, 'vencimientos', lambda: vencimientos.build_index(eng['sheets'].get('fianzas', pd.DataFrame())))
+def obra_menor_analytics(eng): return _derived(eng, 'analitica:obra_menor', lambda: analytics.obra_menor(eng['sheets']['obra_menor']))
+def aging(eng, key):
+    # Keyed by day as well: open prefacturas age up to today. Only today's entry is kept; earlier days are dropped.
+    t = vencimientos.today(); k = ('antiguedad', key, t.date())
+    with eng['lock']:
+        for o in [o for o in eng['memo'] if isinstance(o, tuple) and o[:2] == k[:2] and o != k]: del eng['memo'][o]
+    return _derived(eng, k, lambda: analytics.AGING_SHEETS[key](eng['sheets'][key], t))
+def filter_index(eng, key): return _derived(eng, ('filter', key), lambda: _hook(eng, filtering.build_index(eng['sheets'][key])))
+
+# ─── REMOTE ───
+# remote(url) is an engine over a running `python -m core.service`: every @query below is sent to the service with the
+# same arguments and its result kept by call, so the UI stays a thin client. Code that really needs a whole sheet
+# (Overview cards, batch PDFs, Conciliación lookups, the Explorador) still reads eng['sheets'], fetched on first use.
+REMOTE_CALLS = 256
+_remotes = OrderedDict()
+
+class _Sheets(Mapping):
+    def __init__(self, url, counts): self.url, self.counts, self.got, self.lock = url, counts, {}, threading.Lock()
+    def __getitem__(self, k):
+        if k not in self.counts: raise KeyError(k)
+        with self.lock:
+            if k in self.got: return self.got[k]
+        from core import client
+        df = client.call(self.url, 'sheet', key=k)
+        with self.lock: return self.got.setdefault(k, df)
+    def __contains__(self, k): return k in self.counts
+    def __iter__(self): return iter(self.counts)
+    def __len__(self): return len(self.counts)
+
+def remote(url):
+    # One engine per (url, data fingerprint); a new fingerprint on the service means a new engine here.
+    from core import client
+    m = client.call(url, 'meta'); key = (url, m['fingerprint'])
+    with _lock:
+        if key in _remotes:
+            _remotes.move_to_end(key); eng = _remotes[key]
+            # Aging answers depend on the day; a new day starts with an empty call cache.
+            if eng['day'] != vencimientos.today():
+                with eng['lock']: eng['calls'].clear(); eng['day'] = vencimientos.today()
+            return eng
+    m['memory'] = {k: tuple(v) for k, v in m.get('memory', {}).items()}
+    eng = {**_new(_Sheets(url, m['sheets']), m), 'remote': url, 'calls': OrderedDict(), 'day': vencimientos.today()}
+    with _lock:
+        eng = _remotes.setdefault(key, eng)
+        while len(_remotes) > 2: _remotes.popitem(last=False)
+    return eng
+
+def query(fn):
+    sig = inspect.signature(fn)
+    @functools.wraps(fn)
+    def run(eng, *a, **kw):
+        if 'remote' not in eng: return fn(eng, *a, **kw)
+        args = sig.bind(eng, *a, **kw); args.apply_defaults(); args = dict(list(args.arguments.items())[1:])
+        key = (fn.__name__, json.dumps(args, sort_keys=True, default=str, ensure_ascii=False))
+        with eng['lock']:
+            if key in eng['calls']: eng['calls'].move_to_end(key); perf.count('servicio', True); return eng['calls'][key]
+        perf.count('servicio', False)
+        from core import client
+        with perf.span(f'servicio:{fn.__name__}'): v = client.call(eng['remote'], fn.__name__, **json.loads(key[1]))
+        with eng['lock']:
+            eng['calls'][key] = v
+            while len(eng['calls']) > REMOTE_CALLS: eng['calls'].popitem(last=False)
+        return v
+    return run
+
+# ─── QUERIES ───
+# Plain arguments in, plain values / DataFrames out, so the service can expose them unchanged.
+def meta(eng):
+    if 'remote' in eng: return eng['meta']
+    return {**eng['meta'], 'sheets': {k: len(df) for k, df in eng['sheets'].items()}, 'columns': {k: [str(c) for c in df.columns] for k, df in eng['sheets'].items()}}
+
+def _mask(eng, key, sel):
+    sel = tuple(tuple(x) for x in sel)
+    return filtering.mask(filter_index(eng, key), sel) if sel else None
+
+@query
+def sheet(eng, key, sel=(), q=''):
+    # Rows of a sheet under module filters ((column, label), ...) and/or an Explorador search.
+    if not q and sel:
+        sel = tuple(tuple(x) for x in sel)
+        return filtering.subset(filter_index(eng, key), eng['sheets'][key], sel)
+    m = _mask(eng, key, sel)
+    pos = search.query(search_index(eng, key), q) if q else None
+    if m is not None: pos = np.flatnonzero(m) if pos is None else pos[m[pos]]
+    return eng['sheets'][key] if pos is None else eng['sheets'][key].iloc[pos]
+
+@query
+def options(eng, key, col, sel=()):
+    sel = tuple(tuple(x) for x in sel)
+    return filtering.options(filter_index(eng, key), col, sel)
+
+@query
+def kpis(eng, key, cols, sel=()):
+    sel = tuple(tuple(x) for x in sel)
+    return filtering.kpis(filter_index(eng, key), eng['sheets'][key], sel, tuple(cols))
+
+@query
+def group(eng, key, by, measures=(), sel=()):
+    # Rollup-cube aggregate (see core.rollups.group) under the module filters; by may be ['M', date column] for months.
+    by = tuple(by) if isinstance(by, (list, tuple)) else by
+    return rollups.group(cube(eng), key, by, list(measures), _mask(eng, key, sel))
+
+@query
+def count(eng, key, sel=()):
+    return rollups.count(cube(eng), key, _mask(eng, key, sel))
+
+@query
+def total(eng, key, col, sel=()):
+    return rollups.total(cube(eng), key, col, _mask(eng, key, sel))
+
+@query
+def dims(eng):
+    # {sheet: [group]} the cube can aggregate by; month groups come as ['M', date column].
+    return {k: [g if isinstance(g, str) else list(g) for g in c['groups']] for k, c in cube(eng).items()}
+
+@query
+def counts(eng, key, by, sel=()):
+    by = tuple(by) if isinstance(by, (list, tuple)) else by
+    return rollups.counts(cube(eng), key, by, _mask(eng, key, sel))
+
+@query
+def monthly(eng, key, col, measures=(), sel=()):
+    return rollups.monthly(cube(eng), key, col, list(measures), _mask(eng, key, sel))
+
+@query
+def drill(eng, key, by, label, sel=()):
+    # Rows behind one row of group / counts, from the cube's per-group order rather than a scan of the sheet.
+    by = tuple(by) if isinstance(by, (list, tuple)) else by
+    return eng['sheets'][key].iloc[rollups.rows(cube(eng), key, by, label, _mask(eng, key, sel))]
+
+@query
+def sucursal_names(eng):
+    return sucursal_index(eng)['names']
+
+def sucursal_data(eng, suc, exact=False):
+    if 'remote' in eng: return {k: sucursal_sheet(eng, k, suc, exact) for k in sucursal_rows(eng, suc, exact)}
+    idx = sucursal_index(eng)
+    with perf.span('sucursal:lookup'): return sucursales.lookup(idx, eng['sheets'], suc, exact)
+
+@query
+def sucursal_rows(eng, suc, exact=False):
+    # {sheet: row positions} of a branch, for callers that already hold the sheets.
+    return sucursales.positions(sucursal_index(eng), suc, exact)
+
+@query
+def sucursal_sheet(eng, key, suc, exact=False):
+    # Rows of one sheet for a branch (what sucursal_data holds under that sheet).
+    p = sucursales.positions(sucursal_index(eng), suc, exact).get(key)
+    return eng['sheets'][key].iloc[p] if p is not None else eng['sheets'][key].iloc[:0]
+
+@query
+def reconcile(eng, name):
+    return joins.reconcile(join_index(eng), eng['sheets'], name)
+
+@query
+def join_rows(eng, link, key):
+    # {sheet: row positions} holding one pedido / CR, only the sheets where it appears.
+    return joins.lookup(join_index(eng), link, key)
+
+@query
+def join_sheet(eng, link, key, sheet):
+    p = joins.lookup(join_index(eng), link, key).get(sheet)
+    return eng['sheets'][sheet].iloc[p] if p is not None else eng['sheets'][sheet].iloc[:0]
+
+@query
+def vencimientos_proximos(eng, days=vencimientos.HORIZONS[0], ref=None, sel=()):
+    # Fianzas expiring in the next `days` days (negative: expired in the last -days), with days left, soonest first.
+    if 'fianzas' not in eng['sheets']: return pd.DataFrame()
+    idx = vencimiento_index(eng)
+    return vencimientos.alerts(eng['sheets']['fianzas'], vencimientos.upcoming(idx, days, ref, tuple((c, list(v)) for c, v in sel)), ref)
+
+@query
+def vencimientos_conteo(eng, ref=None, horizons=vencimientos.HORIZONS):
+    # [fianzas expiring within each horizon] of ref (today by default).
+    idx = vencimiento_index(eng); c = vencimientos.counts(idx, ref, horizons)
+    return [c[h] for h in horizons]
+
+@query
+def vencimientos_opciones(eng):
+    # {key column: labels} the alert queue can filter by.
+    return {c: list(at) for c, (_, at) in vencimiento_index(eng)['keys'].items()}
+
+@query
+def aging_buckets(eng, key, sel=()):
+    # Count and outstanding amount per aging bucket (core/analytics.py) of prefacturas / proyectos_2024 under the filters.
+    return analytics.buckets(aging(eng, key), _mask(eng, key, sel))
+
+@query
+def outstanding(eng, key, sel=()):
+    return analytics.outstanding(aging(eng, key), _mask(eng, key, sel))
+
+@query
+def stage_summary(eng, key, sel=()):
+    return analytics.stage_summary(aging(eng, key), _mask(eng, key, sel))
+
+@query
+def quality_report(eng):
+    return _derived(eng, 'calidad', lambda: quality.report(eng['meta']))
+
+@query
+def overview_pdf(eng, suc, exact=False):
+    sd = sucursal_data(eng, suc, exact)
+    return pdf.cached_pdf(suc, sd, (eng['fingerprint'], exact)) if sd else None
@@ -0,0 +1,84 @@
+import hashlib, os, tempfile
+import numpy as np
+import pandas as pd
+from core import perf
+
+try: import pyarrow as pa, pyarrow.parquet as pq
+except ImportError: pa = pq = None
+
+# ─── EXPORTS ───
+# Downloads are serialized only when asked for, CHUNK rows at a time straight into a file on disk, so the frame and its
+# serialized form never sit in memory side by side. Files are keyed by (data, sheet, filter/search state, format) and reused.
+EXPORT_DIR = os.environ.get("SCD_EXPORT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "exports"))
+EXPORT_FILES = 32
+CHUNK = 20_000
+
+FORMATS = {'csv': ('CSV', 'text/csv'), 'xlsx': ('Excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')}
+if pq is not None: FORMATS['parquet'] = ('Parquet', 'application/vnd.apache.parquet')
+
+def state_key(*parts):
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:24]
+
+def _chunks(df):
+    for i in range(0, len(df), CHUNK): yield df.iloc[i:i+CHUNK]
+
+def write_csv(df, path):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if not len(df): df.to_csv(f, index=False); return
+        for i, c in enumerate(_chunks(df)): c.to_csv(f, index=False, header=i == 0)
+
+def _cell(v):
+    if v is None or v is pd.NaT or v is pd.NA: return None
+    if isinstance(v, float) and np.isnan(v): return None
+    if isinstance(v, pd.Timestamp): return v.to_pydatetime()
+    return v.item() if isinstance(v, np.generic) else v
+
+def write_xlsx(df, path, sheet='Datos'):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True); ws = wb.create_sheet(sheet[:31])
+    ws.append([str(c) for c in df.columns])
+    for c in _chunks(df):
+        for row in c.itertuples(index=False, name=None): ws.append([_cell(v) for v in row])
+    wb.save(path)
+
+def write_parquet(df, path):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as w:
+        for c in _chunks(df): w.write_table(pa.Table.from_pandas(c, schema=schema, preserve_index=False))
+
+WRITERS = {'csv': write_csv, 'xlsx': write_xlsx, 'parquet': write_parquet}
+
+def prune(export_dir=EXPORT_DIR, keep=EXPORT_FILES, spare=()):
+    # Oldest files first, down to `keep`; spare holds paths that must survive (the file just written).
+    fs = sorted((e for e in os.scandir(export_dir) if e.is_file() and not e.name.startswith('.')), key=lambda e: e.stat().st_mtime)
+    for e in fs[:max(0, len(fs) - keep)]:
+        if e.path in spare: continue
+        try: os.unlink(e.path)
+        except OSError: pass
+
+def scratch(name, export_dir=EXPORT_DIR):
+    # Path in the export folder for a file built elsewhere (the batch ZIP), so it falls under the same EXPORT_FILES cap.
+    os.makedirs(export_dir, exist_ok=True)
+    return os.path.join(export_dir, name)
+
+def export(df, fmt, key, export_dir=EXPORT_DIR):
+    # Open binary handle on the export for this state, written (atomically) the first time it is requested. The caller
+    # closes it. Old files are pruned before the new one is written, and a handle stays readable even if another session
+    # prunes the file right after, so a download never points at a path that has just been deleted.
+    path = os.path.join(export_dir, f"{key}.{fmt}")
+    try: f = open(path, 'rb')
+    except FileNotFoundError: pass
+    else:
+        try: os.utime(path)
+        except OSError: pass
+        perf.count('exportes', True); return f
+    perf.count('exportes', False)
+    os.makedirs(export_dir, exist_ok=True)
+    prune(export_dir, EXPORT_FILES - 1)
+    fd, tmp = tempfile.mkstemp(prefix='.tmp-', suffix=f".{fmt}", dir=export_dir); os.close(fd)
+    try:
+        with perf.span(f'export:{fmt}'): WRITERS[fmt](df, tmp)
+        f = open(tmp, 'rb'); os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp); raise
+    return f
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from core import perf, cache
+
+# ─── MODULE FILTER ENGINE ───
+# One index per sheet. Each filter column becomes an int32 code array into its sorted option labels (str of the value, as
+# the selectboxes show it), built the first time any selection uses the column and shared by every combination after.
+# Selections are masks over those codes; the base frame is never copied.
+# Results are memoized per selection tuple ((column, label), ...) in bounded LRUs.
+MASK_CACHE = 64
+FRAME_CACHE = 8
+
+def _code(col):
+    codes, uniq = pd.factorize(col)
+    if len(uniq) == 0: return np.full(len(col), -1, dtype=np.int32), []
+    # Distinct raw values can share a label (1 and '1'); np.unique collapses and sorts them like sorted(str(x)).
+    opts, inv = np.unique(np.array([str(u) for u in uniq], dtype=object), return_inverse=True)
+    return np.where(codes >= 0, inv[np.maximum(codes, 0)], -1).astype(np.int32), list(opts)
+
+def build_index(df, cols=()):
+    # cols: filter columns to code up front; any other column of df is coded on first use.
+    idx = {'filters': {}, 'column': lambda c: df[c], 'n': len(df), 'masks': OrderedDict(), 'frames': OrderedDict(), 'kpis': OrderedDict(), 'lock': threading.Lock()}
+    for c in cols:
+        if c in df.columns: idx['filters'][c] = _code(df[c])
+    return idx
+
+def _filter(idx, c):
+    with idx['lock']:
+        if c in idx['filters']: return idx['filters'][c]
+    v = _code(idx['column'](c))
+    with idx['lock']: w = idx['filters'].setdefault(c, v)
+    if w is v and idx.get('on_grow'): idx['on_grow'](cache.nbytes(v))
+    return w
+
+def _memo(idx, slot, key, size, fn):
+    with idx['lock']:
+        c = idx[slot]
+        if key in c: c.move_to_end(key); perf.count(f'filtros:{slot}', True); return c[key]
+    perf.count(f'filtros:{slot}', False)
+    v = fn(); out = []
+    with idx['lock']:
+        c[key] = v
+        while len(c) > size: out.append(c.popitem(last=False)[1])
+    if idx.get('on_grow'): idx['on_grow'](cache.nbytes(v) - sum(cache.nbytes(o) for o in out))
+    return v
+
+def mask(idx, sel):
+    # sel: ((column, label), ...); None means no filter at all.
+    if not sel: return None
+    def build():
+        m = mask(idx, sel[:-1])
+        m = np.ones(idx['n'], dtype=bool) if m is None else m.copy()
+        c, lb = sel[-1]
+        codes, opts = _filter(idx, c)
+        i = np.searchsorted(opts, lb) if opts else 0
+        m &= (codes == i) if i < len(opts) and opts[i] == lb else False
+        return m
+    return _memo(idx, 'masks', sel, MASK_CACHE, build)
+
+def options(idx, col, sel=()):
+    # Labels still present once the earlier selections are applied, so the selectboxes cascade as before.
+    codes, opts = _filter(idx, col)
+    m = mask(idx, sel)
+    present = np.unique(codes if m is None else codes[m])
+    return [opts[i] for i in present if i >= 0]
+
+def subset(idx, df, sel):
+    m = mask(idx, sel)
+    if m is None: return df
+    return _memo(idx, 'frames', sel, FRAME_CACHE, lambda: df.iloc[np.flatnonzero(m)])
+
+def kpis(idx, df, sel, cols):
+    # {column: (sum, non-null count)} over the selected rows.
+    def build():
+        m = mask(idx, sel); out = {}
+        for c in cols:
+            if c not in df.columns: out[c] = (0, 0); continue
+            v = pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            if m is not None: v = v[m]
+            ok = ~np.isnan(v)
+            out[c] = (float(v[ok].sum()), int(ok.sum()))
+        return out
+    return _memo(idx, 'kpis', (sel, tuple(cols)), MASK_CACHE, build)
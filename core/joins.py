@@ -0,0 +1,76 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# ─── CROSS-SHEET JOIN INDEX ───
+# Per link, every sheet's key column is coded into one shared key vocabulary, once per data load.
+# key -> rows of each sheet is a dict lookup plus a slice, and reconciliation is np.bincount over the codes: no merges.
+LINKS = {
+    'pedido': [('ordenes','ID. PEDIDO COMPRADOR'), ('facturacion_2025','ORDEN DE COMPRA'), ('facturas_adquira','PEDIDO')],
+    'cr': [('contratos','CR'), ('prefacturas','CR'), ('fianzas','CR'), ('proyectos_2024','CR')],
+}
+# name: (link, (sheet, amount), [(sheet, amount), ...]) — the left side is compared with the sum of the right sides.
+# Facturación 2025 and the Adquira export list the same invoices, so each is reconciled against the orders on its own.
+RECONCILE = {
+    'facturacion': ('pedido', ('ordenes','IMPORTE TOTAL'), [('facturacion_2025','Total (MXN)')]),
+    'adquira': ('pedido', ('ordenes','IMPORTE TOTAL'), [('facturas_adquira','TOTAL FACTURA')]),
+    'cr': ('cr', ('contratos','Importe Total'), [('prefacturas','Total')]),
+}
+# Pesos of difference still counted as reconciled (rounding between the order and its invoices).
+TOLERANCE = 1.0
+
+def norm_key(v):
+    # 4500123, 4500123.0 and ' 4500123 ' are the same key.
+    if v is None or (isinstance(v, float) and np.isnan(v)): return None
+    if isinstance(v, (float, np.floating)) and float(v).is_integer(): v = int(v)
+    s = str(v).strip().upper()
+    return s or None
+
+def build_index(S, links=LINKS):
+    idx = {}
+    for name, members in links.items():
+        at, codes, spans = {}, {}, {}
+        for k, c in members:
+            if k not in S or c not in S[k].columns: continue
+            fc, uniq = pd.factorize(S[k][c])
+            lut = np.array([-1 if (u := norm_key(x)) is None else at.setdefault(u, len(at)) for x in uniq] + [-1], dtype=np.int32)
+            codes[k] = lut[fc]
+        for k, c in codes.items():
+            order = np.argsort(c, kind='stable')
+            spans[k] = (order, np.searchsorted(c[order], np.arange(len(at) + 1)))
+        idx[name] = {'keys': np.array(list(at), dtype=object), 'at': at, 'codes': codes, 'spans': spans, 'recon': {}, 'lock': threading.Lock()}
+    return idx
+
+def lookup(idx, link, key):
+    # {sheet: row positions} for one key, only the sheets where it appears.
+    j = idx[link]; i = j['at'].get(norm_key(key))
+    if i is None: return {}
+    out = {}
+    for k, (order, bounds) in j['spans'].items():
+        if bounds[i+1] > bounds[i]: out[k] = order[bounds[i]:bounds[i+1]]
+    return out
+
+def _side(j, S, k, col):
+    n = len(j['keys'])
+    if k not in j['codes']: return np.zeros(n, dtype=np.int64), np.zeros(n)
+    c = j['codes'][k]; ok = c >= 0
+    v = pd.to_numeric(S[k][col], errors='coerce').to_numpy(dtype=float, na_value=np.nan) if col in S[k].columns else np.zeros(len(c))
+    return np.bincount(c[ok], minlength=n), np.bincount(c[ok], weights=np.nan_to_num(v[ok]), minlength=n)
+
+def reconcile(idx, S, name, spec=None, tol=TOLERANCE):
+    # One row per key: counts and amounts on each side, right - left, and status
+    # 'left' (only on the left), 'right' (only on the right), 'diff' (|right - left| > tol) or 'ok'.
+    link, left, rights = spec or RECONCILE[name]
+    j = idx[link]; mk = (left, tuple(rights), tol)
+    with j['lock']:
+        if mk in j['recon']: return j['recon'][mk]
+    ln, lv = _side(j, S, *left)
+    rn, rv = np.zeros(len(j['keys']), dtype=np.int64), np.zeros(len(j['keys']))
+    for k, col in rights:
+        a, b = _side(j, S, k, col); rn += a; rv += b
+    keep = (ln > 0) | (rn > 0)
+    diff = rv - lv
+    status = np.select([rn == 0, ln == 0, np.abs(diff) > tol], ['left', 'right', 'diff'], 'ok')
+    d = pd.DataFrame({'key': j['keys'], 'n_left': ln, 'left': lv, 'n_right': rn, 'right': rv, 'diff': diff, 'status': status})[keep].reset_index(drop=True)
+    with j['lock']: j['recon'][mk] = d
+    return d
@@ -0,0 +1,253 @@
+import hashlib, io, json, os, re, tempfile, time, zipfile
+import multiprocessing as mp
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from core import perf
+
+try: import pyarrow as pa
+except ImportError: pa = None
+
+# ─── SHEET CONFIG ───
+# key: (sheet name, header row, date columns, numeric columns, column whose empty rows are dropped)
+CFG = {
+    'ordenes': ('REGISTRO ORDEN DE COMPRA', 1, ['FECHA','FECHA DE PUBLICACIÓN'], ['IMPORTE TOTAL','IMPORTE SIN IVA','IMPORTE DE LA ORDEN [TOTAL IMPORTE CONTRATO] -SIN IVA','IMPORTE CORRESPONDIENTE A CANTIDAD EXPEDIDA','IMPORTE DE CIERRE','BALANCE'], 'ID. PEDIDO COMPRADOR'),
+    'contratos': ('CONTRATOS || ONE TEAM', 1, ['Fecha de asignación proyecto','Fecha inicio vigencia anexo','Fecha de Recepción','Fecha Firma Interna','Fecha de detonación','Fecha de cierre operación (Acta final)','Fecha envío cierre'], ['Importe Acción','Importe Certificación','Importe Total','Importe Cierre Administrativo','Total Pagado','Por pagar','Por devolver'], 'ID Folio Contrato'),
+    'obra_menor': ('OBRA MENOR', 1, ['FECHA_DE_ASIGNACIÓN','FECHA INICIO','FECHA FIN','FECHA FIN REAL','FECHA CORREO DETONACIÓN','FECHA CIERRE ADMINISTRATIVO'], ['PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL','Importe UDA','Total Pagado','VARIACIÓN_PRESUPUESTAL'], 'ID_PROYECTO'),
+    'facturacion_2025': ('Facturación 2025', 0, ['Fecha'], ['Subtotal (MXN)','Impuestos (MXN)','Total (MXN)'], 'NO.'),
+    'prefacturas': ('CONTROL DE PREFACTURAS', 1, ['Fecha solicitud','Fecha Emisión','Fecha de aceptación','Fecha de factura'], ['Monto (sin IVA)','IVA','Total'], 'Folio Interno'),
+    'fianzas': ('CONTROL DE FIANZAS', 1, ['Fecha Solicitud Fianza','Fecha Emisión','Vencimiento'], ['Monto de contrato','Monto + IVA','Importe a afianzar || Cumplimiento','Importe a afianzar || Buena calidad','Monto Garantizado Fianza'], 'CR'),
+    'facturas_adquira': ('Copia de Facturas Adquira', 0, [], ['BASE IMPONIBLE','TOTAL IMPUESTOS','TOTAL FACTURA'], 'NÚMERO'),
+    'proyectos_2024': ('Proyectos 2024', 1, [], ['Importe de cierre','Total Pagado','Por pagar','Por devolver','Importe CFE'], 'Llave comité /Clave UDA'),
+}
+
+# Bump whenever parse_sheet changes what ends up in a frame, so old snapshots stop matching.
+SNAPSHOT_VERSION = 4
+# Worker processes for sheet parsing; 0 means one per sheet up to the CPU count, 1 parses in-process.
+WORKERS = int(os.environ.get("SCD_WORKERS", "0"))
+SNAPSHOT_DIR = os.environ.get("SCD_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "snapshots"))
+SNAPSHOT_KEEP = int(os.environ.get("SCD_SNAPSHOT_KEEP", "256"))
+
+# ─── FINGERPRINTS ───
+def read_source(fp):
+    if isinstance(fp, (bytes, bytearray)): return bytes(fp)
+    if isinstance(fp, (str, os.PathLike)):
+        with open(fp, 'rb') as f: return f.read()
+    if hasattr(fp, 'getvalue'): return fp.getvalue()
+    return fp.read()
+
+def cfg_hash(cfg=CFG):
+    return hashlib.sha256(json.dumps([SNAPSHOT_VERSION, cfg], ensure_ascii=False, sort_keys=True).encode()).hexdigest()[:16]
+
+def fingerprint(data, cfg=CFG):
+    return hashlib.sha256(data).hexdigest()[:24] + '-' + cfg_hash(cfg)
+
+_NS = {'m': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main', 'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+       'rel': 'http://schemas.openxmlformats.org/package/2006/relationships'}
+_SST_REF = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+_SI = re.compile(rb'<si>(.*?)</si>', re.S)
+_STYLE_REF = re.compile(rb'<c\b[^>]*\bs="(\d+)"')
+
+def _cell_formats(styles):
+    # Number format per cellXfs index: the only part of styles.xml that changes parsed values (dates vs numbers).
+    if not styles: return []
+    st = ET.fromstring(styles)
+    codes = {f.get('numFmtId'): f.get('formatCode') for f in st.iterfind('m:numFmts/m:numFmt', _NS)}
+    return [codes.get(x.get('numFmtId'), x.get('numFmtId')) for x in st.iterfind('m:cellXfs/m:xf', _NS)]
+
+def xlsx_parts(data):
+    # Sheet name -> raw worksheet XML, plus the shared strings, cell number formats and date system every sheet depends on.
+    z = zipfile.ZipFile(io.BytesIO(data))
+    wb = ET.fromstring(z.read('xl/workbook.xml'))
+    rels = {r.get('Id'): r.get('Target') for r in ET.fromstring(z.read('xl/_rels/workbook.xml.rels')).findall('rel:Relationship', _NS)}
+    names = z.namelist()
+    def part(t): t = t.lstrip('/'); return t if t.startswith('xl/') else 'xl/' + t
+    parts = {sh.get('name'): z.read(part(rels[sh.get(f"{{{_NS['r']}}}id")])) for sh in wb.iterfind('m:sheets/m:sheet', _NS)}
+    sst = _SI.findall(z.read('xl/sharedStrings.xml')) if 'xl/sharedStrings.xml' in names else []
+    fmts = _cell_formats(z.read('xl/styles.xml') if 'xl/styles.xml' in names else b'')
+    pr = wb.find('m:workbookPr', _NS)
+    return parts, sst, fmts, (pr is not None and pr.get('date1904') in ('1', 'true'))
+
+def sheet_fingerprints(data, cfg=CFG):
+    # One hash per sheet over its worksheet XML plus the shared strings and number formats it references,
+    # so editing one tab leaves the other tabs' keys intact.
+    base = [SNAPSHOT_VERSION]
+    try: parts, sst, fmts, d1904 = xlsx_parts(data)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        # .xls and other non-OOXML files: fall back to the whole-file hash.
+        parts, base = None, base + [hashlib.sha256(data).hexdigest()]
+    else: base.append(d1904)
+    fps = {}
+    for k, spec in cfg.items():
+        h = hashlib.sha256(json.dumps(base + [k, spec], ensure_ascii=False).encode())
+        if parts is not None:
+            xml = parts.get(spec[0])
+            if xml is None: fps[k] = None; continue
+            h.update(xml)
+            for i in _SST_REF.findall(xml):
+                i = int(i); h.update(sst[i] if i < len(sst) else b''); h.update(b'\0')
+            used = sorted({int(i) for i in _STYLE_REF.findall(xml)})
+            h.update(json.dumps([(i, fmts[i] if i < len(fmts) else None) for i in used]).encode())
+        fps[k] = h.hexdigest()[:32]
+    return fps
+
+# ─── PARSING ───
+def arrow_safe(df):
+    # Excel columns often mix numbers and text; Arrow needs one type per column, so mixed ones become text.
+    for c in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[c], skipna=True).startswith('mixed'):
+            df[c] = df[c].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+# Repeated text (estatus, afianzadora, sucursal…) becomes categorical and other int64 columns (CR, días, folios) take the
+# smallest integer type that holds them. Money columns and floats stay 64-bit: float32 rounds cents and int8 sums overflow.
+CATEGORY_RATIO = 0.5
+
+def compact(df, keep=()):
+    before = int(df.memory_usage(deep=True).sum())
+    for c in df.columns:
+        s = df[c]
+        if s.dtype == object:
+            n = s.count()
+            if n and pd.api.types.infer_dtype(s, skipna=True) == 'string' and s.nunique() <= CATEGORY_RATIO * n: df[c] = s.astype('category')
+        elif c not in keep and pd.api.types.is_integer_dtype(s.dtype) and not pd.api.types.is_extension_array_dtype(s.dtype):
+            df[c] = pd.to_numeric(s, downcast='integer')
+    # (bytes before, bytes after); kept in attrs so it travels with the snapshot.
+    df.attrs['memory'] = (before, int(df.memory_usage(deep=True).sum()))
+    return df
+
+# Key columns that repeat by design (one CR holds several fianzas), so they are not checked for duplicates.
+REPEATED_KEYS = {'CR'}
+DUP_SAMPLE = 20
+
+def parse_sheet(xls, spec):
+    # Validation rides along with the conversions: counts are taken from the columns already being converted, and the
+    # result goes to attrs['quality'] (JSON-safe, so it travels with the snapshot like attrs['memory']).
+    sn, hdr, dates, nums, drop = spec
+    df = pd.read_excel(xls, sn, header=hdr)
+    df.columns = [str(c).strip() for c in df.columns]
+    q = {'rows': len(df), 'missing': [c for c in dict.fromkeys([*dates, *nums, drop]) if c not in df.columns], 'coerced': {}}
+    for cols, conv in ((dates, lambda s: pd.to_datetime(s, errors='coerce')), (nums, lambda s: pd.to_numeric(s, errors='coerce'))):
+        for c in cols:
+            if c not in df.columns: continue
+            n = int(df[c].notna().sum()); df[c] = conv(df[c]); n -= int(df[c].notna().sum())
+            if n: q['coerced'][c] = n
+    df = df.dropna(subset=[drop], how='all')
+    q['dropped'] = q['rows'] - len(df); q['duplicates'], q['dup_sample'] = 0, []
+    if drop in df.columns and drop not in REPEATED_KEYS:
+        dup = df[drop].duplicated(keep=False).to_numpy()
+        q['duplicates'] = int(dup.sum()); q['dup_sample'] = [str(v) for v in pd.unique(df[drop].to_numpy()[dup])[:DUP_SAMPLE]]
+    df = compact(arrow_safe(df), nums)
+    df.attrs['quality'] = q
+    return df
+
+def try_parse(xls, spec):
+    t = time.perf_counter()
+    try: df = parse_sheet(xls, spec)
+    except Exception as e: return None, f"{type(e).__name__}: {e}"
+    # Parse time travels back from the worker with the frame; load_data takes it out before the snapshot is written.
+    df.attrs['parse_s'] = time.perf_counter() - t
+    return df, None
+
+_SRC = None
+def _init_worker(data):
+    global _SRC; _SRC = data
+
+def _parse_in_worker(spec):
+    return try_parse(io.BytesIO(_SRC), spec)
+
+def mp_context():
+    # forkserver keeps workers from inheriting Streamlit's threads; spawn where it is not available.
+    if 'forkserver' not in mp.get_all_start_methods(): return mp.get_context('spawn')
+    ctx = mp.get_context('forkserver'); ctx.set_forkserver_preload([__name__])
+    return ctx
+
+def parse_workbook(data, cfg=CFG, workers=WORKERS):
+    # Sheets are independent openpyxl parses, so each one goes to its own process.
+    n = min(len(cfg), workers or os.cpu_count() or 1)
+    res = None
+    if n > 1:
+        try:
+            with ProcessPoolExecutor(n, mp_context=mp_context(), initializer=_init_worker, initargs=(data,)) as ex:
+                futs = {k: ex.submit(_parse_in_worker, spec) for k, spec in cfg.items()}
+                res = {k: f.result() for k, f in futs.items()}
+        except (BrokenProcessPool, OSError): res = None
+    if res is None:
+        xls = pd.ExcelFile(io.BytesIO(data))
+        res = {k: try_parse(xls, spec) for k, spec in cfg.items()}
+    sheets = {k: df for k, (df, err) in res.items() if err is None}
+    errors = {k: err for k, (df, err) in res.items() if err is not None}
+    return sheets, errors
+
+# ─── SNAPSHOTS ───
+# One Arrow IPC file per sheet fingerprint; hits are memory-mapped, openpyxl is never touched. A hit refreshes the file's
+# mtime, and after each write the oldest files beyond SNAPSHOT_KEEP are deleted (never those of the load in progress).
+def read_snapshot(path):
+    with pa.memory_map(path) as src:
+        return pa.ipc.open_file(src).read_all().to_pandas()
+
+def write_snapshot(path, df):
+    t = pa.Table.from_pandas(df)
+    fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path)); os.close(fd)
+    try:
+        with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, t.schema) as w: w.write_table(t)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp); raise
+
+def load_snapshot(sfp, snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, f"{sfp}.arrow")
+    try: df = read_snapshot(path)
+    except (OSError, pa.ArrowException): return None
+    try: os.utime(path)
+    except OSError: pass
+    return df
+
+def save_snapshot(sfp, df, snapshot_dir=SNAPSHOT_DIR):
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        write_snapshot(os.path.join(snapshot_dir, f"{sfp}.arrow"), df)
+    except (OSError, pa.ArrowException): return False
+    return True
+
+def prune_snapshots(snapshot_dir=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP, spare=()):
+    # Least recently used first; spare holds the fingerprints still being served.
+    try: fs = sorted((e for e in os.scandir(snapshot_dir) if e.is_file() and e.name.endswith('.arrow')), key=lambda e: e.stat().st_mtime)
+    except OSError: return
+    for e in fs[:max(0, len(fs) - keep)]:
+        if e.name[:-len('.arrow')] in spare: continue
+        try: os.unlink(e.path)
+        except OSError: pass
+
+# ─── LOAD ───
+# recall(sheet fingerprint) -> frame or None lets the caller hand back sheets it still holds (core/engine.py looks in its
+# cache), so a re-upload reuses the tabs it did not touch without the loader keeping frames of its own.
+def load_data(fp, cfg=CFG, snapshot_dir=SNAPSHOT_DIR, recall=None):
+    with perf.span('load:read'): data = read_source(fp)
+    with perf.span('load:fingerprint'): fps = sheet_fingerprints(data, cfg)
+    meta = {'fingerprint': hashlib.sha256(json.dumps(fps, sort_keys=True).encode()).hexdigest()[:24], 'sheet_fingerprints': fps, 'source': {}, 'errors': {}}
+    snaps = pa is not None and snapshot_dir
+    sheets, todo = {}, {}
+    for k, sfp in fps.items():
+        if sfp is None: meta['errors'][k] = f"ValueError: Worksheet named '{cfg[k][0]}' not found"; continue
+        df = recall(sfp) if recall else None; perf.count('hojas:memoria', df is not None)
+        if df is not None: sheets[k] = df; meta['source'][k] = 'memoria'; continue
+        with perf.span(f'load:snapshot:{k}'): df = load_snapshot(sfp, snapshot_dir) if snaps else None
+        perf.count('hojas:snapshot', df is not None)
+        if df is not None: sheets[k] = df; meta['source'][k] = 'snapshot'; continue
+        todo[k] = cfg[k]
+    if todo:
+        with perf.span('load:parse'): parsed, errors = parse_workbook(data, todo)
+        meta['errors'].update(errors)
+        for k, df in parsed.items():
+            perf.record(f'load:parse:{k}', df.attrs.pop('parse_s', 0.0))
+            # Serve the frame read back from the snapshot so a cold parse and a later hit see identical dtypes.
+            if snaps and save_snapshot(fps[k], df, snapshot_dir):
+                back = load_snapshot(fps[k], snapshot_dir)
+                if back is not None: df = back
+            sheets[k] = df; meta['source'][k] = 'excel'
+        if snaps: prune_snapshots(snapshot_dir, spare=set(fps.values()))
+    meta['memory'] = {k: tuple(sheets[k].attrs.get('memory', (None, None))) for k in cfg if k in sheets}
+    meta['quality'] = {k: sheets[k].attrs.get('quality') for k in cfg if k in sheets}
+    return {k: sheets[k] for k in cfg if k in sheets}, meta
@@ -0,0 +1,111 @@
+import io, threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+import pandas as pd
+from core import perf
+
+# Finished PDFs kept per (sucursal, data fingerprint, day).
+PDF_CACHE_SIZE = 32
+
+# ─── STYLES ───
+# Built on first use and shared by every report in the process; ReportLab is only imported when a PDF is requested.
+@lru_cache(maxsize=None)
+def _kit():
+    from reportlab.lib.colors import HexColor, white
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    bb = HexColor('#004481'); bm = HexColor('#0066B3'); bg = HexColor('#F7F9FC'); bd = HexColor('#E0E8F0'); tx = HexColor('#5C7D9A')
+    sty = getSampleStyleSheet()
+    sty.add(ParagraphStyle('T', parent=sty['Title'], fontSize=20, textColor=bb, fontName='Helvetica-Bold', spaceAfter=4))
+    sty.add(ParagraphStyle('Sub', parent=sty['Normal'], fontSize=10, textColor=tx, spaceAfter=16))
+    sty.add(ParagraphStyle('SH', parent=sty['Heading2'], fontSize=13, textColor=bb, fontName='Helvetica-Bold', spaceBefore=20, spaceAfter=8))
+    sty.add(ParagraphStyle('CT', parent=sty['Normal'], fontSize=7.5, leading=10))
+    sty.add(ParagraphStyle('CB', parent=sty['Normal'], fontSize=7.5, leading=10, fontName='Helvetica-Bold'))
+    sty.add(ParagraphStyle('FT', parent=sty['Normal'], fontSize=7, textColor=tx))
+    kpi = TableStyle([('BACKGROUND',(0,0),(-1,0),bb),('TEXTCOLOR',(0,0),(-1,0),white),('BACKGROUND',(0,1),(-1,-1),bg),
+        ('GRID',(0,0),(-1,-1),0.5,bd),('VALIGN',(0,0),(-1,-1),'MIDDLE'),('ALIGN',(0,0),(-1,-1),'CENTER'),
+        ('TOPPADDING',(0,0),(-1,-1),6),('BOTTOMPADDING',(0,0),(-1,-1),6)])
+    tbl = TableStyle([('BACKGROUND',(0,0),(-1,0),bm),('TEXTCOLOR',(0,0),(-1,0),white),('ROWBACKGROUNDS',(0,1),(-1,-1),[white,bg]),
+        ('GRID',(0,0),(-1,-1),0.4,bd),('VALIGN',(0,0),(-1,-1),'TOP'),('TOPPADDING',(0,0),(-1,-1),4),('BOTTOMPADDING',(0,0),(-1,-1),4),
+        ('LEFTPADDING',(0,0),(-1,-1),4),('RIGHTPADDING',(0,0),(-1,-1),4)])
+    return dict(sty=sty, kpi=kpi, tbl=tbl, bb=bb, bd=bd)
+
+# ─── REPORT ───
+def generate_pdf(suc, sd, day=None):
+    # The report is stamped with the day only, so a cached copy stays exact until midnight.
+    day = day or datetime.now().strftime('%d/%m/%Y')
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, HRFlowable
+    k = _kit(); sty = k['sty']
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=letter, leftMargin=0.7*inch, rightMargin=0.7*inch, topMargin=0.7*inch, bottomMargin=0.7*inch)
+    story = []
+    story.append(Paragraph("SERVMAC — Sistema Integral de Control Documental", sty['T']))
+    story.append(Paragraph(f"Reporte: <b>{suc}</b> | {day} | Conservación BBVA Noreste", sty['Sub']))
+    story.append(HRFlowable(width="100%", thickness=2, color=k['bb'], spaceAfter=12))
+
+    tots = [('ÓRDENES', len(sd.get('ordenes',[])), sd.get('ordenes',pd.DataFrame()).get('IMPORTE TOTAL',pd.Series(dtype=float)).sum()),
+            ('CONTRATOS', len(sd.get('contratos',[])), sd.get('contratos',pd.DataFrame()).get('Importe Total',pd.Series(dtype=float)).sum()),
+            ('OBRA MENOR', len(sd.get('obra_menor',[])), sd.get('obra_menor',pd.DataFrame()).get('IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL',pd.Series(dtype=float)).sum()),
+            ('PREFACTURAS', len(sd.get('prefacturas',[])), sd.get('prefacturas',pd.DataFrame()).get('Total',pd.Series(dtype=float)).sum())]
+    kd = [[Paragraph(f'<b>{t[0]}</b>', sty['CB']) for t in tots],
+          [Paragraph(f'{t[1]} reg.', sty['CT']) for t in tots],
+          [Paragraph(f'<b>${t[2]:,.2f}</b>', sty['CB']) for t in tots]]
+    kt = Table(kd, colWidths=[doc.width/4]*4)
+    kt.setStyle(k['kpi'])
+    story.append(kt); story.append(Spacer(1,16))
+
+    def add_tbl(title, df, cols):
+        if df is None or len(df)==0: return
+        cs = [c for c in cols if c in df.columns]
+        if not cs: return
+        story.append(Paragraph(title, sty['SH']))
+        hdr = [Paragraph(f'<b>{c[:22]}</b>', sty['CB']) for c in cs]
+        rows = [hdr]
+        for _, r in df.head(30).iterrows():
+            row = []
+            for c in cs:
+                v = r[c]
+                if pd.isna(v): v = "—"
+                elif isinstance(v, float): v = f"${v:,.2f}" if abs(v) > 100 else f"{v:,.2f}"
+                elif isinstance(v, pd.Timestamp): v = v.strftime('%d/%m/%Y')
+                else: v = str(v)[:35]
+                row.append(Paragraph(v, sty['CT']))
+            rows.append(row)
+        cw = [doc.width/len(cs)]*len(cs)
+        t = Table(rows, colWidths=cw, repeatRows=1)
+        t.setStyle(k['tbl'])
+        story.append(t)
+        if len(df)>30: story.append(Paragraph(f"<i>30 de {len(df)} registros</i>", sty['FT']))
+        story.append(Spacer(1,10))
+
+    add_tbl("Órdenes de Compra", sd.get('ordenes'), ['FECHA','IMPORTE TOTAL','ESTADO','TIPO DE PROYECTO','IMPORTE DE CIERRE','ESTATUS'])
+    add_tbl("Contratos One Team", sd.get('contratos'), ['ID Folio Contrato','Importe Total','Estatus Operativo','Estatus Cierre','Total Pagado','Por pagar'])
+    add_tbl("Obra Menor", sd.get('obra_menor'), ['ID_PROYECTO','PROYECTO','ASIGNADO_A','ESTATUS_OPERACIÓN REAL','PRESUPUESTO_INICIAL','IMPORTE_DE_CIERRE_ADMINISTRATIVO_PARCIAL','Total Pagado'])
+    add_tbl("Prefacturas", sd.get('prefacturas'), ['Folio Interno','Fecha solicitud','Monto (sin IVA)','Total','Estatus'])
+    add_tbl("Fianzas", sd.get('fianzas'), ['CR','Afianzadora','Monto de contrato','Estatus Expedición','Vencimiento','Estatus Vigencia'])
+    add_tbl("Proyectos 2024", sd.get('proyectos_2024'), ['CR','Proyecto','Importe de cierre','Estatus','Total Pagado','Por pagar'])
+    add_tbl("Facturas Adquira", sd.get('facturas_adquira'), ['NÚMERO','FECHA FACTURA','CATEGORIA','BASE IMPONIBLE','TOTAL FACTURA','ESTADO'])
+
+    story.append(Spacer(1,20))
+    story.append(HRFlowable(width="100%", thickness=1, color=k['bd'], spaceAfter=8))
+    story.append(Paragraph(f"SERVMAC — Conservación BBVA Noreste | {day} | Sistema Integral 2025", sty['FT']))
+    doc.build(story); buf.seek(0)
+    return buf
+
+# ─── CACHE ───
+_cache, _lock = OrderedDict(), threading.Lock()
+
+def cached_pdf(suc, sd, fingerprint):
+    # fingerprint identifies the data sd was cut from; same branch + same data + same day -> same bytes, without rebuilding the story.
+    day = datetime.now().strftime('%d/%m/%Y'); key = (suc, fingerprint, day)
+    with _lock:
+        if key in _cache: _cache.move_to_end(key); perf.count('pdf', True); return _cache[key]
+    perf.count('pdf', False)
+    with perf.span('pdf:generate'): pdf = generate_pdf(suc, sd, day).getvalue()
+    with _lock:
+        _cache[key] = pdf
+        while len(_cache) > PDF_CACHE_SIZE: _cache.popitem(last=False)
+    return pdf
@@ -0,0 +1,66 @@
+import contextlib, json, os, threading, time
+from collections import Counter
+
+# ─── INSTRUMENTATION ───
+# Timing spans and cache hit/miss counters, on only with SCD_PERF=1. Disabled, span() hands back one shared null
+# context and count() returns at once, so the calls can stay in the hot paths.
+# Spans of one Streamlit rerun (begin() .. end()) go to the admin panel and, one JSON line per rerun, to SCD_PERF_LOG.
+ENABLED = os.environ.get("SCD_PERF", "") not in ("", "0")
+LOG = os.environ.get("SCD_PERF_LOG", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "perf.jsonl"))
+RUNS = 20
+
+_NULL = contextlib.nullcontext()
+_local = threading.local()
+_lock = threading.Lock()
+_stats, _counts, _runs = {}, Counter(), []
+
+def record(name, secs):
+    if not ENABLED: return
+    with _lock:
+        s = _stats.setdefault(name, [0, 0.0, 0.0]); s[0] += 1; s[1] += secs; s[2] = max(s[2], secs)
+    run = getattr(_local, 'run', None)
+    if run is not None: run['spans'].append((name, secs))
+
+@contextlib.contextmanager
+def _span(name):
+    t = time.perf_counter()
+    try: yield
+    finally: record(name, time.perf_counter() - t)
+
+def span(name):
+    return _span(name) if ENABLED else _NULL
+
+def count(name, hit):
+    if not ENABLED: return
+    with _lock: _counts[(name, 'hit' if hit else 'miss')] += 1
+
+def begin(label):
+    if not ENABLED: return
+    end()
+    _local.run = {'label': label, 'ts': time.time(), 't0': time.perf_counter(), 'spans': []}
+
+def end():
+    # Closes this thread's run: kept for the panel and appended to the log.
+    run = getattr(_local, 'run', None)
+    if run is None: return None
+    _local.run = None
+    run = {'ts': run['ts'], 'run': run['label'], 'total': time.perf_counter() - run['t0'], 'spans': run['spans']}
+    with _lock:
+        _runs.append(run); del _runs[:-RUNS]
+    if LOG:
+        try:
+            os.makedirs(os.path.dirname(LOG), exist_ok=True)
+            line = json.dumps({**run, 'spans': [[n, round(s * 1000, 3)] for n, s in run['spans']], 'total': round(run['total'] * 1000, 3)}, ensure_ascii=False)
+            with _lock, open(LOG, 'a', encoding='utf-8') as f: f.write(line + '\n')
+        except OSError: pass
+    return run
+
+def report():
+    # {'runs': last runs, 'stats': name -> (calls, total s, max s), 'counts': name -> (hits, misses)}
+    with _lock:
+        counts = {}
+        for (n, kind), v in _counts.items(): counts.setdefault(n, [0, 0])[kind == 'miss'] += v
+        return {'runs': list(_runs), 'stats': {n: tuple(s) for n, s in _stats.items()}, 'counts': {n: tuple(v) for n, v in counts.items()}}
+
+def reset():
+    with _lock: _stats.clear(); _counts.clear(); _runs.clear()
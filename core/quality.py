@@ -0,0 +1,32 @@
+import pandas as pd
+from core import loader
+
+# ─── DATA QUALITY ───
+# Report over what core/loader.py recorded while parsing (meta['errors'] and meta['quality']); it never reads the sheets,
+# so building it costs nothing beyond the load, and the engine keeps one per data fingerprint.
+COLS = ['Hoja', 'Columna', 'Problema', 'Registros', 'Detalle']
+
+def report(meta, cfg=loader.CFG):
+    # One row per problem found: sheet not loaded, expected column missing, values that did not convert, duplicate keys,
+    # rows dropped for an empty key.
+    rows = []
+    for k, e in meta.get('errors', {}).items(): rows.append((k, '', 'Hoja sin cargar', None, e))
+    for k, q in meta.get('quality', {}).items():
+        if not q: continue
+        spec = cfg.get(k)
+        for c in q['missing']: rows.append((k, c, 'Columna faltante', None, f"esperada en '{spec[0]}'" if spec else ''))
+        for c, n in q['coerced'].items():
+            rows.append((k, c, 'Valores no convertidos', n, "quedaron vacíos (no son fecha)" if spec and c in spec[2] else "quedaron vacíos (no son número)"))
+        if q['duplicates']:
+            rows.append((k, spec[4] if spec else '', 'ID duplicado', q['duplicates'], ', '.join(q['dup_sample'])))
+        if q['dropped']: rows.append((k, spec[4] if spec else '', 'Filas sin clave descartadas', q['dropped'], ''))
+    return pd.DataFrame(rows, columns=COLS).astype({'Registros': 'Int64'})
+
+def summary(meta):
+    # One row per loaded sheet: rows read, rows kept and the count of each kind of problem.
+    out = []
+    for k, q in meta.get('quality', {}).items():
+        if not q: continue
+        out.append({'Hoja': k, 'Filas leídas': q['rows'], 'Filas cargadas': q['rows'] - q['dropped'], 'Columnas faltantes': len(q['missing']),
+                    'Valores no convertidos': sum(q['coerced'].values()), 'IDs duplicados': q['duplicates']})
+    return pd.DataFrame(out)
@@ -0,0 +1,98 @@
+import threading
+import numpy as np
+import pandas as pd
+from core.loader import CFG
+
+# ─── ROLLUP CUBE ───
+# Built once per data load: per sheet, the numeric columns from CFG as float arrays and an int32 code array per
+# category dimension and per month of each CFG date column. Aggregates are np.bincount over those codes, optionally
+# under a row mask from the module filters, so no groupby / to_period runs on a rerun.
+DIMS = {
+    'ordenes': ['ESTADO','TIPO DE PROYECTO','NOMBRE DEL PROYECTO O SUCURSAL','ESTATUS'],
+    'contratos': ['Estatus Operativo','Estatus Cierre','Proyecto / Obra'],
+    'obra_menor': ['ESTATUS_OPERACIÓN REAL','PROYECTO','ASIGNADO_A','SUCURSAL'],
+    'facturacion_2025': ['Estatus Comprobante','FDP'],
+    'prefacturas': ['Estatus'],
+    'fianzas': ['Afianzadora','Estatus Expedición','Estatus Vigencia'],
+    'facturas_adquira': ['CATEGORIA','ESTADO'],
+    'proyectos_2024': ['Estatus'],
+}
+
+def month_key(col):
+    return ('M', col)
+
+def _agg(codes, labels, vals, measures, mask=None):
+    c = codes if mask is None else codes[mask]
+    ok = c >= 0; c = c[ok]
+    out = {'count': np.bincount(c, minlength=len(labels))}
+    for m in measures:
+        v = vals[m] if mask is None else vals[m][mask]
+        v = v[ok]
+        out[m] = np.bincount(c, weights=np.nan_to_num(v), minlength=len(labels))
+    return out
+
+def build(S, dims=DIMS, cfg=CFG):
+    cube = {}
+    for k, (sn, hdr, dates, nums, drop) in cfg.items():
+        if k not in S: continue
+        df = S[k]
+        vals = {c: pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float, na_value=np.nan) for c in nums if c in df.columns}
+        groups = {}
+        for c in dims.get(k, []):
+            if c in df.columns:
+                codes, uniq = pd.factorize(df[c]); groups[c] = (codes.astype(np.int32), np.asarray(uniq, dtype=object))
+        for c in dates:
+            if c in df.columns:
+                codes, uniq = pd.factorize(pd.to_datetime(df[c], errors='coerce').dt.to_period('M'), sort=True)
+                groups[month_key(c)] = (codes.astype(np.int32), np.asarray(uniq.astype(str), dtype=object))
+        full = {g: _agg(codes, labels, vals, list(vals)) for g, (codes, labels) in groups.items()}
+        totals = {c: (float(np.nansum(v)), int((~np.isnan(v)).sum())) for c, v in vals.items()}
+        cube[k] = {'n': len(df), 'vals': vals, 'groups': groups, 'full': full, 'totals': totals, 'drill': {}, 'lock': threading.Lock()}
+    return cube
+
+# ─── QUERIES ───
+def count(cube, key, mask=None):
+    if key not in cube: return 0
+    return cube[key]['n'] if mask is None else int(mask.sum())
+
+def total(cube, key, col, mask=None):
+    # (sum, non-null count) of a CFG numeric column; (0.0, 0) when the sheet or column is missing.
+    if key not in cube or col not in cube[key]['vals']: return 0.0, 0
+    if mask is None: return cube[key]['totals'][col]
+    v = cube[key]['vals'][col][mask]; ok = ~np.isnan(v)
+    return float(v[ok].sum()), int(ok.sum())
+
+def has(cube, key, by):
+    return key in cube and by in cube[key]['groups']
+
+def group(cube, key, by, measures=(), mask=None):
+    # One row per label present under the mask: [by, 'count', *measures], in label order.
+    c = cube[key]
+    codes, labels = c['groups'][by]
+    measures = [m for m in measures if m in c['vals']]
+    a = c['full'][by] if mask is None else _agg(codes, labels, c['vals'], measures, mask)
+    name = by[1] if isinstance(by, tuple) else by
+    d = pd.DataFrame({name: labels, 'count': a['count'], **{m: a[m] for m in measures}})
+    return d[d['count'] > 0].reset_index(drop=True)
+
+def counts(cube, key, by, mask=None):
+    # Same rows as value_counts(): present labels by descending count.
+    return group(cube, key, by, (), mask).sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+def monthly(cube, key, col, measures=(), mask=None):
+    d = group(cube, key, month_key(col), measures, mask)
+    return d.rename(columns={col: 'M'})
+
+def rows(cube, key, by, label, mask=None):
+    # Drill-down: positions of the rows in one group (sorted), intersected with the mask, from a per-group order built once.
+    c = cube[key]
+    with c['lock']:
+        if by not in c['drill']:
+            codes, labels = c['groups'][by]
+            order = np.argsort(codes, kind='stable')
+            c['drill'][by] = (order, np.searchsorted(codes[order], np.arange(len(labels) + 1)), {l: i for i, l in enumerate(labels)})
+        order, bounds, at = c['drill'][by]
+    i = at.get(label)
+    if i is None: return np.empty(0, dtype=np.intp)
+    pos = order[bounds[i]:bounds[i+1]]
+    return pos if mask is None else pos[mask[pos]]
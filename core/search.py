@@ -0,0 +1,71 @@
+import re, threading, unicodedata
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from core import perf, cache
+
+# ─── EXPLORADOR SEARCH INDEX ───
+# Per sheet and column: row -> code into the column's distinct values, case- and accent-folded once per data load.
+# A term is tested against the distinct values only, then expanded to rows through the codes.
+QUERY_CACHE = 64
+_TOKEN = re.compile(r'(?:[^\s"]+|"[^"]*")+')
+
+def fold(s):
+    return ''.join(c for c in unicodedata.normalize('NFKD', str(s)) if not unicodedata.combining(c)).casefold()
+
+def build_index(df):
+    cols = {}
+    for c in df.columns:
+        codes, uniq = pd.factorize(df[c])
+        # Slot 0 is the empty string for missing values, so they never match.
+        cols[c] = ((codes + 1).astype(np.int32), pd.Series([''] + [fold(u) for u in uniq], dtype=object))
+    keys = {}
+    for c in df.columns:
+        f = fold(c).strip(); keys[f] = c; keys.setdefault(f.replace(' ', '_'), c)
+    return {'cols': cols, 'keys': keys, 'n': len(df), 'cache': OrderedDict(), 'lock': threading.Lock()}
+
+def column_for(idx, name):
+    f = fold(name).strip().strip('"')
+    if f in idx['keys']: return idx['keys'][f]
+    # Unambiguous prefix, e.g. "estat" for a single ESTATUS column.
+    hits = {c for k, c in idx['keys'].items() if k.startswith(f)} if f else set()
+    return hits.pop() if len(hits) == 1 else None
+
+def parse(idx, q):
+    # "a b" -> AND of terms; COLUMNA:valor scopes a term; quotes keep spaces ("en proceso", "tipo de proyecto":remo).
+    terms = []
+    for tok in _TOKEN.findall(q):
+        col, val = None, tok
+        m = re.match(r'^("[^"]*"|[^":]+):(.+)$', tok)
+        if m and (c := column_for(idx, m.group(1))) is not None: col, val = c, m.group(2)
+        val = fold(val.replace('"', ''))
+        if val: terms.append((col, val))
+    return terms
+
+def _term_mask(idx, col, val):
+    m = np.zeros(idx['n'], dtype=bool)
+    for c in ([col] if col is not None else idx['cols']):
+        codes, uniq = idx['cols'][c]
+        lut = uniq.str.contains(val, regex=False).to_numpy(dtype=bool)
+        if lut.any(): m |= lut[codes]
+    return m
+
+def query(idx, q):
+    # Row positions matching every term, or None when the query has no terms.
+    terms = parse(idx, q)
+    if not terms: return None
+    key = tuple(terms)
+    with idx['lock']:
+        if key in idx['cache']: idx['cache'].move_to_end(key); perf.count('busqueda', True); return idx['cache'][key]
+    perf.count('busqueda', False)
+    m = np.ones(idx['n'], dtype=bool)
+    for col, val in terms:
+        m &= _term_mask(idx, col, val)
+        if not m.any(): break
+    pos = np.flatnonzero(m)
+    out = []
+    with idx['lock']:
+        idx['cache'][key] = pos
+        while len(idx['cache']) > QUERY_CACHE: out.append(idx['cache'].popitem(last=False)[1])
+    if idx.get('on_grow'): idx['on_grow'](pos.nbytes - sum(o.nbytes for o in out))
+    return pos
@@ -0,0 +1,90 @@
+import argparse, json, os, sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from core import engine, watcher
+
+# ─── DATA SERVICE ───
+# Long-lived process holding the one engine for a workbook; Streamlit sessions and scripts query it over HTTP.
+# POST /api/<function> with a JSON object of keyword arguments (GET works for calls without any).
+# DataFrames come back as an Arrow IPC stream, PDFs as bytes, everything else as JSON.
+API = {'meta': engine.meta, 'sheet': engine.sheet, 'options': engine.options, 'kpis': engine.kpis, 'group': engine.group,
+       'count': engine.count, 'total': engine.total, 'dims': engine.dims, 'counts': engine.counts, 'monthly': engine.monthly, 'drill': engine.drill,
+       'sucursal_names': engine.sucursal_names, 'sucursal_rows': engine.sucursal_rows, 'sucursal_sheet': engine.sucursal_sheet, 'reconcile': engine.reconcile,
+       'join_rows': engine.join_rows, 'join_sheet': engine.join_sheet, 'vencimientos_proximos': engine.vencimientos_proximos,
+       'vencimientos_conteo': engine.vencimientos_conteo, 'vencimientos_opciones': engine.vencimientos_opciones,
+       'aging_buckets': engine.aging_buckets, 'outstanding': engine.outstanding, 'stage_summary': engine.stage_summary,
+       'quality_report': engine.quality_report, 'overview_pdf': engine.overview_pdf, 'cache_stats': engine.cache_stats}
+ARROW = 'application/vnd.apache.arrow.stream'
+PORT = int(os.environ.get("SCD_SERVICE_PORT", "8765"))
+
+def current(path):
+    # The watcher re-reads the workbook in the background when it changes; unchanged sheets come back from the snapshots.
+    w = watcher.start([path]); eng = watcher.current(w)
+    if eng is None: raise FileNotFoundError(w['error'][2] if w['error'] else f"no se encontró {path}")
+    return eng
+
+def _plain(o):
+    if isinstance(o, np.ndarray): return o.tolist()
+    if isinstance(o, np.generic): return o.item()
+    return str(o)
+
+def encode(v):
+    if isinstance(v, pd.DataFrame):
+        t = pa.Table.from_pandas(v, preserve_index=False); sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, t.schema) as w: w.write_table(t)
+        return ARROW, sink.getvalue().to_pybytes()
+    if isinstance(v, bytes): return 'application/pdf', v
+    return 'application/json', json.dumps(v, default=_plain, ensure_ascii=False).encode()
+
+def handler(path, quiet=False):
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, ctype, body):
+            self.send_response(code); self.send_header('Content-Type', ctype); self.send_header('Content-Length', str(len(body))); self.end_headers()
+            self.wfile.write(body)
+        def fail(self, code, msg):
+            self.reply(code, 'application/json', json.dumps({'error': msg}, ensure_ascii=False).encode())
+        def call(self, kw):
+            name = urlparse(self.path).path.strip('/').removeprefix('api/')
+            if name not in API: return self.fail(404, f"función desconocida: {name}")
+            try: v = API[name](current(path), **kw)
+            except (KeyError, TypeError, ValueError, IndexError) as e: return self.fail(400, f"{type(e).__name__}: {e}")
+            except Exception as e: return self.fail(500, f"{type(e).__name__}: {e}")
+            self.reply(200, *encode(v))
+        def do_GET(self): self.call({})
+        def do_POST(self):
+            n = int(self.headers.get('Content-Length') or 0)
+            try: kw = json.loads(self.rfile.read(n) or b'{}')
+            except ValueError: return self.fail(400, "cuerpo JSON inválido")
+            if not isinstance(kw, dict): return self.fail(400, "se espera un objeto JSON")
+            self.call(kw)
+        def log_message(self, fmt, *a):
+            if not quiet: super().log_message(fmt, *a)
+    return Handler
+
+def serve(path, host='127.0.0.1', port=PORT, quiet=False):
+    current(path)
+    srv = ThreadingHTTPServer((host, port), handler(path, quiet)); srv.daemon_threads = True
+    return srv
+
+# ─── CLI ───
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m core.service', description="Sirve los datos del sistema integral por HTTP (JSON / Arrow).")
+    ap.add_argument('workbook', help="archivo Excel del sistema integral")
+    ap.add_argument('--host', default='127.0.0.1', help="interfaz (por omisión solo local)")
+    ap.add_argument('-p', '--port', type=int, default=PORT, help="puerto")
+    ap.add_argument('-q', '--quiet', action='store_true', help="sin log de peticiones")
+    a = ap.parse_args(argv)
+    srv = serve(a.workbook, a.host, a.port, a.quiet)
+    m = engine.meta(current(a.workbook))
+    for k, e in m['errors'].items(): print(f"aviso: hoja {k} sin cargar — {e}", file=sys.stderr)
+    print(f"Sirviendo {a.workbook} ({sum(m['sheets'].values())} filas) en http://{a.host}:{a.port}", file=sys.stderr)
+    try: srv.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: srv.server_close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import hashlib, os, re, threading
+from collections import OrderedDict
+import pandas as pd
+from core import loader, engine, rollups, watcher
+
+# ─── MULTI-YEAR STORE ───
+# Several yearly workbooks side by side, partitioned by (year, sheet): each workbook is loaded on its own into an engine
+# (same snapshots, indexes and rollup cube as the single-workbook app) and never concatenated with the others.
+# Queries take the years they need and only touch those partitions; cross-year series are built from each partition's
+# rollup cube, so what gets combined is one small row per month, not the sheets.
+# Yearly books live in their own folder: the main watcher only globs the top level of data/, so nothing here can replace
+# the app's current workbook. The configured workbook is added next to them for its own year.
+# A store holds only each year's data fingerprint: the engines themselves live in the engine cache, count against
+# SCD_CACHE_MB like any other workbook and can be evicted; a query on an evicted year loads it again (from snapshots).
+DIR = os.environ.get("SCD_YEARS_DIR", os.path.join("data", "years"))
+YEAR = watcher.YEAR
+STORES = 2
+# Sheets whose tab name carries the workbook year ('Facturación 2025' in the 2025 book, 'Facturación 2024' in the 2024 one).
+YEARLY = ['facturacion_2025']
+
+_stores, _lock = OrderedDict(), threading.Lock()
+
+year_of = watcher.year_of
+
+def cfg_for(year, cfg=loader.CFG):
+    return {k: ((re.sub(r'20\d\d', str(year), v[0]),) + tuple(v[1:]) if k in YEARLY else v) for k, v in cfg.items()}
+
+def workbooks(paths, pattern=watcher.PATTERN):
+    # {year: (path, (size, mtime))}: the newest workbook per year among the watched paths; files without a year are skipped.
+    out = {}
+    for p, sig in watcher.candidates(paths, pattern):
+        y = year_of(p)
+        if y is not None and (y not in out or sig[1] > out[y][1][1]): out[y] = (p, sig)
+    return dict(sorted(out.items()))
+
+def load(files):
+    # files: {year: path} or {year: (path, sig)}. Reused while no file changes; the engines are not kept past this call.
+    files = {y: (f if isinstance(f, tuple) else (f, watcher.signature(f))) for y, f in files.items()}
+    key = tuple(sorted(files.items()))
+    with _lock:
+        if key in _stores: _stores.move_to_end(key); return _stores[key]
+    parts = {y: engine.load(p, cfg_for(y)) for y, (p, _) in files.items()}
+    st = {'fps': {y: e['fingerprint'] for y, e in parts.items()}, 'sheets': {y: list(e['sheets']) for y, e in parts.items()},
+          'errors': {y: e['meta']['errors'] for y, e in parts.items()}, 'files': {y: p for y, (p, _) in files.items()},
+          'fingerprint': hashlib.sha256('|'.join(f"{y}:{e['fingerprint']}" for y, e in sorted(parts.items())).encode()).hexdigest()[:24]}
+    with _lock:
+        st = _stores.setdefault(key, st)
+        while len(_stores) > STORES: _stores.popitem(last=False)
+    return st
+
+def part(st, y):
+    return engine.cached(st['fps'][y]) or engine.load(st['files'][y], cfg_for(y))
+
+# ─── QUERIES ───
+def years(st, key=None):
+    return [y for y, ks in st['sheets'].items() if key is None or key in ks]
+
+def partitions(st, key, yrs=None):
+    # [(year, engine)] holding sheet `key`, restricted to yrs.
+    return [(y, part(st, y)) for y in years(st, key) if yrs is None or y in yrs]
+
+def summary(st, measures, yrs=None):
+    # One row per year: record count and total per (sheet, column) in measures, from the partition cubes.
+    rows = {}
+    for k, c in measures:
+        for y, e in partitions(st, k, yrs):
+            R = engine.cube(e); r = rows.setdefault(y, {'Año': y})
+            r[f"{k} · registros"] = rollups.count(R, k); r[f"{k} · {c}"] = rollups.total(R, k, c)[0]
+    return pd.DataFrame(sorted(rows.values(), key=lambda r: r['Año']))
+
+def trend(st, key, col, measures=(), yrs=None):
+    # Monthly [Año, M, count, *measures] across the partitions; Año is the workbook the month came from.
+    fs = []
+    for y, e in partitions(st, key, yrs):
+        R = engine.cube(e)
+        if rollups.has(R, key, rollups.month_key(col)): fs.append(rollups.monthly(R, key, col, measures).assign(**{'Año': y}))
+    if not fs: return pd.DataFrame(columns=['Año', 'M', 'count', *measures])
+    d = pd.concat(fs, ignore_index=True)
+    return d[['Año', 'M', 'count', *[m for m in measures if m in d.columns]]].sort_values(['M', 'Año'], kind='stable').reset_index(drop=True)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+# ─── SUCURSAL INDEX ───
+# Column holding the branch / project name in each sheet, in the order sections are shown.
+NAME_COLS = [('ordenes','NOMBRE DEL PROYECTO O SUCURSAL'), ('contratos','Proyecto / Obra'), ('obra_menor','SUCURSAL'),
+             ('prefacturas','Proyecto / Obra'), ('fianzas','Proyecto'), ('proyectos_2024','Sucursal'), ('facturas_adquira','PROYECTO RELACIONADO')]
+# Sheets whose names feed the selector; Adquira invoices are only looked up, never listed.
+LIST_SHEETS = ('ordenes','obra_menor','contratos','prefacturas','fianzas','proyectos_2024')
+
+def normalize(v):
+    return str(v).upper().strip()
+
+def build_index(S):
+    # rows: normalized name -> {sheet: row positions}; tokens: word -> normalized names containing it.
+    rows, tokens, names = {}, {}, set()
+    for k, c in NAME_COLS:
+        if k not in S or c not in S[k].columns: continue
+        col = S[k][c]
+        codes, uniq = pd.factorize(col.astype(str).str.upper().str.strip())
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniq) + 1))
+        for i, u in enumerate(uniq): rows.setdefault(u, {})[k] = order[bounds[i]:bounds[i+1]]
+        if k in LIST_SHEETS: names.update(col.dropna().unique())
+    for u in rows:
+        for t in u.split(): tokens.setdefault(t, set()).add(u)
+    return {'rows': rows, 'tokens': tokens, 'names': sorted([str(x) for x in names if str(x).strip()])}
+
+def matching_names(idx, q, exact=False):
+    u = normalize(q)
+    if exact: return [u] if u in idx['rows'] else []
+    # Words strictly inside the query are whole words of any name containing it, so they narrow the candidates;
+    # the first and last words may be partial and are only checked by the substring test.
+    inner = u.split()[1:-1]
+    cands = set.intersection(*(idx['tokens'].get(t, set()) for t in inner)) if inner else idx['rows']
+    return [n for n in cands if u in n]
+
+def positions(idx, q, exact=False):
+    # {sheet: sorted row positions} over every matching name.
+    pos = {}
+    for n in matching_names(idx, q, exact):
+        for k, p in idx['rows'][n].items(): pos.setdefault(k, []).append(p)
+    return {k: np.sort(np.concatenate(pos[k])) for k, _ in NAME_COLS if k in pos}
+
+def lookup(idx, S, q, exact=False):
+    return {k: S[k].iloc[p] for k, p in positions(idx, q, exact).items()}
@@ -0,0 +1,86 @@
+import argparse, os, sys
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from core import loader, exports
+
+# ─── FIANZA EXPIRATION INDEX ───
+# Built once per data load over CONTROL DE FIANZAS: the rows with a 'Vencimiento' date, ordered by that date, plus
+# 'Estatus Vigencia' / 'Afianzadora' codes in the same order. "Expiring between a and b" is two searchsorted calls
+# on the sorted days; the filters only look at that slice.
+DATE, KEYS = 'Vencimiento', ['Estatus Vigencia', 'Afianzadora']
+HORIZONS = [30, 60, 90]
+COLS = ['CR', 'Proyecto', 'Anexo de Obra', 'Afianzadora', 'No. Fianza', 'Monto Garantizado Fianza', 'Estatus Vigencia', 'Vencimiento']
+
+def _days(s):
+    # (days since epoch as int64, mask of the rows that have a date)
+    d = pd.to_datetime(s, errors='coerce')
+    return d.to_numpy(dtype='datetime64[D]').astype(np.int64), d.notna().to_numpy()
+
+def build_index(df):
+    if DATE not in df.columns: return {'days': np.empty(0, dtype=np.int64), 'pos': np.empty(0, dtype=np.intp), 'keys': {}}
+    days, ok = _days(df[DATE])
+    pos = np.flatnonzero(ok); pos = pos[np.argsort(days[pos], kind='stable')]
+    keys = {}
+    for c in KEYS:
+        if c in df.columns:
+            codes, uniq = pd.factorize(df[c].iloc[pos]); keys[c] = (codes.astype(np.int32), {u: i for i, u in enumerate(uniq)})
+    return {'days': days[pos], 'pos': pos, 'keys': keys}
+
+def today():
+    return pd.Timestamp.today().normalize()
+
+def _day(t):
+    return int(np.datetime64(pd.Timestamp(t).normalize(), 'D').astype(np.int64))
+
+def window(idx, start, end, sel=()):
+    # Row positions (by expiration date) with start <= Vencimiento <= end; sel = ((key column, [labels]), ...).
+    lo, hi = np.searchsorted(idx['days'], _day(start), side='left'), np.searchsorted(idx['days'], _day(end), side='right')
+    pos = idx['pos'][lo:hi]; keep = np.ones(len(pos), dtype=bool)
+    for c, labels in sel:
+        if c not in idx['keys'] or not labels: continue
+        codes, at = idx['keys'][c]
+        keep &= np.isin(codes[lo:hi], [at[l] for l in labels if l in at])
+    return pos[keep]
+
+def upcoming(idx, days, ref=None, sel=()):
+    # Expiring within the next `days` days of ref (today by default), ref included; days < 0 looks back (already expired).
+    ref = today() if ref is None else pd.Timestamp(ref).normalize()
+    a, b = (ref, ref + pd.Timedelta(days=days)) if days >= 0 else (ref + pd.Timedelta(days=days), ref - pd.Timedelta(days=1))
+    return window(idx, a, b, sel)
+
+def counts(idx, ref=None, horizons=HORIZONS):
+    ref = today() if ref is None else pd.Timestamp(ref).normalize(); r = _day(ref)
+    return {h: int(np.searchsorted(idx['days'], r + h, side='right') - np.searchsorted(idx['days'], r, side='left')) for h in horizons}
+
+def alerts(df, pos, ref=None):
+    # Rows at pos with a 'Días' column (days left; negative = already expired), soonest first.
+    ref = today() if ref is None else pd.Timestamp(ref).normalize()
+    d = df.iloc[pos]; dc = [c for c in COLS if c in d.columns]
+    return d[dc].assign(**{'Días': (pd.to_datetime(d[DATE], errors='coerce') - ref).dt.days.to_numpy()})
+
+# ─── CLI ───
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m core.vencimientos', description="Exporta las fianzas que vencen en los próximos N días.")
+    ap.add_argument('workbook', nargs='?', help="archivo Excel del sistema integral")
+    ap.add_argument('--servicio', metavar='URL', help="tomar los datos de un `python -m core.service` en lugar del Excel")
+    ap.add_argument('-d', '--dias', type=int, default=HORIZONS[0], help="horizonte en días (negativo = vencidas en los últimos N días)")
+    ap.add_argument('--desde', help="fecha de referencia AAAA-MM-DD (por omisión hoy)")
+    ap.add_argument('-a', '--afianzadora', action='append', help="solo esta afianzadora (se puede repetir)")
+    ap.add_argument('-v', '--vigencia', action='append', help="solo este estatus de vigencia (se puede repetir)")
+    ap.add_argument('-o', '--out', default=f"Vencimientos_{datetime.now().strftime('%Y%m%d')}.xlsx", help="archivo de salida (.xlsx, .csv o .parquet)")
+    a = ap.parse_args(argv)
+    if not (a.workbook or a.servicio): ap.error("indica el archivo Excel o --servicio")
+    fmt = os.path.splitext(a.out)[1].lstrip('.').lower()
+    if fmt not in exports.FORMATS: ap.error(f"formato no soportado: {fmt}")
+    if a.servicio: from core import client
+    S, meta = client.load_data(a.servicio) if a.servicio else loader.load_data(a.workbook, {'fianzas': loader.CFG['fianzas']})
+    if 'fianzas' not in S: print(f"Sin hoja de fianzas: {meta['errors'].get('fianzas', '')}", file=sys.stderr); return 1
+    idx = build_index(S['fianzas'])
+    d = alerts(S['fianzas'], upcoming(idx, a.dias, a.desde, (('Afianzadora', a.afianzadora), ('Estatus Vigencia', a.vigencia))), a.desde)
+    exports.WRITERS[fmt](d, a.out)
+    print(f"{len(d)} fianzas en {a.out}", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
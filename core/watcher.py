@@ -0,0 +1,98 @@
+import glob, os, re, threading, time
+from core import engine, perf
+
+# ─── WATCH FOLDER ───
+# A daemon thread polls the watched files / folders and, when the newest workbook there is new or changed, loads it off
+# the request path. The loaded engine replaces the current one in a single assignment, so readers get either the old
+# data or the new data, never a mix. A file has to keep the same size and mtime for one whole poll before it is read,
+# so a workbook that is still being copied is not picked up half-written; if a load fails the previous data stays.
+# A watcher started with a year only takes workbooks whose name carries that year (or no year at all): another year's
+# book dropped in the same folder is left alone instead of replacing the data. Only files named like the system workbook
+# are watched, and a load with none of the CFG sheets or without a REQUIRED one is an error, not new data.
+DIRS = [d for d in os.environ.get("SCD_WATCH_DIRS", os.pathsep.join(["data", "/mnt/user-data/uploads"])).split(os.pathsep) if d]
+PATTERN = os.environ.get("SCD_WATCH_PATTERN", "SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL*.xlsx")
+REQUIRED = ['ordenes']
+INTERVAL = float(os.environ.get("SCD_WATCH_INTERVAL", "5"))
+
+YEAR = re.compile(r'(?<!\d)(20\d\d)(?!\d)')
+
+_watchers, _lock = {}, threading.Lock()
+
+def year_of(path):
+    m = YEAR.findall(os.path.basename(str(path)))
+    return int(m[-1]) if m else None
+
+def signature(path):
+    try: st = os.stat(path)
+    except OSError: return None
+    return (st.st_size, st.st_mtime_ns)
+
+def candidates(paths, pattern=PATTERN):
+    # (path, (size, mtime)) of every workbook in paths: files are taken as they are, folders are globbed.
+    out = []
+    for p in paths:
+        fs = sorted(glob.glob(os.path.join(p, pattern))) if os.path.isdir(p) else [p]
+        for f in fs:
+            if os.path.basename(f).startswith(('~$', '.')): continue
+            s = signature(f)
+            if s is not None and os.path.isfile(f): out.append((f, s))
+    return out
+
+def latest(paths, pattern=PATTERN, year=None):
+    # Most recently modified workbook (of `year`, when given), or None.
+    c = [x for x in candidates(paths, pattern) if year is None or year_of(x[0]) in (None, year)]
+    return max(c, key=lambda x: x[1][1]) if c else None
+
+def _check(eng):
+    # Reason to reject a load, or None.
+    if not eng['sheets']: return "ninguna hoja del sistema se pudo cargar"
+    miss = [k for k in REQUIRED if k not in eng['sheets']]
+    return f"faltan hojas requeridas: {', '.join(miss)}" if miss else None
+
+def _load(w, path, sig):
+    try:
+        with perf.span('watcher:load'): eng = engine.load(path)
+    except Exception as e:
+        w['error'] = (path, sig, f"{type(e).__name__}: {e}"); return False
+    bad = _check(eng)
+    if bad: w['error'] = (path, sig, f"ValueError: {bad}"); return False
+    # (engine, path, sig, loaded) published in one assignment, so a reader never pairs one load's path with another's data.
+    w['current'] = (eng, path, sig, time.time()); w['error'] = None
+    return True
+
+def poll(w):
+    # One check: loads the newest workbook if it differs from the current one and has stopped changing.
+    cur = latest(w['paths'], w['pattern'], w['year']); now = w['current']
+    if cur is None or (now and cur == now[1:3]): w['pending'] = None; return False
+    if w['pending'] != cur: w['pending'] = cur; return False
+    w['pending'] = None
+    if w['error'] and w['error'][:2] == cur: return False
+    return _load(w, *cur)
+
+def _run(w):
+    while not w['stop'].wait(w['interval']):
+        try: poll(w)
+        except Exception as e: w['error'] = (None, None, f"{type(e).__name__}: {e}")
+
+def start(paths, interval=INTERVAL, pattern=PATTERN, year=None):
+    # Watcher for paths, one per process: the first call loads the current workbook (if any) before returning.
+    key = (tuple(paths), pattern, year)
+    with _lock:
+        w = _watchers.get(key)
+        if w is None:
+            w = _watchers[key] = {'paths': list(paths), 'pattern': pattern, 'year': year, 'interval': interval, 'current': None,
+                                  'error': None, 'pending': None, 'stop': threading.Event()}
+            cur = latest(w['paths'], pattern, year)
+            if cur: _load(w, *cur)
+            w['thread'] = threading.Thread(target=_run, args=(w,), name='scd-watcher', daemon=True); w['thread'].start()
+    return w
+
+def current(w):
+    c = w['current']
+    return c[0] if c else None
+
+def stop(w):
+    w['stop'].set()
+    with _lock:
+        for k, v in list(_watchers.items()):
+            if v is w: del _watchers[k]
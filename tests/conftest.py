@@ -0,0 +1,23 @@
+import os, sys, tempfile
+import pytest
+
+# Snapshots, exports and perf logs go to a throwaway folder; set before core.loader reads the environment.
+_TMP = tempfile.mkdtemp(prefix='scd-tests-')
+os.environ.setdefault('SCD_SNAPSHOT_DIR', os.path.join(_TMP, 'snapshots'))
+os.environ.setdefault('SCD_WORKERS', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench import synth
+from core import loader
+
+ROWS = 300
+
+@pytest.fixture(scope='session')
+def book(tmp_path_factory):
+    # Synthetic workbook with every CFG sheet, named like the real one.
+    return synth.write(ROWS, str(tmp_path_factory.mktemp('wb') / 'SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2025.xlsx'))
+
+@pytest.fixture(scope='session')
+def loaded(book, tmp_path_factory):
+    # (sheets, meta) of the synthetic workbook, parsed once for the whole run.
+    return loader.load_data(book, snapshot_dir=str(tmp_path_factory.mktemp('snap')))
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from core import analytics
+
+def _frame(n=400, seed=1):
+    r = np.random.default_rng(seed)
+    x = r.normal(100, 15, n); x[r.random(n) < 0.05] = np.nan; x[:3] = [900, -500, 400]
+    g = r.choice(['a', 'b', 'c', 'd'], n).astype(object); g[5:9] = None; g[10:13] = 'chico'
+    return pd.DataFrame({'g': g, 'x': x})
+
+def test_robust_z_matches_groupby_median_and_mad():
+    df = _frame(); codes, uniq = pd.factorize(df['g'])
+    z = analytics.robust_z(codes.astype(np.intp), df['x'].to_numpy(), len(uniq))
+    med = df.groupby('g')['x'].transform('median')
+    mad = (df['x'] - med).abs().groupby(df['g']).transform('median')
+    n = df.groupby('g')['x'].transform('count')
+    want = (0.6745 * (df['x'] - med) / mad).where(n >= analytics.MIN_GROUP)
+    assert np.allclose(z, want.to_numpy(), equal_nan=True)
+    assert np.isnan(z[10:13]).all() and np.isnan(z[5:9]).all()
+    assert (np.abs(z[:3]) > analytics.Z_OUT).all()
+
+def test_group_quantiles_match_numpy():
+    df = _frame(); codes, uniq = pd.factorize(df['g'])
+    n, q = analytics.group_quantiles(codes.astype(np.intp), df['x'].to_numpy(), [0.25, 0.5, 0.75], len(uniq))
+    for i, u in enumerate(uniq):
+        v = df.loc[df['g'] == u, 'x'].dropna().to_numpy()
+        assert n[i] == len(v) and np.allclose([q[p][i] for p in (0.25, 0.5, 0.75)], np.quantile(v, [0.25, 0.5, 0.75]))
+
+def test_aging_bucket_edges():
+    d = np.array([-3, 0, 30, 30.5, 31, 60, 61, 90, 91, 400, np.nan])
+    assert analytics.aging_bucket(d).tolist() == [0, 0, 0, 1, 1, 1, 2, 2, 3, 3, -1]
+
+def _proyectos(seed=2):
+    r = np.random.default_rng(seed); n = 300
+    p = r.choice(['P1', 'P2', 'P3', None], n).astype(object)
+    days = r.integers(0, 200, n).astype(float); days[r.random(n) < 0.1] = np.nan
+    pay = r.normal(1e4, 3e3, n); pay[r.random(n) < 0.1] = np.nan
+    return pd.DataFrame({'Proyecto': p, 'Días transcurridos': days, 'Por pagar': pay, 'Por devolver': r.normal(500, 100, n)})
+
+def test_buckets_and_outstanding_match_groupby():
+    df = _proyectos(); A = analytics.proyectos(df); m = np.arange(len(df)) % 3 != 0
+    lb = pd.cut(df['Días transcurridos'], [-np.inf, 30, 60, 90, np.inf], labels=analytics.AGING)
+    sub = df[m & lb.notna().to_numpy()]; g = sub.groupby(lb[sub.index], observed=False)
+    b = analytics.buckets(A, m)
+    assert b['Registros'].tolist() == g.size().tolist()
+    assert np.allclose(b['Por pagar'], g['Por pagar'].sum().to_numpy())
+    o = analytics.outstanding(A, m).set_index('Proyecto')
+    sub = df[m & df['Proyecto'].notna().to_numpy()]; want = sub.groupby('Proyecto')
+    assert o['Registros'].to_dict() == want.size().to_dict()
+    assert np.allclose(o.loc[want.sum().index, 'Por devolver'], want['Por devolver'].sum())
+    assert np.allclose(o[[f"Por pagar {x}" for x in analytics.AGING]].sum(axis=1), sub[sub['Días transcurridos'].notna()].groupby('Proyecto')['Por pagar'].sum().reindex(o.index))
+    assert o['Por pagar'].is_monotonic_decreasing
+
+def test_open_prefacturas_age_from_request():
+    df = pd.DataFrame({'Fecha solicitud': pd.to_datetime(['2025-01-01', '2025-01-01', None]), 'Fecha Emisión': pd.NaT, 'Fecha de aceptación': pd.NaT,
+                       'Fecha de factura': pd.to_datetime([None, '2025-01-20', None]), 'Total': [100.0, 200.0, 300.0], 'Proyecto / Obra': ['x', 'x', 'y']})
+    A = analytics.prefacturas(df, '2025-03-02')
+    assert np.allclose(A['days'], [60, np.nan, np.nan], equal_nan=True) and A['bucket'].tolist() == [1, -1, -1]
+    assert analytics.buckets(A)['Total pendiente'].tolist() == [0, 100, 0, 0]
@@ -0,0 +1,16 @@
+import zipfile
+from core import batch, sucursales
+
+def test_batch_writes_one_pdf_per_branch_with_rows(loaded, tmp_path):
+    S, meta = loaded; names = sucursales.build_index(S)['names'][:4] + ['NO EXISTE']
+    seen = []
+    out = str(tmp_path / 'o.zip')
+    written, empty = batch.batch_pdfs(S, out, names, exact=True, workers=2, progress=lambda d, t, s: seen.append((d, t)))
+    assert (written, empty) == (4, ['NO EXISTE']) and seen == [(i, 5) for i in range(1, 6)]
+    with zipfile.ZipFile(out) as z:
+        assert len(z.namelist()) == 4 and all(z.read(n).startswith(b'%PDF') for n in z.namelist())
+
+def test_pdf_names_are_unique():
+    used = set()
+    assert [batch.pdf_name(s, '20250101', used) for s in ['A/B', 'A B', '', '']] == \
+        ['Overview_A_B_20250101.pdf', 'Overview_A_B_20250101_2.pdf', 'Overview_sucursal_20250101.pdf', 'Overview_sucursal_20250101_2.pdf']
@@ -0,0 +1,37 @@
+import numpy as np
+from core import cache, engine
+
+def _c(max_bytes, disk=None):
+    # Arrays sized by nbytes; with disk, evicted values are "spilled" to that dict and restored from it.
+    def spill(k, v): disk[k] = v; return k
+    return cache.new('prueba', max_bytes, lambda v: v.nbytes, spill if disk is not None else None, lambda k, tok: disk.pop(tok, None))
+
+def test_evicts_least_recently_used_by_bytes():
+    c = _c(250)
+    for k in 'abc': cache.put(c, k, np.zeros(100, dtype=np.uint8))
+    assert cache.get(c, 'a') is None and cache.get(c, 'b') is not None
+    cache.put(c, 'd', np.zeros(100, dtype=np.uint8))
+    assert cache.get(c, 'c') is None and cache.stats(c)['bytes'] == 200 and cache.stats(c)['evictions'] == 2
+
+def test_put_returns_the_shared_value():
+    c = _c(1000); a = np.zeros(10)
+    assert cache.put(c, 'k', a) is a and cache.put(c, 'k', np.ones(10)) is a
+
+def test_spilled_entries_are_restored():
+    disk = {}; c = _c(150, disk)
+    a = cache.put(c, 'a', np.arange(100, dtype=np.uint8)); cache.put(c, 'b', np.zeros(100, dtype=np.uint8))
+    assert 'a' in disk and cache.stats(c)['on_disk'] == 1
+    assert np.array_equal(cache.get(c, 'a'), a) and cache.stats(c)['restored'] == 1
+
+def test_resize_adds_the_delta_and_evicts_others():
+    c = _c(300)
+    for k in 'ab': cache.put(c, k, np.zeros(100, dtype=np.uint8))
+    cache.resize(c, 'b', 150)
+    assert cache.get(c, 'a') is None and cache.stats(c)['bytes'] == 250
+
+def test_engine_budget_tracks_indexes_incrementally(loaded):
+    eng = engine.attach(*loaded)
+    engine.cube(eng); engine.sheet(eng, 'ordenes', q='a')
+    for o in engine.options(eng, 'ordenes', 'ESTADO'): engine.sheet(eng, 'ordenes', (('ESTADO', o),))
+    tracked = engine._cache['items'][eng['fingerprint']][1]
+    assert abs(tracked - engine.size(eng)) <= 0.01 * tracked
@@ -0,0 +1,19 @@
+import os
+import pandas as pd
+from core import exports
+
+DF = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+
+def test_export_returns_a_handle_that_survives_pruning(tmp_path):
+    d = str(tmp_path)
+    with exports.export(DF, 'csv', 'k0', d) as f:
+        for i in range(1, exports.EXPORT_FILES + 5): exports.export(DF, 'csv', f"k{i}", d).close()
+        assert f.read().decode().splitlines()[0] == 'a,b'
+    assert len(os.listdir(d)) == exports.EXPORT_FILES
+
+def test_hit_reuses_the_file(tmp_path):
+    d = str(tmp_path)
+    with exports.export(DF, 'csv', 'k', d) as f: first = f.read()
+    os.utime(os.path.join(d, 'k.csv'), (0, 0))
+    with exports.export(DF.iloc[:0], 'csv', 'k', d) as f: assert f.read() == first
+    assert os.path.getmtime(os.path.join(d, 'k.csv')) > 0
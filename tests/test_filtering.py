@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from core import filtering
+
+COLS = ('ESTADO', 'TIPO DE PROYECTO')
+
+def _baseline(df, sel):
+    # Boolean masks over the str() labels, one per selection, as the selectboxes did before the index.
+    m = np.ones(len(df), dtype=bool)
+    for c, lb in sel: m &= (df[c].astype(str) == lb).to_numpy() & df[c].notna().to_numpy()
+    return m
+
+def test_subset_options_and_kpis_match_masks(loaded):
+    df = loaded[0]['ordenes']; idx = filtering.build_index(df, COLS)
+    for a in filtering.options(idx, COLS[0]):
+        for b in filtering.options(idx, COLS[1], ((COLS[0], a),))[:3] + [None]:
+            sel = ((COLS[0], a),) + (((COLS[1], b),) if b else ())
+            m = _baseline(df, sel)
+            assert filtering.subset(idx, df, sel).equals(df[m])
+            assert np.array_equal(filtering.mask(idx, sel), m)
+            v = pd.to_numeric(df.loc[m, 'IMPORTE TOTAL'], errors='coerce')
+            s, n = filtering.kpis(idx, df, sel, ('IMPORTE TOTAL',))['IMPORTE TOTAL']
+            assert np.isclose(s, v.sum()) and n == v.notna().sum()
+        rest = df.loc[_baseline(df, ((COLS[0], a),)), COLS[1]].dropna().astype(str)
+        assert filtering.options(idx, COLS[1], ((COLS[0], a),)) == sorted(rest.unique())
+
+def test_unknown_label_selects_nothing(loaded):
+    df = loaded[0]['ordenes']; idx = filtering.build_index(df, COLS)
+    assert not filtering.mask(idx, ((COLS[0], 'no-existe'),)).any()
+    assert filtering.subset(idx, df, ()) is df
+
+def test_one_index_per_sheet_codes_each_column_once(loaded, monkeypatch):
+    from core import engine
+    E = engine._new(*loaded); coded = []
+    code = filtering._code; monkeypatch.setattr(filtering, '_code', lambda col: coded.append(col.name) or code(col))
+    a, b = engine.options(E, 'ordenes', COLS[0])[0], engine.options(E, 'ordenes', COLS[1])[0]
+    for sel in [((COLS[0], a),), ((COLS[1], b),), ((COLS[0], a), (COLS[1], b)), ((COLS[1], b), (COLS[0], a))]:
+        engine.sheet(E, 'ordenes', sel); engine.options(E, 'ordenes', 'ESTATUS', sel)
+    assert sorted(coded) == sorted([*COLS, 'ESTATUS'])
+    assert [k for k in E['memo'] if k[0] == 'filter' and k[1] == 'ordenes'] == [('filter', 'ordenes')]
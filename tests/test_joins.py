@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from core import joins
+
+S = {
+    'ordenes': pd.DataFrame({'ID. PEDIDO COMPRADOR': [4500001.0, '4500002', ' 4500003 ', None], 'IMPORTE TOTAL': [100.0, 200.0, 300.0, 50.0]}),
+    'facturacion_2025': pd.DataFrame({'ORDEN DE COMPRA': ['4500001', '4500002', '4500002', '4509999'], 'Total (MXN)': [100.0, 150.0, 50.0, 10.0]}),
+    'facturas_adquira': pd.DataFrame({'PEDIDO': [4500001, 4500002, 4500003], 'TOTAL FACTURA': [100.0, 200.0, 250.0]}),
+}
+
+def test_lookup_normalizes_keys():
+    idx = joins.build_index(S)
+    assert {k: p.tolist() for k, p in joins.lookup(idx, 'pedido', 4500002).items()} == {'ordenes': [1], 'facturacion_2025': [1, 2], 'facturas_adquira': [1]}
+    assert joins.lookup(idx, 'pedido', 'nada') == {}
+
+def test_each_invoice_source_is_reconciled_on_its_own():
+    # Both sources bill the same orders: summing them would show every order twice over.
+    idx = joins.build_index(S)
+    f = joins.reconcile(idx, S, 'facturacion').set_index('key')
+    assert f['status'].to_dict() == {'4500001': 'ok', '4500002': 'ok', '4500003': 'left', '4509999': 'right'}
+    assert f.loc['4500002', ['n_right', 'right']].tolist() == [2, 200.0]
+    a = joins.reconcile(idx, S, 'adquira').set_index('key')
+    assert a['status'].to_dict() == {'4500001': 'ok', '4500002': 'ok', '4500003': 'diff'}
+    assert np.isclose(a.loc['4500003', 'diff'], -50.0)
+
+def test_reconcile_matches_a_merge():
+    r = np.random.default_rng(3); n = 500
+    o = pd.DataFrame({'ID. PEDIDO COMPRADOR': r.integers(0, 200, n), 'IMPORTE TOTAL': r.normal(1000, 100, n).round(2)})
+    f = pd.DataFrame({'ORDEN DE COMPRA': r.integers(100, 300, n).astype(str), 'Total (MXN)': r.normal(1000, 100, n).round(2)})
+    T = {'ordenes': o, 'facturacion_2025': f}
+    d = joins.reconcile(joins.build_index(T), T, 'facturacion').set_index('key')
+    lv = o.groupby(o['ID. PEDIDO COMPRADOR'].astype(str))['IMPORTE TOTAL'].sum(); rv = f.groupby('ORDEN DE COMPRA')['Total (MXN)'].sum()
+    m = pd.concat([lv.rename('left'), rv.rename('right')], axis=1).fillna(0)
+    assert set(d.index) == set(m.index)
+    assert np.allclose(d.loc[m.index, 'left'], m['left']) and np.allclose(d.loc[m.index, 'right'], m['right'])
@@ -0,0 +1,53 @@
+import os, re, time, zipfile
+from core import loader
+
+def _files(d):
+    return sorted(f for f in os.listdir(d) if f.endswith('.arrow'))
+
+def test_snapshots_are_reused(book, tmp_path):
+    S, meta = loader.load_data(book, snapshot_dir=str(tmp_path))
+    assert set(meta['source'].values()) == {'excel'}
+    T, again = loader.load_data(book, snapshot_dir=str(tmp_path))
+    assert set(again['source'].values()) == {'snapshot'} and again['fingerprint'] == meta['fingerprint']
+    for k in S: assert T[k].equals(S[k])
+
+def _edit_sheet(src, dst, sheet):
+    # Change one number in one worksheet's XML and copy every other part byte for byte.
+    parts = loader.xlsx_parts(open(src, 'rb').read())[0]; xml = parts[sheet]
+    with zipfile.ZipFile(src) as zi, zipfile.ZipFile(dst, 'w', zipfile.ZIP_DEFLATED) as zo:
+        for it in zi.infolist():
+            b = zi.read(it)
+            if b == xml: b = re.sub(rb'(<c r="[A-Z]+\d+"[^>]*><v>)(\d+)(</v>)', lambda m: m.group(1) + str(int(m.group(2)) + 1).encode() + m.group(3), b, count=1)
+            zo.writestr(it, b)
+    return dst
+
+def test_editing_one_sheet_reparses_only_that_sheet(book, tmp_path):
+    d = str(tmp_path / 'snap')
+    S, meta = loader.load_data(book, snapshot_dir=d)
+    T, again = loader.load_data(_edit_sheet(book, str(tmp_path / 'edit.xlsx'), loader.CFG['fianzas'][0]), snapshot_dir=d)
+    assert again['source'] == {**{k: 'snapshot' for k in S}, 'fianzas': 'excel'}
+    assert again['fingerprint'] != meta['fingerprint']
+    assert [k for k in S if again['sheet_fingerprints'][k] != meta['sheet_fingerprints'][k]] == ['fianzas']
+
+def test_config_change_invalidates_that_sheet(book, tmp_path):
+    d = str(tmp_path)
+    loader.load_data(book, snapshot_dir=d)
+    sn, hdr, dates, nums, drop = loader.CFG['prefacturas']
+    cfg = {**loader.CFG, 'prefacturas': (sn, hdr, dates[:-1], nums, drop)}
+    S, meta = loader.load_data(book, cfg, snapshot_dir=d)
+    assert meta['source'] == {**{k: 'snapshot' for k in S}, 'prefacturas': 'excel'}
+
+def test_prune_keeps_the_load_in_progress(book, tmp_path):
+    d = str(tmp_path)
+    for i in range(5):
+        p = os.path.join(d, f"old{i}.arrow"); open(p, 'wb').close(); os.utime(p, (time.time() - 1000 + i,) * 2)
+    S, meta = loader.load_data(book, snapshot_dir=d)
+    loader.prune_snapshots(d, keep=2, spare=set(meta['sheet_fingerprints'].values()))
+    assert _files(d) == sorted(f"{s}.arrow" for s in meta['sheet_fingerprints'].values() if s)
+
+def test_prune_drops_least_recently_used(tmp_path):
+    d = str(tmp_path)
+    for i, n in enumerate(['a', 'b', 'c']):
+        p = os.path.join(d, f"{n}.arrow"); open(p, 'wb').close(); os.utime(p, (time.time() - 100 + i,) * 2)
+    loader.prune_snapshots(d, keep=2)
+    assert _files(d) == ['b.arrow', 'c.arrow']
@@ -0,0 +1,29 @@
+from datetime import datetime
+import pytest
+from core import pdf, sucursales
+
+@pytest.fixture
+def today(monkeypatch):
+    # Pin datetime.now() inside core.pdf; set day[0] to move to another day.
+    day = [datetime(2025, 6, 10, 9, 0)]
+    class Fixed(datetime):
+        @classmethod
+        def now(cls, tz=None): return day[0]
+    monkeypatch.setattr(pdf, 'datetime', Fixed); monkeypatch.setattr(pdf, '_cache', type(pdf._cache)())
+    return day
+
+def test_cache_key_is_branch_data_and_day(loaded, today):
+    S, meta = loaded; idx = sucursales.build_index(S); suc = idx['names'][0]
+    sd = sucursales.lookup(idx, S, suc, True); fp = meta['fingerprint']
+    a = pdf.cached_pdf(suc, sd, fp)
+    assert a.startswith(b'%PDF') and pdf.cached_pdf(suc, sd, fp) is a
+    assert pdf.cached_pdf(suc, sd, 'otra') is not a
+    today[0] = datetime(2025, 6, 11, 0, 1)
+    b = pdf.cached_pdf(suc, sd, fp)
+    assert b is not a
+    assert set(pdf._cache) == {(suc, fp, '10/06/2025'), (suc, 'otra', '10/06/2025'), (suc, fp, '11/06/2025')}
+
+def test_cache_is_bounded(today, monkeypatch):
+    monkeypatch.setattr(pdf, 'PDF_CACHE_SIZE', 2)
+    for i in range(4): pdf.cached_pdf('X', {}, f"fp{i}")
+    assert list(pdf._cache) == [('X', 'fp2', '10/06/2025'), ('X', 'fp3', '10/06/2025')]
@@ -0,0 +1,27 @@
+import pandas as pd
+from core import loader, quality
+
+SPEC = ('Datos', 0, ['Fecha'], ['Monto', 'Faltante'], 'ID')
+
+def test_counts_recorded_while_parsing(tmp_path):
+    p = str(tmp_path / 'q.xlsx')
+    pd.DataFrame({'ID': ['A1', 'A1', None, 'A2', 'A3'],
+                  'Fecha': ['2025-01-01', 'ayer', '2025-02-01', None, '2025-03-01'],
+                  'Monto': [10, 'abc', 'x', None, 7]}).to_excel(p, sheet_name='Datos', index=False)
+    cfg = {'x': SPEC, 'y': ('No existe', 0, [], [], 'ID')}
+    S, meta = loader.load_data(p, cfg, snapshot_dir=str(tmp_path / 'snap'))
+    q = meta['quality']['x']
+    assert (q['rows'], q['dropped'], q['missing'], q['coerced']) == (5, 1, ['Faltante'], {'Fecha': 1, 'Monto': 2})
+    assert (q['duplicates'], q['dup_sample']) == (2, ['A1'])
+    assert len(S['x']) == 4
+    r = quality.report(meta, cfg).set_index(['Hoja', 'Columna', 'Problema'])['Registros']
+    assert r[('x', 'Monto', 'Valores no convertidos')] == 2 and r[('x', 'ID', 'ID duplicado')] == 2
+    assert r[('x', 'ID', 'Filas sin clave descartadas')] == 1 and ('y', '', 'Hoja sin cargar') in r.index
+    s = quality.summary(meta).iloc[0]
+    assert (s['Filas leídas'], s['Filas cargadas'], s['Columnas faltantes'], s['Valores no convertidos']) == (5, 4, 1, 3)
+
+def test_quality_survives_the_snapshot(book, tmp_path):
+    d = str(tmp_path)
+    _, meta = loader.load_data(book, snapshot_dir=d)
+    _, again = loader.load_data(book, snapshot_dir=d)
+    assert set(again['source'].values()) == {'snapshot'} and again['quality'] == meta['quality']
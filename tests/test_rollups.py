@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from core import rollups, filtering, engine
+from core.loader import CFG
+
+def _same(got, want, by, measures):
+    want = want.set_index(by); got = got.set_index(by)
+    assert sorted(got.index.astype(str)) == sorted(want.index.astype(str)), by
+    for c in ['count', *measures]: assert np.allclose(got.loc[want.index, c].to_numpy(float), want[c].to_numpy(float)), (by, c)
+
+def _groupby(df, by, measures):
+    g = df.assign(**{m: pd.to_numeric(df[m], errors='coerce') for m in measures}).groupby(by, observed=True, dropna=True)
+    return g.agg(**{'count': (by, 'size')}, **{m: (m, 'sum') for m in measures}).reset_index()
+
+def test_groups_match_groupby(loaded):
+    S, _ = loaded; cube = rollups.build(S)
+    for k, dims in rollups.DIMS.items():
+        if k not in S: continue
+        df, measures = S[k], [c for c in CFG[k][3] if c in S[k].columns]
+        for by in (d for d in dims if d in df.columns):
+            _same(rollups.group(cube, k, by, measures), _groupby(df, by, measures), by, measures)
+        for c in measures:
+            v = pd.to_numeric(df[c], errors='coerce')
+            assert np.isclose(rollups.total(cube, k, c)[0], v.sum()) and rollups.total(cube, k, c)[1] == v.notna().sum()
+
+def test_masked_groups_and_months_match_groupby(loaded):
+    S, _ = loaded; cube = rollups.build(S); df = S['ordenes']
+    idx = filtering.build_index(df, ('ESTADO',)); sel = (('ESTADO', filtering.options(idx, 'ESTADO')[0]),)
+    m = filtering.mask(idx, sel); sub = df[m]
+    _same(rollups.group(cube, 'ordenes', 'TIPO DE PROYECTO', ['IMPORTE TOTAL'], m), _groupby(sub, 'TIPO DE PROYECTO', ['IMPORTE TOTAL']), 'TIPO DE PROYECTO', ['IMPORTE TOTAL'])
+    assert rollups.count(cube, 'ordenes', m) == len(sub)
+    mon = sub.assign(M=pd.to_datetime(sub['FECHA'], errors='coerce').dt.to_period('M').astype(str)).loc[lambda d: d['FECHA'].notna()]
+    _same(rollups.monthly(cube, 'ordenes', 'FECHA', ['IMPORTE TOTAL'], m), _groupby(mon, 'M', ['IMPORTE TOTAL']), 'M', ['IMPORTE TOTAL'])
+
+def test_drill_rows_match_a_scan(loaded):
+    S, _ = loaded; cube = rollups.build(S); df = S['ordenes']
+    m = (np.arange(len(df)) % 2 == 0)
+    for e in df['ESTADO'].dropna().unique():
+        hit = (df['ESTADO'] == e).to_numpy()
+        assert rollups.rows(cube, 'ordenes', 'ESTADO', e).tolist() == np.flatnonzero(hit).tolist()
+        assert rollups.rows(cube, 'ordenes', 'ESTADO', e, m).tolist() == np.flatnonzero(hit & m).tolist()
+    assert len(rollups.rows(cube, 'ordenes', 'ESTADO', 'NO EXISTE')) == 0
+
+def test_engine_drill_matches_the_filtered_sheet(loaded):
+    E = engine.attach(*loaded); e = engine.counts(E, 'ordenes', 'ESTADO')['ESTADO'][0]
+    assert engine.drill(E, 'ordenes', 'ESTADO', e).equals(engine.sheet(E, 'ordenes', (('ESTADO', e),)))
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from core import search
+
+def _folded(df):
+    return df.map(lambda v: '' if pd.isna(v) else search.fold(v))
+
+def _baseline(df, terms):
+    # Plain substring scan over every cell: what the Explorador did before the index.
+    F = _folded(df); m = np.ones(len(df), dtype=bool)
+    for col, val in terms:
+        cols = [col] if col else list(df.columns)
+        m &= np.logical_or.reduce([F[c].str.contains(val, regex=False).to_numpy() for c in cols])
+    return np.flatnonzero(m)
+
+def test_query_matches_substring_scan(loaded):
+    S, _ = loaded
+    for k in ('ordenes', 'fianzas', 'prefacturas'):
+        df = S[k]; idx = search.build_index(df)
+        words = [search.fold(v)[:4] for v in df.iloc[0] if isinstance(v, str) and len(v) >= 4][:3]; assert words
+        for q in words + [' '.join(words[:2]), 'zzzz-sin-resultado', '2025']:
+            assert np.array_equal(search.query(idx, q), _baseline(df, [(None, t) for t in search.fold(q).split()])), (k, q)
+
+def test_accents_case_and_column_scope(loaded):
+    df = loaded[0]['ordenes']
+    idx = search.build_index(df); v = str(df['ESTADO'].dropna().iloc[0])
+    q = f"ESTADO:{v.upper()}"
+    assert np.array_equal(search.query(idx, q), _baseline(df, [('ESTADO', search.fold(v))]))
+    assert search.fold('Ángel Niño') == 'angel nino'
+    assert search.query(idx, '   ') is None
@@ -0,0 +1,12 @@
+import shutil
+from core import store, engine, cache
+
+def test_year_engines_stay_under_the_cache_budget(book, tmp_path, monkeypatch):
+    files = {y: shutil.copy(book, str(tmp_path / f"SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_{y}.xlsx")) for y in (2024, 2025)}
+    ST = store.load(files)
+    want = store.summary(ST, [('ordenes', 'IMPORTE TOTAL')])
+    assert want['Año'].tolist() == [2024, 2025] and 'facturacion_2025' in ST['errors'][2024]
+    # A one-byte budget keeps only the newest engine; the store still answers for every year.
+    monkeypatch.setattr(engine, '_cache', cache.new('libros', 1, engine.size, engine._spill, engine._restore))
+    assert store.summary(ST, [('ordenes', 'IMPORTE TOTAL')]).equals(want)
+    assert cache.stats(engine._cache)['entries'] == 1 and cache.stats(engine._cache)['evictions'] >= 1
@@ -0,0 +1,35 @@
+from core import sucursales
+
+def _baseline(S, suc):
+    # The substring scan the Overview used before the index.
+    d, u = {}, str(suc).upper().strip()
+    for k, c in sucursales.NAME_COLS:
+        if k in S and c in S[k].columns:
+            m = S[k][S[k][c].astype(str).str.upper().str.strip().str.contains(u, na=False, regex=False)]
+            if len(m) > 0: d[k] = m
+    return d
+
+def _queries(names):
+    for n in names[:25]:
+        w = n.split()
+        yield n; yield n.lower(); yield n[:3]; yield n[2:-2]
+        if len(w) > 2: yield ' '.join(w[1:])
+    yield 'zzz-sin-sucursal'
+
+def test_lookup_matches_substring_scan(loaded):
+    S = loaded[0]; idx = sucursales.build_index(S)
+    for q in _queries(idx['names']):
+        got, want = sucursales.lookup(idx, S, q), _baseline(S, q)
+        assert list(got) == list(want), q
+        for k in want: assert got[k].equals(want[k]), (q, k)
+
+def test_names_and_exact_match(loaded):
+    S = loaded[0]; idx = sucursales.build_index(S)
+    want = set()
+    for k, c in sucursales.NAME_COLS:
+        if k in sucursales.LIST_SHEETS and k in S and c in S[k].columns: want.update(S[k][c].dropna().unique())
+    assert idx['names'] == sorted(str(x) for x in want if str(x).strip())
+    n = idx['names'][0]
+    for k, df in sucursales.lookup(idx, S, n, exact=True).items():
+        c = dict(sucursales.NAME_COLS)[k]
+        assert (df[c].astype(str).str.upper().str.strip() == n.upper().strip()).all()
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from core import vencimientos
+
+REF = pd.Timestamp('2025-06-10')
+DF = pd.DataFrame({'CR': range(8), 'Afianzadora': ['A', 'B', 'A', 'B', 'A', 'B', 'A', None],
+                   'Estatus Vigencia': ['Vigente'] * 6 + ['Vencida', 'Vigente'],
+                   'Vencimiento': pd.to_datetime(['2025-06-10 15:30', '2025-07-10 00:00', '2025-07-11 00:00', '2025-06-09 00:00',
+                                                  '2025-05-11 00:00', '2025-05-10 00:00', None, '2025-09-08 00:00'])})
+
+def _baseline(days, ref=REF, af=None):
+    # Calendar-day comparison on the column itself, ref day included.
+    d = DF['Vencimiento'].dt.normalize()
+    m = d.between(ref, ref + pd.Timedelta(days=days)) if days >= 0 else d.between(ref + pd.Timedelta(days=days), ref - pd.Timedelta(days=1))
+    if af: m &= DF['Afianzadora'].isin(af)
+    return sorted(np.flatnonzero(m.to_numpy()))
+
+def test_window_edges_match_a_direct_scan():
+    idx = vencimientos.build_index(DF)
+    for days in (0, 1, 29, 30, 31, 90, -1, -30, -31, -90):
+        assert sorted(vencimientos.upcoming(idx, days, REF)) == _baseline(days), days
+    assert sorted(vencimientos.upcoming(idx, 30, REF, (('Afianzadora', ['A']),))) == _baseline(30, af=['A'])
+    # Today counts as "expiring", yesterday as "already expired"; the time of day does not matter.
+    assert list(vencimientos.upcoming(idx, 0, REF)) == [0] and list(vencimientos.upcoming(idx, -1, REF)) == [3]
+
+def test_counts_and_days_left():
+    idx = vencimientos.build_index(DF)
+    assert vencimientos.counts(idx, REF) == {h: len(_baseline(h)) for h in vencimientos.HORIZONS}
+    a = vencimientos.alerts(DF, vencimientos.upcoming(idx, 90, REF), REF)
+    assert a['Días'].tolist() == [0, 30, 31, 90] and a['Días'].is_monotonic_increasing
@@ -0,0 +1,46 @@
+import os, shutil, time
+import pandas as pd
+from core import watcher, store
+
+def _copy(src, dst, mtime):
+    os.makedirs(os.path.dirname(dst), exist_ok=True); shutil.copy(src, dst); os.utime(dst, (mtime, mtime))
+    return dst
+
+def test_other_year_never_replaces_current(book, tmp_path):
+    main = _copy(book, str(tmp_path / 'SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2025.xlsx'), time.time() - 100)
+    data = tmp_path / 'data'
+    _copy(book, str(data / 'SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2024.xlsx'), time.time())
+    _copy(book, str(data / 'years' / 'SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2023.xlsx'), time.time())
+    w = watcher.start([main, str(data)], interval=3600, year=watcher.year_of(main))
+    try:
+        assert w['current'][1] == main
+        watcher.poll(w); watcher.poll(w)
+        assert w['current'][1] == main
+        assert sorted(store.workbooks([main, str(data / 'years')])) == [2023, 2025]
+    finally: watcher.stop(w)
+
+def test_same_year_update_is_picked_up(book, tmp_path):
+    main = _copy(book, str(tmp_path / 'SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2025.xlsx'), time.time() - 100)
+    w = watcher.start([main, str(tmp_path / 'data')], interval=3600, year=2025)
+    try:
+        new = _copy(book, str(tmp_path / 'data' / 'SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL.xlsx'), time.time())
+        assert not watcher.poll(w)  # first sighting: waits one poll for the file to settle
+        assert watcher.poll(w) and w['current'][1] == new
+    finally: watcher.stop(w)
+
+def test_unrelated_workbooks_never_replace_current(book, tmp_path):
+    main = _copy(book, str(tmp_path / 'SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL_2025.xlsx'), time.time() - 100)
+    data = tmp_path / 'data'; os.makedirs(data)
+    pd.DataFrame({'Concepto': ['a'], 'Monto': [1]}).to_excel(data / 'reporte_gastos.xlsx', index=False)
+    w = watcher.start([main, str(data)], interval=3600, year=2025)
+    try:
+        watcher.poll(w); watcher.poll(w)
+        assert w['current'][1] == main and w['error'] is None
+        # Named like the system workbook but without its sheets: rejected, the previous data stays.
+        shutil.copy(data / 'reporte_gastos.xlsx', data / 'SISTEMA_INTEGRAL_DE_CONTROL_DOCUMENTAL.xlsx')
+        watcher.poll(w); watcher.poll(w)
+        assert w['current'][1] == main and 'ninguna hoja' in w['error'][2]
+    finally: watcher.stop(w)
+
+def test_store_folder_is_not_watched(tmp_path):
+    assert os.path.normpath(store.DIR) not in map(os.path.normpath, watcher.DIRS)